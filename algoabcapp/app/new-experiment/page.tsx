@@ -4,7 +4,7 @@ import { useState, useEffect } from 'react';
 import { useRouter } from 'next/navigation';
 import { BeeParams, ExperimentInput, InputMode } from '@/types/experiment';
 import { useExperimentStore } from '@/lib/store';
-import { runBeeExperiment, saveExperiment } from '@/lib/api';
+import { runBeeExperimentJob, saveExperiment } from '@/lib/api';
 import { saveExperimentLocally } from '@/lib/persistence';
 import { parseCSV, parseExcel, ParsedData } from '@/lib/csv';
 import { getPreloadedDataset } from '@/lib/datasets';
@@ -114,7 +114,7 @@ export default function NewExperimentPage() {
 
       let response;
       try {
-        response = await runBeeExperiment({ params, input });
+        response = await runBeeExperimentJob({ params, input });
       } catch (err) {
         // If backend is down or call fails, fall back to a local simulated run so UX still works.
         console.warn('Bee API call failed, using local simulation:', err);
@@ -1,4 +1,7 @@
-import { ExperimentRunRequest, ExperimentRunResponse } from '@/types/experiment';
+import {
+  BeeCheckpoint, BeeDataset, BeeJob, ExperimentResultSeries, ExperimentRunRequest, ExperimentRunResponse,
+  StackedRunRequest, StackedRunResponse,
+} from '@/types/experiment';
 
 const BEE_API_URL = process.env.NEXT_PUBLIC_BEE_API || 'http://localhost:8001';
 
@@ -17,6 +20,148 @@ export async function runBeeExperiment(body: ExperimentRunRequest): Promise<Expe
   return res.json();
 }
 
+// One ABC run per matrix, all computed together on the server
+export async function runBeeStack(body: StackedRunRequest): Promise<StackedRunResponse> {
+  const res = await fetch(`${BEE_API_URL}/run/stacked`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify(body),
+  });
+
+  if (!res.ok) {
+    const errorText = await res.text();
+    throw new Error(`Stacked run failed: ${res.status} ${errorText}`);
+  }
+
+  return res.json();
+}
+
+// Run over Server-Sent Events: onIteration fires for every streamed record
+// (every `every`-th iteration plus the last), the promise resolves with the
+// final result. The streamed result carries no resultSeries; callers keep the
+// records they received.
+export async function streamBeeExperiment(
+  body: ExperimentRunRequest,
+  onIteration: (record: ExperimentResultSeries) => void,
+  every = 1,
+): Promise<ExperimentRunResponse> {
+  const res = await fetch(`${BEE_API_URL}/run/stream?every=${every}`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json', Accept: 'text/event-stream' },
+    body: JSON.stringify(body),
+  });
+
+  if (!res.ok || !res.body) {
+    const errorText = await res.text();
+    throw new Error(`Run failed: ${res.status} ${errorText}`);
+  }
+
+  const reader = res.body.pipeThrough(new TextDecoderStream()).getReader();
+  let buffer = '';
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += value;
+
+    let sep;
+    while ((sep = buffer.indexOf('\n\n')) !== -1) {
+      const chunk = buffer.slice(0, sep);
+      buffer = buffer.slice(sep + 2);
+
+      const event = /^event: (.*)$/m.exec(chunk)?.[1];
+      const data = JSON.parse(/^data: (.*)$/m.exec(chunk)?.[1] ?? 'null');
+      if (event === 'iteration') onIteration(data);
+      else if (event === 'result') return data;
+      else if (event === 'error') throw new Error(data?.detail || 'Run failed');
+    }
+  }
+
+  throw new Error('Stream ended before the run finished');
+}
+
+export async function submitBeeJob(body: ExperimentRunRequest): Promise<BeeJob> {
+  const res = await fetch(`${BEE_API_URL}/jobs`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify(body),
+  });
+
+  if (!res.ok) {
+    const errorText = await res.text();
+    throw new Error(`Job submission failed: ${res.status} ${errorText}`);
+  }
+
+  return res.json();
+}
+
+export async function getBeeJob(id: string, since = 0): Promise<BeeJob> {
+  const res = await fetch(`${BEE_API_URL}/jobs/${id}?since=${since}`);
+  if (!res.ok) {
+    const errorText = await res.text();
+    throw new Error(`Job status failed: ${res.status} ${errorText}`);
+  }
+  return res.json();
+}
+
+export async function getBeeJobResult(id: string): Promise<ExperimentRunResponse> {
+  const res = await fetch(`${BEE_API_URL}/jobs/${id}/result`);
+  if (!res.ok) {
+    const errorText = await res.text();
+    throw new Error(`Job result failed: ${res.status} ${errorText}`);
+  }
+  return res.json();
+}
+
+export async function cancelBeeJob(id: string): Promise<BeeJob> {
+  const res = await fetch(`${BEE_API_URL}/jobs/${id}`, { method: 'DELETE' });
+  if (!res.ok) {
+    const errorText = await res.text();
+    throw new Error(`Job cancellation failed: ${res.status} ${errorText}`);
+  }
+  return res.json();
+}
+
+export async function fetchCheckpoints(): Promise<BeeCheckpoint[]> {
+  const res = await fetch(`${BEE_API_URL}/checkpoints`);
+  if (!res.ok) return [];
+  return res.json();
+}
+
+// Continue a checkpointed run as a new job, up to `iterations` in total
+export async function resumeCheckpoint(id: string, iterations?: number): Promise<BeeJob> {
+  const query = iterations ? `?iterations=${iterations}` : '';
+  const res = await fetch(`${BEE_API_URL}/checkpoints/${id}/resume${query}`, { method: 'POST' });
+  if (!res.ok) {
+    const errorText = await res.text();
+    throw new Error(`Resume failed: ${res.status} ${errorText}`);
+  }
+  return res.json();
+}
+
+// Submit the run as a background job and poll it until it finishes, handing
+// new resultSeries entries to onProgress as they arrive.
+export async function runBeeExperimentJob(
+  body: ExperimentRunRequest,
+  onProgress?: (series: ExperimentResultSeries[], job: BeeJob) => void,
+  pollMs = 500,
+): Promise<ExperimentRunResponse> {
+  let job = await submitBeeJob(body);
+  let since = 0;
+
+  while (true) {
+    job = await getBeeJob(job.id, since);
+    const fresh = job.resultSeries ?? [];
+    since += fresh.length;
+    if (fresh.length && onProgress) onProgress(fresh, job);
+
+    if (job.status === 'failed') throw new Error(job.error || 'Job failed');
+    if (job.status === 'completed' || job.status === 'cancelled') break;
+    await new Promise((resolve) => setTimeout(resolve, pollMs));
+  }
+
+  return getBeeJobResult(job.id);
+}
+
 export async function saveExperiment(experiment: any) {
   const res = await fetch(`${BEE_API_URL}/experiments`, {
     method: 'POST',
@@ -30,6 +175,27 @@ export async function saveExperiment(experiment: any) {
   return res.json();
 }
 
+// Upload a .csv/.xlsx/.npy/Arrow file as a server-side dataset; runs then
+// reference it with input.datasetName instead of sending the matrix.
+export async function uploadDataset(file: File, name?: string, sheet?: string): Promise<BeeDataset> {
+  const form = new FormData();
+  form.append('file', file);
+  if (name) form.append('name', name);
+  if (sheet) form.append('sheet', sheet);
+  const res = await fetch(`${BEE_API_URL}/datasets`, { method: 'POST', body: form });
+  if (!res.ok) {
+    const err = await res.text();
+    throw new Error(`Upload failed: ${res.status} ${err}`);
+  }
+  return res.json();
+}
+
+export async function fetchDatasets(): Promise<BeeDataset[]> {
+  const res = await fetch(`${BEE_API_URL}/datasets`);
+  if (!res.ok) return [];
+  return res.json();
+}
+
 export async function fetchExperiments() {
   const res = await fetch(`${BEE_API_URL}/experiments`);
   if (!res.ok) return [];
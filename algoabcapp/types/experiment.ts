@@ -1,12 +1,34 @@
 export type InputMode = 'excel' | 'preloaded' | 'manual';
 
 export interface BeeParams {
-  numBees: number;
+  numBees: number;             // colony size (food sources), at least the number of matrix rows
+  feedLimit?: number;          // trials before a source is abandoned (default alternatives x criteria)
   iterations: number;
   seed?: number;
+  bitGenerator?: 'pcg64' | 'philox'; // private RNG stream of the run
+  backend?: 'numpy' | 'numba';       // engine backend (GET /backends)
+  trace?: 'none' | 'summary' | 'every-k' | 'file'; // server-side run tracing
+  traceEvery?: number;
+  tracePopulation?: boolean;
+  profile?: boolean;            // return a cProfile summary with the result
   lowerBound?: number; // lb
   upperBound?: number; // ub
-  objectiveFunction?: string; // fobj identifier/name
+  objectiveFunction?: string; // fobj identifier/name (GET /objectives)
+  weights?: number[];          // criteria weights for weighted-sum / topsis
+  cacheEvaluations?: boolean;  // memoize fobj on quantized positions
+  islands?: number;            // island model: colonies in parallel processes
+  migrationInterval?: number;  // iterations between migrations
+  migrants?: number;           // best sources sent to the next island
+  multiObjective?: 'criteria' | 'zdt1'; // Pareto mode: return a front instead of one solution
+  archiveSize?: number;        // maximum points kept on the front
+  archivePruning?: 'crowding' | 'hypervolume'; // hypervolume needs 2 objectives
+  checkpointEvery?: number;    // save the colony every k iterations (resumable)
+  warmStart?: string;          // checkpoint or experiment id whose best sources seed the run
+  maxEvaluations?: number;     // stop after this many fobj evaluations
+  targetFitness?: number;      // stop once best f(x) <= target
+  stagnationWindow?: number;   // stop after k iterations without improvement
+  stagnationEpsilon?: number;  // minimum improvement that resets the window
+  timeLimitMs?: number;        // wall-clock budget
 }
 
 export interface ExperimentInput {
@@ -36,7 +58,7 @@ export interface Experiment {
   params: BeeParams;
   input: ExperimentInput;
   kpis: KPI[];
-  bestSolution?: number[];             // indices or values
+  bestSolution?: number[];             // criteria values (weighted-sum: mix weights of the alternatives)
   resultSeries: ExperimentResultSeries[];
 }
 
@@ -46,11 +68,81 @@ export interface ExperimentRunRequest {
   input: ExperimentInput;
 }
 
+export type StopReason = 'iterations' | 'evaluations' | 'target' | 'stagnation' | 'time' | 'cancelled';
+
+export interface ParetoPoint {
+  objectives: number[];         // minimized
+  position: number[];
+  alternative?: string;         // criteria: alternative with the largest share
+  mix?: number[];               // criteria: share of every alternative
+  criteria?: number[];          // criteria: values of the mixed profile
+}
+
 export interface ExperimentRunResponse {
   durationMs: number;
   kpis: KPI[];
   bestSolution?: number[];
   resultSeries: ExperimentResultSeries[];
+  stopReason?: StopReason;
+  paretoFront?: ParetoPoint[];
+  profile?: { phasesMs: Record<string, number>; stats: string };
+  checkpointId?: string | null;
+}
+
+export interface StackedRunRequest {
+  params: BeeParams;
+  matrices?: number[][][];      // one decision matrix per problem
+  datasetNames?: string[];      // stored datasets, appended after matrices
+  includeSolutions?: boolean;
+}
+
+export interface StackedRunResult {
+  problem: number;              // index in the request
+  bestAlternative: string;      // A<k>, or "Source <k>" for a sampled source
+  bestIndex: number;
+  bestFitness: number;
+  bestSolution?: number[];
+}
+
+export interface StackedRunResponse {
+  durationMs: number;
+  evaluations: number;
+  results: StackedRunResult[];
+}
+
+export interface BeeDataset {
+  name: string;
+  rows: number;
+  columns: number;
+  criteria?: string[] | null;      // column names from the file header
+  alternatives?: string[] | null;  // row labels from the first column
+  source?: string | null;          // uploaded file name
+  createdAt: string;
+}
+
+export type BeeJobStatus = 'queued' | 'running' | 'completed' | 'failed' | 'cancelled';
+
+export interface BeeJob {
+  id: string;
+  status: BeeJobStatus;
+  iteration: number;
+  iterations: number;
+  createdAt: number;
+  startedAt?: number | null;
+  finishedAt?: number | null;
+  error?: string | null;
+  checkpointId?: string | null;
+  resultSeries?: ExperimentResultSeries[];
+}
+
+export interface BeeCheckpoint {
+  id: string;
+  dataset?: string | null;
+  iteration: number;            // iterations saved so far
+  iterations: number;           // iterations the run was asked for
+  bestValue: number;
+  stopReason?: StopReason | null; // null while the run was interrupted
+  updatedAt: number;
 }
 
 // Preloaded dataset options
@@ -0,0 +1,386 @@
+"""
+Vectorized Artificial Bee Colony engine.
+
+Same algorithm as the thesis scripts (_ABC_.py, ABC GITHUB.py), but every
+phase works on the whole colony at once: one batched neighbour generation
+and one batched fobj call per phase instead of a Python loop per bee.
+
+A neighbour differs from its source in one coordinate only. When fobj is
+separable, f(x) = constant + sum_j term(x[j], j), and exposes that
+per-coordinate term as fobj.term(values, criteria), candidates are not
+evaluated from scratch: f(new) = f(old) + term(new[j], j) - term(old[j], j),
+so a move costs O(1) instead of O(D). Rounding errors of those updates add
+up, so such colonies re-evaluate every source exactly every REFRESH_INTERVAL
+iterations, and values are clamped to fobj.lower when the objective has a
+known minimum.
+"""
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Iterator, List, Optional
+
+import numpy as np
+
+# Bump whenever a change alters the trajectory of seeded runs, so cached
+# results of older versions are not served (see result_cache.py).
+ENGINE_VERSION = 7
+
+# Iterations between exact re-evaluations of incrementally updated colonies
+REFRESH_INTERVAL = 50
+
+
+# Bit generators a run may choose; every run owns its Generator, nothing
+# touches the global np.random state.
+BIT_GENERATORS = {
+    "pcg64": np.random.PCG64,
+    "philox": np.random.Philox,
+}
+
+
+def make_rng(seed=None, bit_generator: str = "pcg64") -> np.random.Generator:
+    """Independent Generator for one run; seed may be an int, a SeedSequence or None."""
+    key = (bit_generator or "pcg64").strip().lower()
+    if key not in BIT_GENERATORS:
+        raise ValueError(f"Unknown bit generator '{bit_generator}'. Available: {', '.join(BIT_GENERATORS)}")
+    return np.random.Generator(BIT_GENERATORS[key](seed))
+
+
+def fobj(X):
+    """Distance of every criterion to 0.05 (objective used by the scripts)."""
+    return np.sum((X - 0.05) ** 2, axis=1)
+
+
+fobj.term = lambda x, j: (x - 0.05) ** 2
+fobj.lower = 0.0
+
+
+def calculate_fitness(fx):
+    return np.where(fx >= 0, 1.0 / (1.0 + np.abs(fx)), 1.0 + np.abs(fx))
+
+
+@dataclass
+class IterationStats:
+    iteration: int
+    best_fitness: float
+    avg_fitness: float
+    std_fitness: float
+
+    def as_dict(self):
+        return {
+            "iteration": self.iteration,
+            "bestFitness": round(self.best_fitness, 6),
+            "avgFitness": round(self.avg_fitness, 6),
+            "stdFitness": round(self.std_fitness, 6),
+        }
+
+
+@dataclass
+class ABCResult:
+    best_position: np.ndarray
+    best_value: float
+    best_index: int
+    iterations: int
+    evaluations: int
+    series: List[IterationStats] = field(default_factory=list)
+    stop_reason: Optional[str] = None
+
+
+@dataclass
+class StopCriteria:
+    """
+    Stopping rules checked after every iteration, on top of the iteration count.
+    The first rule that fires is recorded in `reason`.
+
+    max_evaluations: budget of fobj evaluations (may be exceeded by at most
+        one iteration's worth, since it is checked between iterations)
+    target_fitness: stop once the best objective value is <= this
+    stagnation_window: stop after this many iterations in which the best
+        value did not improve by more than stagnation_epsilon
+    time_limit: wall-clock budget in seconds
+    """
+    max_evaluations: Optional[int] = None
+    target_fitness: Optional[float] = None
+    stagnation_window: Optional[int] = None
+    stagnation_epsilon: float = 0.0
+    time_limit: Optional[float] = None
+    reason: Optional[str] = None
+
+    def start(self, colony):
+        self.reason = None
+        self._deadline = None if self.time_limit is None else time.perf_counter() + self.time_limit
+        self._last_best = colony.best_value
+        self._stalled = 0
+
+    def check(self, colony) -> Optional[str]:
+        if colony.best_value < self._last_best - self.stagnation_epsilon:
+            self._last_best = colony.best_value
+            self._stalled = 0
+        else:
+            self._stalled += 1
+
+        if self.target_fitness is not None and colony.best_value <= self.target_fitness:
+            self.reason = "target"
+        elif self.max_evaluations is not None and colony.evaluations >= self.max_evaluations:
+            self.reason = "evaluations"
+        elif self.stagnation_window is not None and self._stalled >= self.stagnation_window:
+            self.reason = "stagnation"
+        elif self._deadline is not None and time.perf_counter() >= self._deadline:
+            self.reason = "time"
+        return self.reason
+
+
+class Colony:
+    """
+    Colony state as a structure of arrays: positions (size x D, float64),
+    objective values and fitness (float64) and trial counters (int32), all
+    contiguous and allocated once. A scratch buffer of the same shape as the
+    positions holds the candidate sources of each phase.
+
+    The first food sources are the rows of the input matrix (the alternatives);
+    when `size` is larger, the rest are sampled uniformly in [lb, ub]. A
+    smaller `size` is raised to the number of rows, so every alternative is
+    a food source. The default `limit` is alternatives x D, the classic SN x D
+    rule over the seeded sources: a source gains about two trials per
+    iteration whatever the colony size, so a limit that grew with `size`
+    would keep large colonies from ever sending scouts.
+    incremental=False evaluates every candidate with fobj even when fobj
+    is separable.
+    """
+
+    backend = "numpy"
+
+    def __init__(self, matrix, fobj=fobj, lb=0.0, ub=1.0, limit=None, rng=None, size=None,
+                 incremental=True):
+        matrix = np.asarray(matrix, dtype=np.float64)
+        if matrix.ndim != 2 or matrix.shape[0] < 1 or matrix.shape[1] < 1:
+            raise ValueError("matrix must be 2-D with at least 1 row and 1 column")
+        self.alternatives, self.D = matrix.shape
+        self.N = self.alternatives if size is None else max(int(size), self.alternatives)
+        if self.N < 2:
+            raise ValueError("colony needs at least 2 food sources")
+        self.lb = np.broadcast_to(np.asarray(lb, dtype=np.float64), (self.D,))
+        self.ub = np.broadcast_to(np.asarray(ub, dtype=np.float64), (self.D,))
+        self.limit = self.alternatives * self.D if limit is None else limit
+        self.fobj = fobj
+        # Per-coordinate term of a separable fobj, used to evaluate moves incrementally
+        self.term = getattr(fobj, "term", None) if incremental else None
+        self.lower = getattr(fobj, "lower", None)
+        self.steps = 0
+        self.rng = rng if rng is not None else make_rng()
+        self.evaluations = 0
+        # Optional observers.Observer notified of phases, scouts and iterations
+        self.observer = None
+
+        seeded = self.alternatives
+        self.pos = np.empty((self.N, self.D), dtype=np.float64)
+        self.pos[:seeded] = matrix
+        if self.N > seeded:
+            self.pos[seeded:] = self.rng.uniform(self.lb, self.ub, size=(self.N - seeded, self.D))
+        self._candidates = np.empty_like(self.pos)
+        self._all = np.arange(self.N)
+
+        self.fx = self.evaluate(self.pos)
+        self.fit = calculate_fitness(self.fx)
+        self.trial = np.zeros(self.N, dtype=np.int32)
+
+        ind = int(np.argmin(self.fx))
+        self.best_value = float(self.fx[ind])
+        self.best_position = self.pos[ind].copy()
+        self.best_index = ind
+
+    def evaluate(self, X):
+        self.evaluations += X.shape[0]
+        if self.observer is None:
+            return np.asarray(self.fobj(X), dtype=np.float64)
+        start = time.perf_counter_ns()
+        fx = np.asarray(self.fobj(X), dtype=np.float64)
+        self.observer.on_evaluate(self, X.shape[0], time.perf_counter_ns() - start)
+        return fx
+
+    def _neighbours(self, idx):
+        """
+        Move each source in idx along one random criterion towards/away from a
+        partner. A candidate is its source with one coordinate changed, so
+        returns (criteria, new values, objective values) of the candidates.
+        """
+        n = idx.shape[0]
+        p2c = self.rng.integers(self.D, size=n)
+        # Draw from N-1 candidates and skip over i, so partner != i without rejection.
+        partner = self.rng.integers(self.N - 1, size=n)
+        partner += partner >= idx
+
+        X = self.pos[idx, p2c]
+        Xp = self.pos[partner, p2c]
+        phi = self.rng.uniform(-1.0, 1.0, size=n) * (X - Xp)
+
+        moved = np.clip(X + phi, self.lb[p2c], self.ub[p2c])
+        if self.term is not None:
+            return p2c, moved, self.evaluate_moves(idx, p2c, X, moved)
+        Xnew = self._candidates[:n]
+        np.take(self.pos, idx, axis=0, out=Xnew)
+        Xnew[np.arange(n), p2c] = moved
+        return p2c, moved, self.evaluate(Xnew)
+
+    def evaluate_moves(self, idx, criteria, old, new):
+        """Objective values of the sources idx after criteria changed from old to new (separable fobj)."""
+        self.evaluations += idx.shape[0]
+        start = time.perf_counter_ns() if self.observer is not None else 0
+        fx = self.fx[idx] + (self.term(new, criteria) - self.term(old, criteria))
+        if self.lower is not None:
+            np.maximum(fx, self.lower, out=fx)
+        if self.observer is not None:
+            self.observer.on_evaluate(self, idx.shape[0], time.perf_counter_ns() - start)
+        return fx
+
+    def refresh(self):
+        """Exact objective values of all sources and of the best position, discarding accumulated rounding."""
+        self.fx[:] = self.evaluate(self.pos)
+        self.fit[:] = calculate_fitness(self.fx)
+        self.best_value = float(self.evaluate(self.best_position[None])[0])
+
+    def _greedy_update(self, idx):
+        p2c, moved, fnew = self._neighbours(idx)
+        new_fit = calculate_fitness(fnew)
+
+        better = new_fit > self.fit[idx]
+        won = idx[better]
+        self.pos[won, p2c[better]] = moved[better]
+        self.fx[won] = fnew[better]
+        self.fit[won] = new_fit[better]
+        self.trial[won] = 0
+        self.trial[idx[~better]] += 1
+
+    def employed_phase(self):
+        self._greedy_update(self._all)
+
+    def select_onlookers(self, n):
+        """Roulette-wheel draw of n food sources with probability fit / sum(fit)."""
+        cdf = np.cumsum(self.fit)
+        picks = np.searchsorted(cdf, self.rng.random(n) * cdf[-1], side='right')
+        # Guard against a draw landing exactly on the total after rounding
+        return np.minimum(picks, self.N - 1, out=picks)
+
+    def onlooker_phase(self):
+        """
+        N onlookers each pick a source by roulette wheel and try one neighbour
+        of it. All candidates are generated and evaluated in one batch; a
+        source picked by several onlookers keeps its best candidate if that
+        improves on it, otherwise its trial counter grows by the number of
+        failed attempts.
+        """
+        targets = self.select_onlookers(self.N)
+        p2c, moved, fnew = self._neighbours(targets)
+
+        # Best candidate per distinct target: sort by (target, fnew), take group heads.
+        # Fitness decreases monotonically with f(x), so lowest fnew = highest fitness.
+        order = np.lexsort((fnew, targets))
+        sorted_targets = targets[order]
+        head = np.empty(order.size, dtype=bool)
+        head[0] = True
+        np.not_equal(sorted_targets[1:], sorted_targets[:-1], out=head[1:])
+        best = order[head]
+        src = sorted_targets[head]
+        attempts = np.bincount(targets, minlength=self.N)[src]
+
+        new_fit = calculate_fitness(fnew[best])
+        better = new_fit > self.fit[src]
+        won = src[better]
+        self.pos[won, p2c[best[better]]] = moved[best[better]]
+        self.fx[won] = fnew[best[better]]
+        self.fit[won] = new_fit[better]
+        self.trial[won] = 0
+        self.trial[src[~better]] += attempts[~better].astype(np.int32)
+
+    def scout_phase(self):
+        idx = np.flatnonzero(self.trial > self.limit)
+        if idx.size:
+            self.pos[idx] = self.rng.uniform(self.lb, self.ub, size=(idx.size, self.D))
+            self.fx[idx] = self.evaluate(self.pos[idx])
+            self.fit[idx] = calculate_fitness(self.fx[idx])
+            self.trial[idx] = 0
+            if self.observer is not None:
+                self.observer.on_scout(self, idx)
+
+    def inject(self, idx, X, fx):
+        """Replace the food sources idx with positions X already evaluated to fx."""
+        self.pos[idx] = X
+        self.fx[idx] = fx
+        self.fit[idx] = calculate_fitness(np.asarray(fx, dtype=np.float64))
+        self.trial[idx] = 0
+
+    def update_best(self):
+        ind = int(np.argmin(self.fx))
+        if self.fx[ind] < self.best_value:
+            self.best_value = float(self.fx[ind])
+            self.best_position = self.pos[ind].copy()
+            self.best_index = ind
+
+    def step(self):
+        observer = self.observer
+        if observer is None:
+            self.employed_phase()
+            self.onlooker_phase()
+            self.scout_phase()
+        else:
+            for phase, run in (("employed", self.employed_phase),
+                               ("onlooker", self.onlooker_phase),
+                               ("scout", self.scout_phase)):
+                start = time.perf_counter_ns()
+                run()
+                observer.on_phase(self, phase, time.perf_counter_ns() - start)
+        self.steps += 1
+        if self.term is not None and self.steps % REFRESH_INTERVAL == 0:
+            self.refresh()
+        self.update_best()
+
+
+def iterate_abc(colony: Colony, iterations: int,
+                stop: Optional[StopCriteria] = None, start: int = 0) -> Iterator[IterationStats]:
+    """
+    Run the colony and yield the statistics of every iteration as it completes,
+    until `iterations` is reached or a rule in `stop` fires. stop.reason tells
+    which one ended the run ("iterations" when all of them were done). A colony
+    restored from a checkpoint passes the iterations it already did as `start`.
+    """
+    stop = stop if stop is not None else StopCriteria()
+    stop.start(colony)
+    observer = colony.observer
+    if observer is not None:
+        observer.on_start(colony)
+    try:
+        for it in range(start + 1, iterations + 1):
+            colony.step()
+            stats = IterationStats(
+                iteration=it,
+                best_fitness=colony.best_value,
+                avg_fitness=float(np.mean(colony.fx)),
+                std_fitness=float(np.std(colony.fx)),
+            )
+            if observer is not None:
+                observer.on_iteration(colony, stats)
+            yield stats
+            if stop.check(colony):
+                return
+        stop.reason = "iterations"
+    finally:
+        # Also reached when the consumer stops early and the generator is closed
+        if observer is not None:
+            observer.on_finish(colony, stop.reason)
+
+
+def run_abc(matrix, iterations: int, limit: Optional[int] = None,
+            fobj: Callable = fobj, lb=0.0, ub=1.0, seed: Optional[int] = None,
+            stop: Optional[StopCriteria] = None, size: Optional[int] = None) -> ABCResult:
+    """Run ABC starting from the rows of matrix as the initial food sources."""
+    colony = Colony(matrix, fobj=fobj, lb=lb, ub=ub, limit=limit,
+                    rng=make_rng(seed), size=size)
+    stop = stop if stop is not None else StopCriteria()
+    series = list(iterate_abc(colony, iterations, stop))
+    return ABCResult(
+        best_position=colony.best_position,
+        best_value=colony.best_value,
+        best_index=colony.best_index,
+        iterations=len(series),
+        evaluations=colony.evaluations,
+        series=series,
+        stop_reason=stop.reason,
+    )
@@ -0,0 +1,121 @@
+"""
+Batched multi-run execution across a process pool.
+
+The decision matrix is copied once into a shared memory block; every worker
+attaches to it in its initializer and builds a read-only ndarray view, so
+tasks only carry their BeeParams. Stored datasets are already memory-mapped
+files, so workers map the same file instead and nothing is copied.
+"""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from abc_engine import iterate_abc
+from datasets import mapped_path, open_mapped
+from runner import make_colony, stop_criteria
+from schema import BeeParams
+
+# Per-worker view of the shared matrix, set by _init_worker
+_shm = None
+_matrix = None
+
+
+def _init_worker(shm_name, shape, dtype, path=None):
+    global _shm, _matrix
+    if path is not None:
+        _matrix = open_mapped(path)
+        return
+    _shm = shared_memory.SharedMemory(name=shm_name)
+    _matrix = np.ndarray(shape, dtype=dtype, buffer=_shm.buf)
+    _matrix.flags.writeable = False
+
+
+def _run_one(params, include_series):
+    start_time = time.time()
+    bee_params = BeeParams(**params)
+    colony = make_colony(_matrix, bee_params)
+    stop = stop_criteria(bee_params)
+    series = list(iterate_abc(colony, bee_params.iterations, stop))
+    run = {
+        "params": params,
+        "bestFitness": colony.best_value,
+        "bestSolution": colony.best_position.tolist(),
+        "bestIndex": colony.best_index,
+        "evaluations": colony.evaluations,
+        "iterations": len(series),
+        "stopReason": stop.reason,
+        "durationMs": int((time.time() - start_time) * 1000),
+    }
+    if include_series:
+        run["resultSeries"] = [s.as_dict() for s in series]
+    return run
+
+
+def summarize(values):
+    """Aggregate statistics of the final best fitness of each run."""
+    values = np.asarray(values, dtype=np.float64)
+    if values.size == 0:
+        return {"runs": 0}
+    return {
+        "runs": int(values.size),
+        "mean": float(np.mean(values)),
+        "median": float(np.median(values)),
+        "std": float(np.std(values)),
+        "best": float(np.min(values)),
+        "worst": float(np.max(values)),
+    }
+
+
+def spawn_seeds(param_sets, seed=None):
+    """
+    Give every parameter set without a seed its own one, spawned from a
+    SeedSequence of the batch seed, so concurrent runs draw from independent
+    streams and each can be reproduced alone with the seed it reports.
+    """
+    children = np.random.SeedSequence(seed).spawn(len(param_sets))
+    return [
+        p if p.get("seed") is not None else dict(p, seed=int(child.generate_state(1)[0]))
+        for p, child in zip(param_sets, children)
+    ]
+
+
+def run_batch(matrix, param_sets, include_series=False, max_workers=None, seed=None):
+    """Run ABC once per parameter set on the same matrix; results keep the input order."""
+    path = mapped_path(matrix)
+    data = np.ascontiguousarray(matrix, dtype=np.float64)
+    if data.ndim != 2:
+        raise ValueError("matrix must be 2-D")
+    if not param_sets:
+        return [], summarize([])
+    # Runs report a scalar best and keep nothing between them: no Pareto
+    # fronts, checkpoints or warm starts
+    for p in param_sets:
+        if (p.get("islands") or 0) > 1:
+            raise ValueError("Island runs are not supported in batches")
+        for name in ("multiObjective", "checkpointEvery", "warmStart"):
+            if p.get(name):
+                raise ValueError(f"{name} is not supported in batches")
+
+    param_sets = spawn_seeds(param_sets, seed)
+    workers = min(max_workers or os.cpu_count() or 1, len(param_sets))
+    shm = None
+    try:
+        if path is None:
+            shm = shared_memory.SharedMemory(create=True, size=max(data.nbytes, 1))
+            np.ndarray(data.shape, dtype=data.dtype, buffer=shm.buf)[:] = data
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(shm and shm.name, data.shape, data.dtype.str, path),
+        ) as pool:
+            futures = [pool.submit(_run_one, p, include_series) for p in param_sets]
+            runs = [f.result() for f in futures]
+    finally:
+        if shm is not None:
+            shm.close()
+            shm.unlink()
+
+    return runs, summarize([r["bestFitness"] for r in runs])
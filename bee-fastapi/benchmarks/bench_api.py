@@ -0,0 +1,137 @@
+"""
+HTTP load test for a running Bee Algorithm API.
+
+Fires requests from N concurrent clients at /run and GET /experiments (and
+POST /experiments with --write) and reports throughput and latency
+percentiles per endpoint and concurrency level. "run" sends a new seed with
+every request, so each one computes a run; "run:cached" repeats one seeded
+request, answered from the result cache after the first. Result cache hits
+and misses (X-Cache) are counted separately. Uses only the standard library
+so it can run from any machine that can reach the API.
+
+    uvicorn main:app --port 8001 &
+    python benchmarks/bench_api.py --url http://localhost:8001 --clients 1,4,16
+"""
+import argparse
+import itertools
+import json
+import time
+import urllib.error
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import common  # noqa: F401
+from common import int_list, write_results
+
+
+def request(url, method='GET', body=None, timeout=60):
+    data = None if body is None else json.dumps(body).encode()
+    req = urllib.request.Request(url, data=data, method=method,
+                                 headers={'Content-Type': 'application/json'})
+    start = time.perf_counter()
+    cache = None
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as res:
+            res.read()
+            ok = 200 <= res.status < 300
+            cache = res.headers.get('X-Cache')
+    except (urllib.error.URLError, OSError):
+        ok = False
+    return time.perf_counter() - start, ok, cache
+
+
+def run_body(args, seed=1):
+    matrix = np.random.default_rng(0).random((args.alternatives, args.criteria)).round(6).tolist()
+    return {
+        "params": {"numBees": args.alternatives,
+                   "iterations": args.iterations, "seed": seed},
+        "input": {"mode": "manual", "matrix": matrix},
+    }
+
+
+def experiment_body():
+    exp_id = 'bench-' + uuid.uuid4().hex
+    return {
+        "id": exp_id, "name": exp_id, "createdAt": time.strftime('%Y-%m-%dT%H:%M:%SZ'),
+        "durationMs": 0, "params": {}, "input": {"mode": "manual"}, "kpis": [], "resultSeries": [],
+    }
+
+
+def load(endpoint, make_call, clients, requests_per_client):
+    total = clients * requests_per_client
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        outcomes = list(pool.map(lambda _: make_call(), range(total)))
+    elapsed = time.perf_counter() - start
+
+    latencies = np.array([t for t, ok, _ in outcomes if ok]) * 1000
+    errors = sum(1 for _, ok, _ in outcomes if not ok)
+    res = {
+        "key": f"{endpoint}/clients={clients}",
+        "endpoint": endpoint,
+        "clients": clients,
+        "requests": total,
+        "errors": errors,
+        "seconds": elapsed,
+        "requests_per_s": (total - errors) / elapsed,
+    }
+    if latencies.size:
+        for p in (50, 90, 99):
+            res[f"p{p}_ms"] = float(np.percentile(latencies, p))
+        res["max_ms"] = float(latencies.max())
+    for status in ("HIT", "MISS"):
+        hit = np.array([t for t, ok, cache in outcomes if ok and cache == status]) * 1000
+        name = "hits" if status == "HIT" else "misses"
+        res[f"cache_{name}"] = int(hit.size)
+        if hit.size:
+            res[f"cache_{name}_p50_ms"] = float(np.percentile(hit, 50))
+    return res
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://localhost:8001')
+    parser.add_argument('--clients', type=int_list, default=[1, 4, 16])
+    parser.add_argument('--requests', type=int, default=20, help="requests per client")
+    parser.add_argument('--alternatives', type=int, default=9)
+    parser.add_argument('--criteria', type=int, default=5)
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--write', action='store_true',
+                        help="also POST /experiments (stores bench-* experiments)")
+    parser.add_argument('--output')
+    args = parser.parse_args(argv)
+
+    base = args.url.rstrip('/')
+    # A new seed per request (from 2: seed 1 is the cached body), across all concurrency levels
+    seeds = itertools.count(2)
+    cached_body = run_body(args)
+    calls = {
+        "run": lambda: request(f"{base}/run", 'POST', run_body(args, next(seeds))),
+        "run:cached": lambda: request(f"{base}/run", 'POST', cached_body),
+        "experiments:list": lambda: request(f"{base}/experiments?limit=50"),
+    }
+    if args.write:
+        calls["experiments:create"] = lambda: request(f"{base}/experiments", 'POST', experiment_body())
+
+    if not request(f"{base}/health")[1]:
+        parser.error(f"API not reachable at {base}")
+    # Primes the cache, so every "run:cached" request is a hit
+    request(f"{base}/run", 'POST', cached_body)
+
+    results = []
+    for endpoint, call in calls.items():
+        for clients in args.clients:
+            res = load(endpoint, call, clients, args.requests)
+            results.append(res)
+            print(f"{res['key']:<32} {res['requests_per_s']:8.1f} req/s "
+                  f"p50 {res.get('p50_ms', 0):8.1f} ms  p99 {res.get('p99_ms', 0):8.1f} ms  "
+                  f"errors {res['errors']}  cache hits {res['cache_hits']} misses {res['cache_misses']}")
+
+    print(f"\nwrote {write_results('api', results, args.output)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+"""
+Engine throughput benchmark.
+
+Runs the vectorized engine (abc_engine, with incremental evaluation of
+moves; engine-full evaluates every candidate with fobj instead), the
+compiled per-bee kernels (jit_engine, when Numba is installed) and the
+per-bee loop of _ABC_.py (loop_reference) over a grid of alternatives x criteria x bees on random
+matrices and reports iterations/s and fobj evaluations/s. The loop version
+always uses one bee per alternative, so it only runs the cases where the
+colony size equals the number of alternatives (bees=0).
+
+    python benchmarks/bench_engine.py --alternatives 9,100,1000 --criteria 5,20 --bees 0,10000
+"""
+import argparse
+import statistics
+import time
+
+import numpy as np
+
+import common  # noqa: F401  (puts bee-fastapi on sys.path)
+import jit_engine
+from abc_engine import Colony, iterate_abc, run_abc
+from loop_reference import run_loop_abc
+from common import int_list, write_results
+
+
+def run_engine(matrix, iterations, seed, bees):
+    result = run_abc(matrix, iterations=iterations, seed=seed, size=bees or None)
+    return result.best_value, result.evaluations
+
+
+def run_engine_full(matrix, iterations, seed, bees):
+    colony = Colony(matrix, rng=np.random.default_rng(seed), size=bees or None, incremental=False)
+    for _ in iterate_abc(colony, iterations):
+        pass
+    return colony.best_value, colony.evaluations
+
+
+def run_jit(matrix, iterations, seed, bees):
+    colony = jit_engine.JitColony(matrix, jit_engine.kernel_args("distance", matrix),
+                                  rng=np.random.default_rng(seed), size=bees or None)
+    for _ in iterate_abc(colony, iterations):
+        pass
+    return colony.best_value, colony.evaluations
+
+
+def run_loop(matrix, iterations, seed, bees):
+    Fbest, evaluations = run_loop_abc(matrix, iterations, seed=seed)
+    return float(min(Fbest)), evaluations
+
+
+IMPLEMENTATIONS = {
+    "engine": run_engine,
+    "engine-full": run_engine_full,
+    "numba": run_jit,
+    "loop": run_loop,
+}
+
+
+def bench_case(impl, alternatives, criteria, bees, iterations, repeat, seed):
+    matrix = np.random.default_rng(seed).random((alternatives, criteria))
+    times, best, evaluations = [], None, 0
+    for r in range(repeat):
+        start = time.perf_counter()
+        best, evaluations = IMPLEMENTATIONS[impl](matrix, iterations, seed + r, bees)
+        times.append(time.perf_counter() - start)
+    seconds = statistics.median(times)
+    bees = bees or alternatives
+    return {
+        "key": f"{impl}/alternatives={alternatives}/criteria={criteria}/bees={bees}/iterations={iterations}",
+        "impl": impl,
+        "alternatives": alternatives,
+        "criteria": criteria,
+        "bees": bees,
+        "iterations": iterations,
+        "repeat": repeat,
+        "seconds": seconds,
+        "seconds_min": min(times),
+        "iterations_per_s": iterations / seconds,
+        "evaluations_per_s": evaluations / seconds,
+        "best": best,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--alternatives', type=int_list, default=[9, 100, 1000])
+    parser.add_argument('--criteria', type=int_list, default=[5, 20])
+    parser.add_argument('--bees', type=int_list, default=[0],
+                        help="colony sizes; 0 means one bee per alternative")
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--impl', default='engine,loop',
+                        help=f"comma separated subset of {', '.join(IMPLEMENTATIONS)}")
+    parser.add_argument('--loop-max-alternatives', type=int, default=1000,
+                        help="skip the loop implementation above this many alternatives")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="result file (default benchmarks/results/engine-<time>.json)")
+    args = parser.parse_args(argv)
+
+    results = []
+    for impl in args.impl.split(','):
+        if impl not in IMPLEMENTATIONS:
+            parser.error(f"unknown implementation '{impl}'")
+        if impl == 'numba':
+            if not jit_engine.AVAILABLE:
+                print("numba is not installed, skipping the numba implementation")
+                continue
+            jit_engine.warm_up()
+        for n in args.alternatives:
+            if impl == 'loop' and n > args.loop_max_alternatives:
+                continue
+            for d in args.criteria:
+                for bees in args.bees:
+                    if impl == 'loop' and bees not in (0, n):
+                        continue
+                    res = bench_case(impl, n, d, bees, args.iterations, args.repeat, args.seed)
+                    results.append(res)
+                    print(f"{res['key']:<70} {res['seconds'] * 1000:10.1f} ms "
+                          f"{res['iterations_per_s']:10.1f} it/s {res['evaluations_per_s']:12.0f} evals/s")
+
+    print(f"\nwrote {write_results('engine', results, args.output)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""
+Shared helpers for the benchmark scripts: sys.path setup for the flat
+bee-fastapi modules and the machine-readable result format.
+
+Every script writes one JSON document:
+    {"suite": ..., "meta": {...environment...}, "results": [{...}, ...]}
+Each result has a "key" identifying the case and numeric metrics; compare.py
+matches results by key across two documents.
+"""
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+RESULTS_DIR = Path(__file__).resolve().parent / 'results'
+
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+
+def git_revision():
+    try:
+        out = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR,
+                             capture_output=True, text=True, timeout=5)
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def environment():
+    import numpy as np
+    return {
+        "timestamp": time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        "git": git_revision(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def int_list(text):
+    return [int(x) for x in text.split(',') if x.strip()]
+
+
+def write_results(suite, results, output=None):
+    """Write the result document to output (default results/<suite>-<timestamp>.json)."""
+    doc = {"suite": suite, "meta": environment(), "results": results}
+    if output is None:
+        RESULTS_DIR.mkdir(exist_ok=True)
+        output = RESULTS_DIR / f"{suite}-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(doc, f, indent=2)
+    return output
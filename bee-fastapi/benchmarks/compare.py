@@ -0,0 +1,57 @@
+"""
+Compare two benchmark result files and flag regressions.
+
+    python benchmarks/compare.py baseline.json current.json --metric evaluations_per_s
+
+For every key present in both files the relative change of the metric is
+printed; the exit status is 1 when any case got worse by more than
+--threshold percent (higher is better for */s metrics, lower for the rest).
+"""
+import argparse
+import json
+import sys
+
+
+def load(path):
+    with open(path, encoding='utf-8') as f:
+        doc = json.load(f)
+    return doc, {r["key"]: r for r in doc["results"]}
+
+
+def default_metric(suite):
+    return "requests_per_s" if suite == "api" else "evaluations_per_s"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('baseline')
+    parser.add_argument('current')
+    parser.add_argument('--metric', help="result field to compare (default depends on the suite)")
+    parser.add_argument('--threshold', type=float, default=10.0, help="allowed regression in percent")
+    args = parser.parse_args(argv)
+
+    base_doc, base = load(args.baseline)
+    cur_doc, cur = load(args.current)
+    metric = args.metric or default_metric(cur_doc.get("suite"))
+    higher_is_better = metric.endswith("_per_s")
+
+    print(f"{metric}: {base_doc['meta'].get('git')} -> {cur_doc['meta'].get('git')}")
+    regressions = 0
+    for key in sorted(set(base) & set(cur)):
+        old, new = base[key].get(metric), cur[key].get(metric)
+        if not old or new is None:
+            continue
+        change = (new - old) / old * 100
+        worse = -change if higher_is_better else change
+        flag = "REGRESSION" if worse > args.threshold else ""
+        regressions += bool(flag)
+        print(f"{key:<70} {old:14.1f} {new:14.1f} {change:+8.1f}% {flag}")
+
+    for key in sorted(set(base) ^ set(cur)):
+        print(f"{key:<70} only in {'baseline' if key in base else 'current'}")
+
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,108 @@
+"""
+Per-bee loop implementation of ABC, as written in _ABC_.py.
+
+The script itself cannot be imported (it prompts with input() at module
+level), so this is its algorithm section without the per-iteration
+DataFrame printing, kept only as the baseline for the engine benchmarks.
+"""
+import numpy as np
+
+
+def fobj(X):
+    return np.sum((X - 0.05)**2, axis=1)
+
+
+def calculate_fitness(fx):
+    fit = np.zeros_like(fx)
+    fit[fx >= 0] = 1 / (1 + fx[fx >= 0])
+    fit[fx < 0] = 1 + np.abs(fx[fx < 0])
+    return fit
+
+
+def run_loop_abc(matrix, max_iter, limit=None, seed=None):
+    """Returns (Fbest history, evaluations)."""
+    if seed is not None:
+        np.random.seed(seed)
+    pos = np.array(matrix, dtype=np.float64)
+    N, D = pos.shape
+    lb = np.array([0.0] * D)
+    ub = np.array([1.0] * D)
+    limit = N * D if limit is None else limit
+    trial = np.zeros(N)
+
+    fx = fobj(pos)
+    fit = calculate_fitness(fx)
+    evaluations = N
+    Fbest = []
+
+    for iter in range(max_iter):
+        # EMPLOYED BEE PHASE
+        for i in range(N):
+            p2c = np.random.randint(D)
+            partner = np.random.randint(N)
+            while partner == i:
+                partner = np.random.randint(N)
+
+            X = pos[i, p2c]
+            Xp = pos[partner, p2c]
+            phi = (np.random.rand() - 0.5) * 2 * (X - Xp)
+            Xnew_val = X + phi
+            Xnew_val = np.clip(Xnew_val, lb[p2c], ub[p2c])
+
+            Xnew = np.copy(pos[i])
+            Xnew[p2c] = Xnew_val
+
+            fnew = fobj(Xnew.reshape(1, -1))[0]
+            new_fit = calculate_fitness(np.array([fnew]))[0]
+            evaluations += 1
+
+            if new_fit > fit[i]:
+                pos[i] = Xnew
+                fx[i] = fnew
+                fit[i] = new_fit
+                trial[i] = 0
+            else:
+                trial[i] += 1
+
+        # ONLOOKER BEE PHASE
+        prob = fit / np.sum(fit)
+        for i in range(N):
+            if np.random.rand() < prob[i]:
+                p2c = np.random.randint(D)
+                partner = np.random.randint(N)
+                while partner == i:
+                    partner = np.random.randint(N)
+
+                X = pos[i, p2c]
+                Xp = pos[partner, p2c]
+                phi = (np.random.rand() - 0.5) * 2 * (X - Xp)
+                Xnew_val = X + phi
+                Xnew_val = np.clip(Xnew_val, lb[p2c], ub[p2c])
+
+                Xnew = np.copy(pos[i])
+                Xnew[p2c] = Xnew_val
+
+                fnew = fobj(Xnew.reshape(1, -1))[0]
+                new_fit = calculate_fitness(np.array([fnew]))[0]
+                evaluations += 1
+
+                if new_fit > fit[i]:
+                    pos[i] = Xnew
+                    fx[i] = fnew
+                    fit[i] = new_fit
+                    trial[i] = 0
+                else:
+                    trial[i] += 1
+
+        # SCOUT BEE PHASE
+        for i in range(N):
+            if trial[i] > limit:
+                pos[i] = np.random.uniform(lb, ub, D)
+                fx[i] = fobj(pos[i].reshape(1, -1))[0]
+                fit[i] = calculate_fitness(np.array([fx[i]]))[0]
+                evaluations += 1
+                trial[i] = 0
+
+        Fbest.append(np.min(fx))
+
+    return Fbest, evaluations
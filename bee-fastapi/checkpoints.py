@@ -0,0 +1,297 @@
+"""
+Checkpoints of running colonies, for resuming long runs.
+
+A run with params.checkpointEvery = k is saved every k iterations (and when
+it ends) to BEE_CHECKPOINT_DIR/<id>.ckpt: a header, a JSON block with the
+request, RNG state and counters, then the raw arrays (input matrix, food
+sources, objective values, fitness, trial counters, best position and the
+best/avg/std series so far). Files are written next to their destination
+and renamed over it, so a worker killed mid-write leaves the previous
+checkpoint intact.
+
+Resuming rebuilds the colony from the stored matrix and params, restores
+the arrays and the RNG state and carries on from the next iteration, so the
+run follows the same trajectory it would have taken uninterrupted (stopping
+rules start counting again). A new run can instead be warm-started from the
+best food sources of a checkpoint (warm_start_sources, seed_colony).
+
+    python checkpoints.py list
+    python checkpoints.py resume <id> [--iterations N] [--output result.json]
+"""
+import json
+import os
+import struct
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+import numpy as np
+
+from abc_engine import IterationStats
+from observers import Observer
+
+CHECKPOINT_DIR = Path(os.environ.get("BEE_CHECKPOINT_DIR", Path(__file__).parent / 'checkpoints'))
+
+CHECKPOINT_MAGIC = b"ABCCKPT\0"
+CHECKPOINT_VERSION = 2
+# magic, version, alternatives, N, D, position width, series length, JSON length
+CHECKPOINT_HEADER = struct.Struct('<8sHIIIIIQ')
+# Version 1 had no position width: positions were always criteria vectors
+CHECKPOINT_HEADER_V1 = struct.Struct('<8sHIIIIQ')
+
+
+class CheckpointNotFound(ValueError):
+    pass
+
+
+def new_checkpoint_id() -> str:
+    return uuid.uuid4().hex
+
+
+def checkpoint_path(checkpoint_id, directory=None) -> Path:
+    if not checkpoint_id or not all(c.isalnum() or c in "-_" for c in checkpoint_id):
+        # Nothing outside [A-Za-z0-9_-] can name a checkpoint file
+        raise CheckpointNotFound(checkpoint_id)
+    return Path(directory or CHECKPOINT_DIR) / f"{checkpoint_id}.ckpt"
+
+
+def _jsonable(value):
+    # RNG states hold NumPy arrays (Philox); bit generators accept lists back
+    if isinstance(value, dict):
+        return {k: _jsonable(v) for k, v in value.items()}
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    return value
+
+
+class Checkpoint:
+    """Colony state of one run as loaded from (or about to be written to) a checkpoint file."""
+
+    def __init__(self, meta, matrix, pos, fx, fit, trial, best_position, series):
+        self.meta = meta
+        self.matrix = matrix
+        self.pos = pos
+        self.fx = fx
+        self.fit = fit
+        self.trial = trial
+        self.best_position = best_position
+        self.series = series
+
+    @property
+    def id(self):
+        return self.meta["id"]
+
+    @classmethod
+    def capture(cls, checkpoint_id, request, matrix, colony, series, stop_reason=None):
+        meta = {
+            "id": checkpoint_id,
+            "request": request,
+            "iteration": len(series),
+            "evaluations": colony.evaluations,
+            "bestValue": colony.best_value,
+            "bestIndex": colony.best_index,
+            "rng": _jsonable(colony.rng.bit_generator.state),
+            "stopReason": stop_reason,
+            "updatedAt": time.time(),
+        }
+        rows = np.array([(s.best_fitness, s.avg_fitness, s.std_fitness) for s in series],
+                        dtype='<f8').reshape(len(series), 3)
+        return cls(meta, matrix, colony.pos, colony.fx, colony.fit, colony.trial,
+                   colony.best_position, rows)
+
+    def write(self, directory=None):
+        path = checkpoint_path(self.id, directory)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        meta = json.dumps(self.meta).encode()
+        A, D = self.matrix.shape
+        N, W = self.pos.shape
+        header = CHECKPOINT_HEADER.pack(CHECKPOINT_MAGIC, CHECKPOINT_VERSION, A, N, D, W,
+                                        len(self.series), len(meta))
+        fd, tmp = tempfile.mkstemp(dir=str(path.parent), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(header)
+                f.write(meta)
+                for arr, dtype in ((self.matrix, '<f8'), (self.pos, '<f8'), (self.fx, '<f8'),
+                                   (self.fit, '<f8'), (self.trial, '<i4'),
+                                   (self.best_position, '<f8'), (self.series, '<f8')):
+                    f.write(np.ascontiguousarray(arr, dtype=dtype).tobytes())
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        return path
+
+    @classmethod
+    def read(cls, checkpoint_id, directory=None, arrays=True):
+        path = checkpoint_path(checkpoint_id, directory)
+        try:
+            with open(path, 'rb') as f:
+                head = f.read(CHECKPOINT_HEADER_V1.size)
+                if len(head) < CHECKPOINT_HEADER_V1.size:
+                    raise ValueError(f"Checkpoint '{checkpoint_id}' is truncated")
+                magic, version = head[:8], struct.unpack_from('<H', head, 8)[0]
+                if magic != CHECKPOINT_MAGIC or version not in (1, CHECKPOINT_VERSION):
+                    raise ValueError(f"'{checkpoint_id}' is not a version {CHECKPOINT_VERSION} checkpoint")
+                if version == 1:
+                    _, _, A, N, D, S, meta_len = CHECKPOINT_HEADER_V1.unpack(head)
+                    W = D
+                else:
+                    head += f.read(CHECKPOINT_HEADER.size - len(head))
+                    if len(head) < CHECKPOINT_HEADER.size:
+                        raise ValueError(f"Checkpoint '{checkpoint_id}' is truncated")
+                    _, _, A, N, D, W, S, meta_len = CHECKPOINT_HEADER.unpack(head)
+                meta = json.loads(f.read(meta_len))
+                if not arrays:
+                    return cls(meta, None, None, None, None, None, None, None)
+                data = f.read()
+        except FileNotFoundError:
+            raise CheckpointNotFound(checkpoint_id)
+        layout = [('matrix', '<f8', (A, D)), ('pos', '<f8', (N, W)), ('fx', '<f8', (N,)),
+                  ('fit', '<f8', (N,)), ('trial', '<i4', (N,)), ('best_position', '<f8', (W,)),
+                  ('series', '<f8', (S, 3))]
+        values, offset = {}, 0
+        for name, dtype, shape in layout:
+            count = int(np.prod(shape))
+            values[name] = np.frombuffer(data, dtype=dtype, count=count, offset=offset).reshape(shape).copy()
+            offset += count * np.dtype(dtype).itemsize
+        return cls(meta, **values)
+
+    def iteration_stats(self):
+        return [IterationStats(iteration=i + 1, best_fitness=float(b), avg_fitness=float(a), std_fitness=float(s))
+                for i, (b, a, s) in enumerate(self.series)]
+
+    def restore(self, colony):
+        """Put the saved state into a colony built from the same matrix and params."""
+        if colony.pos.shape != self.pos.shape:
+            raise ValueError(f"Checkpoint holds {self.pos.shape[0]} x {self.pos.shape[1]} food sources, "
+                             f"the colony {colony.N} x {colony.D}")
+        colony.pos[...] = self.pos
+        colony.fx[...] = self.fx
+        colony.fit[...] = self.fit
+        colony.trial[...] = self.trial
+        colony.evaluations = self.meta["evaluations"]
+        # Keeps exact re-evaluations (abc_engine.REFRESH_INTERVAL) on the same iterations
+        colony.steps = self.meta["iteration"]
+        colony.best_value = self.meta["bestValue"]
+        colony.best_index = self.meta["bestIndex"]
+        colony.best_position = self.best_position.copy()
+        colony.rng.bit_generator.state = self.meta["rng"]
+
+    def summary(self):
+        request = self.meta["request"]
+        return {
+            "id": self.id,
+            "dataset": request["input"].get("datasetName"),
+            "iteration": self.meta["iteration"],
+            "iterations": request["params"]["iterations"],
+            "bestValue": self.meta["bestValue"],
+            "stopReason": self.meta["stopReason"],
+            "updatedAt": self.meta["updatedAt"],
+        }
+
+
+class Checkpointer(Observer):
+    """Saves the colony every `every` iterations and once more when the run ends."""
+
+    def __init__(self, checkpoint_id, request, matrix, every, series=None, directory=None):
+        self.checkpoint_id = checkpoint_id
+        self.request = request
+        self.matrix = matrix
+        self.every = max(1, every)
+        self.series = list(series or [])
+        self.directory = directory
+
+    def save(self, colony, stop_reason=None):
+        Checkpoint.capture(self.checkpoint_id, self.request, self.matrix, colony,
+                           self.series, stop_reason).write(self.directory)
+
+    def on_iteration(self, colony, stats):
+        self.series.append(stats)
+        if stats.iteration % self.every == 0:
+            self.save(colony)
+
+    def on_finish(self, colony, reason):
+        self.save(colony, reason)
+
+
+def list_checkpoints(directory=None):
+    directory = Path(directory or CHECKPOINT_DIR)
+    summaries = []
+    for path in sorted(directory.glob('*.ckpt')):
+        try:
+            summaries.append(Checkpoint.read(path.stem, directory, arrays=False).summary())
+        except ValueError:
+            continue
+    return sorted(summaries, key=lambda s: s["updatedAt"], reverse=True)
+
+
+def delete_checkpoint(checkpoint_id, directory=None) -> bool:
+    try:
+        os.remove(checkpoint_path(checkpoint_id, directory))
+        return True
+    except (CheckpointNotFound, FileNotFoundError):
+        return False
+
+
+def warm_start_sources(checkpoint_id, count, directory=None) -> np.ndarray:
+    """The `count` best food sources of a checkpoint, best first."""
+    ckpt = Checkpoint.read(checkpoint_id, directory)
+    return ckpt.pos[np.argsort(ckpt.fx, kind='stable')[:count]]
+
+
+def seed_colony(colony, sources):
+    """Warm start: replace the worst food sources of a new colony with `sources` (k x D, best first)."""
+    X = np.atleast_2d(np.asarray(sources, dtype=np.float64))
+    if X.shape[1] != colony.D:
+        raise ValueError(f"Warm-start sources have {X.shape[1]} criteria, the matrix {colony.D}")
+    X = np.clip(X[:colony.N], colony.lb, colony.ub)
+    worst = np.argsort(colony.fx, kind='stable')[::-1][:X.shape[0]]
+    colony.inject(worst, X, colony.evaluate(X))
+    colony.update_best()
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="List or resume run checkpoints")
+    parser.add_argument('--dir', default=None, help=f"checkpoint directory (default {CHECKPOINT_DIR})")
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('list', help="list checkpoints, most recent first")
+    resume = sub.add_parser('resume', help="continue a run from its checkpoint")
+    resume.add_argument('id')
+    resume.add_argument('--iterations', type=int, default=None, help="new total iteration count")
+    resume.add_argument('--output', default=None, help="write the result JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    if args.command == 'list':
+        for s in list_checkpoints(args.dir):
+            print(f"{s['id']}  {s['iteration']}/{s['iterations']}  best {s['bestValue']:.6g}  "
+                  f"{s['stopReason'] or 'interrupted'}  {s['dataset'] or ''}")
+        return 0
+
+    from runner import execute_run
+    from schema import ExperimentRunRequest
+
+    try:
+        ckpt = Checkpoint.read(args.id, args.dir)
+        req = ExperimentRunRequest(**ckpt.meta["request"])
+        if args.iterations is not None:
+            req.params.iterations = args.iterations
+        # The resumed run keeps saving next to the checkpoint it started from
+        result = execute_run(req, resume=ckpt, checkpoint_dir=args.dir)
+    except CheckpointNotFound:
+        parser.error(f"checkpoint '{args.id}' not found")
+    except ValueError as e:
+        parser.error(str(e))
+    body = result.json()
+    if args.output:
+        Path(args.output).write_text(body, encoding='utf-8')
+    else:
+        print(body)
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
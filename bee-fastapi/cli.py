@@ -0,0 +1,266 @@
+"""
+Command-line runner: ABC on decision matrices from files, without prompts.
+
+    python cli.py data/*.xlsx --sheet "Hoja 1" --iterations 50 --seeds 1 2 3 -o results.csv
+    python cli.py inputs/ --bees 18 --objective topsis --workers 4 --format parquet -o results.parquet
+
+Inputs are files, directories (every supported file directly inside) or glob
+patterns, read with the same loaders as POST /datasets. Every input file,
+sheet and seed is one run; runs are spread over --workers processes and
+written in input order as CSV, JSON or Parquet (one row per run), to stdout
+unless -o is given. Runs that fail are reported in their `error` column and
+make the exit status 1.
+
+Only the standard library is imported up front, so --help answers at once;
+NumPy and the engine are imported when runs start, pyarrow only for Parquet,
+and pandas never.
+"""
+import argparse
+import csv
+import glob
+import json
+import os
+import sys
+from functools import lru_cache
+from pathlib import Path
+
+FORMATS = ("csv", "json", "parquet")
+
+COLUMNS = ["file", "sheet", "seed", "alternatives", "criteria", "bees", "iterations", "stopReason",
+           "bestAlternative", "bestIndex", "bestFitness", "bestSolution", "evaluations", "durationMs",
+           "error"]
+
+
+def expand_inputs(patterns, suffixes):
+    """Files named by the arguments: files as given, directories and globs expanded and sorted."""
+    files = []
+    for pattern in patterns:
+        path = Path(pattern)
+        if path.is_dir():
+            matches = sorted(str(p) for p in path.iterdir() if p.is_file() and p.suffix.lower() in suffixes)
+        elif path.is_file():
+            matches = [pattern]
+        else:
+            # Patterns the shell did not expand (quoted, or on Windows)
+            matches = sorted(p for p in glob.glob(pattern, recursive=True) if os.path.isfile(p))
+        if not matches:
+            raise ValueError(f"No input files match '{pattern}'")
+        files.extend(m for m in matches if m not in files)
+    return files
+
+
+def parse_param(text):
+    """KEY=VALUE for any BeeParams field; VALUE is JSON when it parses, else a string."""
+    key, sep, value = text.partition("=")
+    if not sep or not key:
+        raise argparse.ArgumentTypeError(f"expected KEY=VALUE, got '{text}'")
+    try:
+        return key, json.loads(value)
+    except ValueError:
+        return key, value
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="cli.py", description="Run the ABC algorithm on decision matrices from files.")
+    parser.add_argument("inputs", nargs="+", metavar="INPUT",
+                        help="file, directory or glob of .csv/.xlsx/.npy/Arrow files")
+    parser.add_argument("--sheet", action="append", dest="sheets", metavar="NAME",
+                        help="sheet of .xlsx inputs, repeatable (default: the first sheet)")
+    parser.add_argument("--index-column", dest="index_col", action="store_true", default=None,
+                        help="first column holds alternative labels (default: detected)")
+    parser.add_argument("--no-index-column", dest="index_col", action="store_false")
+    parser.add_argument("-i", "--iterations", type=int, default=50)
+    parser.add_argument("-b", "--bees", type=int, default=None,
+                        help="colony size (default: the number of alternatives)")
+    parser.add_argument("-s", "--seeds", type=int, nargs="+", default=None, metavar="SEED",
+                        help="one run per seed and input (default: one run with a random seed)")
+    parser.add_argument("--objective", default=None, help="objective function (default: distance)")
+    parser.add_argument("--weights", type=float, nargs="+", default=None, help="criteria weights")
+    parser.add_argument("--feed-limit", type=int, default=None)
+    parser.add_argument("--param", type=parse_param, action="append", default=[], metavar="KEY=VALUE",
+                        help="any other run parameter, e.g. targetFitness=1e-6 (repeatable)")
+    parser.add_argument("-f", "--format", choices=FORMATS, default=None,
+                        help="output format (default: from the -o extension, else csv)")
+    parser.add_argument("-o", "--output", default=None, help="output file (default: stdout)")
+    parser.add_argument("-w", "--workers", type=int, default=None,
+                        help="worker processes (default: one per core; 1 runs in this process)")
+    parser.add_argument("-q", "--quiet", action="store_true", help="no progress lines on stderr")
+    return parser
+
+
+@lru_cache(maxsize=8)
+def _load(path, sheet, index_col):
+    # Cached per worker: every seed of a file reuses the parsed matrix
+    from datasets import load_matrix
+
+    with open(path, "rb") as f:
+        matrix, _, labels = load_matrix(path, f, sheet=sheet, index_col=index_col)
+    return matrix, labels
+
+
+def run_one(task):
+    """
+    One run of a (file, sheet, seed) task; errors are returned in the row, not
+    raised. durationMs times the run alone, from building the colony on: the
+    engine imports and file parsing come before it (and are shared by the
+    worker's later tasks), so it is empty when the task fails before that.
+    """
+    import time
+
+    start_time = None
+    row = {"file": task["file"], "sheet": task["sheet"], "seed": task["seed"]}
+    try:
+        from abc_engine import iterate_abc
+        from runner import best_source_label, make_colony, stop_criteria
+        from schema import BeeParams
+
+        matrix, labels = _load(task["file"], task["sheet"], task["index_col"])
+        params = dict(task["params"], seed=task["seed"])
+        params.setdefault("numBees", matrix.shape[0])
+        params = BeeParams(**params)
+        if params.islands or params.multiObjective:
+            raise ValueError("Island and multi-objective runs are not supported by the CLI")
+        start_time = time.perf_counter()
+        colony = make_colony(matrix, params)
+        stop = stop_criteria(params)
+        done = sum(1 for _ in iterate_abc(colony, params.iterations, stop))
+        index = int(colony.best_index)
+        row.update(
+            alternatives=colony.alternatives, criteria=colony.criteria, bees=colony.N, iterations=done,
+            stopReason=stop.reason,
+            bestAlternative=labels[index] if labels and index < len(labels) else best_source_label(colony),
+            bestIndex=index, bestFitness=float(colony.best_value),
+            bestSolution=colony.best_position.tolist(), evaluations=int(colony.evaluations),
+        )
+    except Exception as e:
+        row["error"] = f"{type(e).__name__}: {e}"
+    if start_time is not None:
+        row["durationMs"] = int((time.perf_counter() - start_time) * 1000)
+    return {c: row.get(c) for c in COLUMNS}
+
+
+def make_tasks(files, args, params):
+    from batch import spawn_seeds
+
+    seeds = args.seeds
+    if seeds is None:
+        # Random, but spawned like /run/batch and reported, so any run can be replayed
+        seeds = [spawn_seeds([{}])[0]["seed"]]
+    tasks = []
+    for path in files:
+        sheets = args.sheets if args.sheets and Path(path).suffix.lower() in (".xlsx", ".xlsm") else [None]
+        for sheet in sheets:
+            for seed in seeds:
+                tasks.append({"file": path, "sheet": sheet, "seed": seed,
+                              "index_col": args.index_col, "params": params})
+    return tasks
+
+
+def run_tasks(tasks, workers, progress=None):
+    """Rows of all tasks in task order, computed in `workers` processes."""
+    rows = [None] * len(tasks)
+    if workers <= 1:
+        for k, task in enumerate(tasks):
+            rows[k] = run_one(task)
+            if progress:
+                progress(rows[k])
+        return rows
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(run_one, task): k for k, task in enumerate(tasks)}
+        for future in as_completed(futures):
+            rows[futures[future]] = future.result()
+            if progress:
+                progress(rows[futures[future]])
+    return rows
+
+
+def write_csv(rows, out):
+    writer = csv.DictWriter(out, fieldnames=COLUMNS, lineterminator="\n")
+    writer.writeheader()
+    for row in rows:
+        writer.writerow({**row, "bestSolution": None if row["bestSolution"] is None
+                         else json.dumps(row["bestSolution"])})
+
+
+def write_parquet(rows, path):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ValueError("Writing Parquet requires pyarrow (pip install pyarrow)")
+    types = {"file": pa.string(), "sheet": pa.string(), "seed": pa.int64(), "alternatives": pa.int64(),
+             "criteria": pa.int64(), "bees": pa.int64(), "iterations": pa.int64(),
+             "stopReason": pa.string(), "bestAlternative": pa.string(), "bestIndex": pa.int64(),
+             "bestFitness": pa.float64(), "bestSolution": pa.list_(pa.float64()),
+             "evaluations": pa.int64(), "durationMs": pa.int64(), "error": pa.string()}
+    schema = pa.schema([(c, types[c]) for c in COLUMNS])
+    pq.write_table(pa.Table.from_pylist(rows, schema=schema), path)
+
+
+def write_rows(rows, fmt, output):
+    if fmt == "parquet":
+        write_parquet(rows, output)
+        return
+    out = open(output, "w", encoding="utf-8", newline="") if output else sys.stdout
+    try:
+        if fmt == "json":
+            json.dump(rows, out, indent=2)
+            out.write("\n")
+        else:
+            write_csv(rows, out)
+    finally:
+        if output:
+            out.close()
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    fmt = args.format
+    if fmt is None:
+        suffix = Path(args.output).suffix.lower().lstrip(".") if args.output else ""
+        fmt = suffix if suffix in FORMATS else "csv"
+    if args.iterations < 1:
+        parser.error("--iterations must be at least 1")
+    # Checked before the runs rather than when writing their results
+    if fmt == "parquet":
+        from importlib.util import find_spec
+
+        if args.output is None:
+            parser.error("Parquet output needs -o FILE")
+        if find_spec("pyarrow") is None:
+            parser.error("Writing Parquet requires pyarrow (pip install pyarrow)")
+
+    params = {"iterations": args.iterations, "objectiveFunction": args.objective,
+              "weights": args.weights, "feedLimit": args.feed_limit, **dict(args.param)}
+    if args.bees is not None:
+        params["numBees"] = args.bees
+
+    from datasets import LOADERS
+
+    try:
+        files = expand_inputs(args.inputs, tuple(LOADERS))
+        tasks = make_tasks(files, args, params)
+        workers = min(args.workers or os.cpu_count() or 1, len(tasks))
+
+        def progress(row):
+            if not args.quiet:
+                where = row["file"] + (f" [{row['sheet']}]" if row["sheet"] else "")
+                if row["error"]:
+                    print(f"{where} seed {row['seed']}: {row['error']}", file=sys.stderr)
+                else:
+                    print(f"{where} seed {row['seed']}: best {row['bestAlternative']} "
+                          f"{row['bestFitness']:.6g} ({row['durationMs']} ms)", file=sys.stderr)
+
+        rows = run_tasks(tasks, workers, progress)
+        write_rows(rows, fmt, args.output)
+    except ValueError as e:
+        parser.error(str(e))
+    return 1 if any(row["error"] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,393 @@
+"""
+Decision-matrix loaders and the server-side dataset store.
+
+Uploaded CSV and XLSX files are streamed row by row into preallocated
+float64 chunks, so the text of a large file is never held in memory as a
+whole and no per-element validation happens in Pydantic. `.npy` and Arrow
+IPC/Feather files are taken as they are. Like the thesis scripts (read_csv /
+read_excel with index_col=0), a first row of column names and a first column
+of alternative labels are recognised and kept as metadata.
+
+Parsed datasets are saved as `<name>.npy` with a `<name>.json` sidecar in
+the dataset directory, and runs reference them by `input.datasetName`
+instead of resending the matrix. They are opened with mmap_mode='r': no
+deserialization at run start, and every uvicorn worker and pool process
+that maps the same file shares its physical pages. The thesis datasets (the
+9x5 AD-PSO case and datos_predefinidos.xlsx) are added on startup.
+"""
+import csv
+import io
+import json
+import mmap
+import os
+import re
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable, Optional
+
+import numpy as np
+from filelock import FileLock
+
+CHUNK_ROWS = 4096
+
+NAME_PATTERN = re.compile(r'^[A-Za-z0-9][A-Za-z0-9_.-]{0,63}$')
+
+# Initial matrix of ABC_predeterminado.py (AD-PSO data, Dra. Dynhora)
+AD_PSO_ALTERNATIVES = [f"A{i}" for i in range(1, 10)]
+AD_PSO_CRITERIA = ["C1", "C2", "C3", "C4", "C5"]
+AD_PSO_MATRIX = [
+    [0.048, 0.047, 0.070, 0.087, 0.190],
+    [0.053, 0.052, 0.066, 0.081, 0.058],
+    [0.057, 0.057, 0.066, 0.076, 0.022],
+    [0.062, 0.062, 0.063, 0.058, 0.007],
+    [0.066, 0.066, 0.070, 0.085, 0.004],
+    [0.070, 0.071, 0.066, 0.058, 0.003],
+    [0.075, 0.075, 0.066, 0.047, 0.002],
+    [0.079, 0.079, 0.066, 0.035, 0.002],
+    [0.083, 0.083, 0.066, 0.051, 0.000],
+]
+EXCEL_FILE = Path(__file__).resolve().parent.parent / 'datos_predefinidos.xlsx'
+
+
+class DuplicateDataset(Exception):
+    pass
+
+
+def _is_number(value):
+    if value is None or isinstance(value, bool):
+        return False
+    if isinstance(value, (int, float)):
+        return True
+    try:
+        float(value)
+        return True
+    except (TypeError, ValueError):
+        return False
+
+
+def _blank(value):
+    return value is None or (isinstance(value, str) and not value.strip())
+
+
+def matrix_from_rows(rows: Iterable, index_col: Optional[bool] = None, chunk_rows=CHUNK_ROWS):
+    """
+    Parse an iterator of table rows into (matrix, columns, labels).
+
+    A first row with non-numeric cells after its first one is the header. The
+    first column holds labels when index_col is True, or, when it is None,
+    if the header's first cell is empty or the first data row starts with
+    a non-numeric cell. Trailing empty cells and empty rows are ignored.
+    """
+    rows = iter(rows)
+    columns = labels = None
+    first = None
+    for row in rows:
+        row = list(row)
+        while row and _blank(row[-1]):
+            row.pop()
+        if row:
+            first = row
+            break
+    if first is None:
+        raise ValueError("The file contains no data")
+
+    # A label in the first cell is allowed in data rows; anything else
+    # non-numeric makes this the header row
+    if any(not _is_number(v) for v in first[1:] if not _blank(v)) or \
+            (len(first) == 1 and not _is_number(first[0])):
+        header, first = first, None
+    else:
+        header = None
+
+    def data_rows():
+        if first is not None:
+            yield first
+        for row in rows:
+            row = list(row)
+            while row and _blank(row[-1]):
+                row.pop()
+            if row:
+                yield row
+
+    data = data_rows()
+    try:
+        row = next(data)
+    except StopIteration:
+        raise ValueError("The file contains no data rows")
+    if index_col is None:
+        index_col = (header is not None and _blank(header[0])) or not _is_number(row[0])
+    skip = 1 if index_col else 0
+    D = len(row) - skip
+    if D < 1:
+        raise ValueError("The file contains no criteria columns")
+    if header is not None:
+        columns = [str(v) if not _blank(v) else f"C{j + 1}" for j, v in enumerate(header[skip:skip + D])]
+        columns += [f"C{j + 1}" for j in range(len(columns), D)]
+    labels = [] if index_col else None
+
+    chunks = []
+    chunk = np.empty((chunk_rows, D), dtype=np.float64)
+    filled = 0
+    line = 1 if header is None else 2
+    while row is not None:
+        if len(row) - skip != D:
+            raise ValueError(f"Row {line} has {len(row) - skip} values, expected {D}")
+        try:
+            chunk[filled] = [float(v) for v in row[skip:]]
+        except (TypeError, ValueError):
+            raise ValueError(f"Row {line} contains a non-numeric value")
+        if labels is not None:
+            labels.append("" if row[0] is None else str(row[0]))
+        filled += 1
+        if filled == chunk_rows:
+            chunks.append(chunk)
+            chunk = np.empty((chunk_rows, D), dtype=np.float64)
+            filled = 0
+        row = next(data, None)
+        line += 1
+    chunks.append(chunk[:filled])
+    matrix = chunks[0] if len(chunks) == 1 else np.concatenate(chunks)
+    return matrix, columns, labels
+
+
+def load_csv(fileobj, index_col=None, chunk_rows=CHUNK_ROWS):
+    text = io.TextIOWrapper(fileobj, encoding='utf-8-sig', newline='')
+    try:
+        sample = text.read(4096)
+        text.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=',;\t')
+        except csv.Error:
+            dialect = csv.excel
+        return matrix_from_rows(csv.reader(text, dialect), index_col, chunk_rows)
+    finally:
+        text.detach()
+
+
+def load_xlsx(fileobj, sheet=None, index_col=None, chunk_rows=CHUNK_ROWS):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ValueError("Reading .xlsx files requires openpyxl (pip install openpyxl)")
+    # read_only streams the sheet instead of building the whole workbook in memory
+    try:
+        wb = load_workbook(fileobj, read_only=True, data_only=True)
+    except Exception as e:
+        raise ValueError(f"Not a valid .xlsx file: {e}")
+    try:
+        if sheet is None:
+            ws = wb.worksheets[0]
+        elif sheet in wb.sheetnames:
+            ws = wb[sheet]
+        else:
+            raise ValueError(f"Sheet '{sheet}' not found. Available: {', '.join(wb.sheetnames)}")
+        return matrix_from_rows(ws.iter_rows(values_only=True), index_col, chunk_rows)
+    finally:
+        wb.close()
+
+
+def load_npy(fileobj):
+    try:
+        matrix = np.load(fileobj, allow_pickle=False)
+    except (ValueError, OSError) as e:
+        raise ValueError(f"Not a valid .npy file: {e}")
+    return np.asarray(matrix, dtype=np.float64), None, None
+
+
+def load_arrow(fileobj, index_col=None):
+    """Arrow IPC file/stream or Feather v2; a leading string column is taken as labels."""
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise ValueError("Reading Arrow files requires pyarrow (pip install pyarrow)")
+    buf = pa.py_buffer(fileobj.read())
+    try:
+        table = pa.ipc.open_file(buf).read_all()
+    except pa.ArrowInvalid:
+        try:
+            table = pa.ipc.open_stream(buf).read_all()
+        except pa.ArrowInvalid as e:
+            raise ValueError(f"Not a valid Arrow file: {e}")
+    names = table.column_names
+    if index_col is None:
+        index_col = table.num_columns > 0 and not pa.types.is_floating(table.schema.field(0).type) \
+            and not pa.types.is_integer(table.schema.field(0).type)
+    skip = 1 if index_col else 0
+    labels = [str(v) for v in table.column(0).to_pylist()] if index_col else None
+    try:
+        columns = [table.column(j).to_numpy().astype(np.float64) for j in range(skip, table.num_columns)]
+    except (TypeError, ValueError, pa.ArrowInvalid):
+        raise ValueError("Arrow columns must be numeric")
+    if not columns:
+        raise ValueError("The file contains no criteria columns")
+    return np.column_stack(columns), list(names[skip:]), labels
+
+
+def predefined_datasets():
+    """(name, matrix, criteria, alternatives, source) of the datasets that ship with the thesis."""
+    yield ("toy-9x5", np.array(AD_PSO_MATRIX), AD_PSO_CRITERIA, AD_PSO_ALTERNATIVES,
+           "ABC_predeterminado.py (AD-PSO)")
+    if EXCEL_FILE.exists():
+        try:
+            with open(EXCEL_FILE, 'rb') as f:
+                matrix, columns, labels = load_xlsx(f)
+        except ValueError:
+            # openpyxl missing or unreadable file: skip it
+            return
+        yield "datos_predefinidos", matrix, columns, labels, EXCEL_FILE.name
+
+
+def mapped_path(matrix) -> Optional[str]:
+    """
+    The file behind a dataset array returned by DatasetStore.load, so other
+    processes can map the same pages instead of receiving a copy; None for
+    any other array (including slices of a mapped one).
+    """
+    if isinstance(matrix, np.memmap) and isinstance(matrix.base, mmap.mmap) and matrix.filename:
+        return matrix.filename
+    return None
+
+
+def open_mapped(path) -> np.ndarray:
+    return np.load(path, mmap_mode='r', allow_pickle=False)
+
+
+LOADERS = {
+    '.csv': 'csv',
+    '.txt': 'csv',
+    '.xlsx': 'xlsx',
+    '.xlsm': 'xlsx',
+    '.npy': 'npy',
+    '.arrow': 'arrow',
+    '.feather': 'arrow',
+    '.ipc': 'arrow',
+}
+
+
+def load_matrix(filename, fileobj, sheet=None, index_col=None):
+    """(matrix, columns, labels) from an uploaded file, dispatched on its extension."""
+    kind = LOADERS.get(Path(filename or '').suffix.lower())
+    if kind is None:
+        raise ValueError(f"Unsupported file type. Supported: {', '.join(LOADERS)}")
+    if kind == 'csv':
+        matrix, columns, labels = load_csv(fileobj, index_col)
+    elif kind == 'xlsx':
+        matrix, columns, labels = load_xlsx(fileobj, sheet, index_col)
+    elif kind == 'npy':
+        matrix, columns, labels = load_npy(fileobj)
+    else:
+        matrix, columns, labels = load_arrow(fileobj, index_col)
+    if matrix.ndim != 2 or matrix.shape[0] < 1 or matrix.shape[1] < 1:
+        raise ValueError("The dataset must be a non-empty 2-D matrix")
+    if not np.all(np.isfinite(matrix)):
+        raise ValueError("The dataset contains NaN or infinite values")
+    return np.ascontiguousarray(matrix), columns, labels
+
+
+class DatasetStore:
+    """
+    Datasets as `<name>.npy` + `<name>.json` files in one directory. Writes
+    are serialized across processes with a file lock; reads are read-only
+    memory maps, kept open per process. The directory is created by the
+    first write, so importing this module touches nothing on disk.
+    """
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self._lock = FileLock(str(self.directory / '.lock'))
+        self._maps = {}
+
+    def _write_lock(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        return self._lock
+
+    def _paths(self, name):
+        if not NAME_PATTERN.match(name or ''):
+            raise ValueError("Dataset names may only contain letters, digits, '.', '_' and '-' (max 64)")
+        return self.directory / f"{name}.npy", self.directory / f"{name}.json"
+
+    def _write(self, path, write):
+        # Write to a temp file in the same directory and rename, so readers
+        # never see a partial file
+        fd, tmp = tempfile.mkstemp(dir=str(self.directory), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                write(f)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def save(self, name, matrix, columns=None, labels=None, source=None, predefined=False) -> dict:
+        npy_path, meta_path = self._paths(name)
+        matrix = np.ascontiguousarray(matrix, dtype=np.float64)
+        meta = {
+            "name": name,
+            "rows": int(matrix.shape[0]),
+            "columns": int(matrix.shape[1]),
+            "criteria": columns,
+            "alternatives": labels,
+            "source": source,
+            "predefined": predefined,
+            "createdAt": datetime.now().isoformat(),
+        }
+        with self._write_lock():
+            if npy_path.exists():
+                raise DuplicateDataset(name)
+            # Sidecar first: a dataset counts as present once its .npy exists
+            self._write(meta_path, lambda f: f.write(json.dumps(meta, ensure_ascii=False).encode('utf-8')))
+            self._write(npy_path, lambda f: np.save(f, matrix, allow_pickle=False))
+        return meta
+
+    def add_predefined(self):
+        """Store the predefined datasets that are not in the directory yet."""
+        for name, matrix, columns, labels, source in predefined_datasets():
+            try:
+                self.save(name, matrix, columns, labels, source=source, predefined=True)
+            except DuplicateDataset:
+                pass
+
+    def load(self, name) -> np.ndarray:
+        """Read-only memory map of the dataset, reused while the file is unchanged."""
+        npy_path, _ = self._paths(name)
+        try:
+            stamp = npy_path.stat().st_mtime_ns
+        except OSError:
+            self._maps.pop(name, None)
+            raise ValueError(f"Dataset '{name}' not found")
+        cached = self._maps.get(name)
+        if cached is None or cached[0] != stamp:
+            cached = (stamp, open_mapped(npy_path))
+            self._maps[name] = cached
+        return cached[1]
+
+    def info(self, name) -> Optional[dict]:
+        _, meta_path = self._paths(name)
+        if not meta_path.exists():
+            return None
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def list(self):
+        names = [p.stem for p in sorted(self.directory.glob('*.npy'))]
+        return [info for info in (self.info(name) for name in names) if info is not None]
+
+    def delete(self, name) -> bool:
+        npy_path, meta_path = self._paths(name)
+        if not npy_path.exists():
+            return False
+        with self._lock:
+            if not npy_path.exists():
+                return False
+            # Open maps keep their pages until released; new loads fail
+            for path in (npy_path, meta_path):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+        self._maps.pop(name, None)
+        return True
+
+
+registry = DatasetStore(os.environ.get("BEE_DATASET_DIR", Path(__file__).parent / 'datasets'))
@@ -0,0 +1,60 @@
+"""
+Production server: gunicorn managing uvicorn workers.
+
+    gunicorn -c gunicorn.conf.py main:app
+
+The app is imported once in the master (preload) and forked into
+WEB_CONCURRENCY workers, so the NumPy/objective imports and predefined
+datasets are loaded once and shared copy-on-write. Experiments and job
+state are in the SQLite database, mapped datasets and (with
+BEE_RESULT_CACHE_DIR) cached results on disk, so any worker can serve any
+request. On SIGTERM each worker stops accepting connections, finishes its
+in-flight requests and drains its job queue for up to BEE_DRAIN_TIMEOUT
+seconds before exiting. Workers publish their metrics to BEE_METRICS_DIR
+(a temporary directory removed on exit by default), so /metrics on any
+worker reports all of them, labelled by worker.
+"""
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+bind = os.environ.get("BEE_BIND", "0.0.0.0:8001")
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+
+# Behind a proxy or load balancer, keep connections open longer than its idle
+# timeout so it never reuses a connection the worker has just closed.
+keepalive = int(os.environ.get("BEE_KEEPALIVE", 75))
+backlog = int(os.environ.get("BEE_BACKLOG", 2048))
+timeout = int(os.environ.get("BEE_WORKER_TIMEOUT", 120))
+graceful_timeout = float(os.environ.get("BEE_DRAIN_TIMEOUT", 30)) + 10
+
+# Every worker runs its own job pool; split the cores between them.
+os.environ.setdefault("BEE_JOB_CONCURRENCY", str(max(1, multiprocessing.cpu_count() // workers)))
+
+# Set before the app is preloaded, so metrics.METRICS_DIR sees it
+_own_metrics_dir = "BEE_METRICS_DIR" not in os.environ
+if _own_metrics_dir:
+    os.environ["BEE_METRICS_DIR"] = tempfile.mkdtemp(prefix="bee-metrics-")
+
+accesslog = os.environ.get("BEE_ACCESS_LOG", "-")
+
+
+def post_fork(server, worker):
+    import main
+    main.reset_after_fork()
+
+
+def child_exit(server, worker):
+    # A worker killed before its shutdown hook ran leaves its snapshot behind
+    try:
+        os.remove(os.path.join(os.environ["BEE_METRICS_DIR"], f"{worker.pid}.json"))
+    except OSError:
+        pass
+
+
+def on_exit(server):
+    if _own_metrics_dir:
+        shutil.rmtree(os.environ["BEE_METRICS_DIR"], ignore_errors=True)
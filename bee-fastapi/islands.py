@@ -0,0 +1,197 @@
+"""
+Island-model ABC: several colonies in separate processes with periodic
+migration.
+
+Every island starts from the input matrix with its own RNG stream (spawned
+from the run seed) and evolves independently. Every `interval` iterations
+all islands meet at a barrier and exchange their best food sources through
+shared memory in a ring: island i sends its `migrants` best sources to
+island i+1, which replaces its worst ones when the migrants are better.
+Stopping rules are evaluated per island; when one fires the whole
+archipelago stops at the next migration point.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import Barrier, shared_memory
+from threading import BrokenBarrierError
+
+import numpy as np
+
+from abc_engine import IterationStats, make_rng
+from datasets import mapped_path, open_mapped
+from objectives import make_objective
+from runner import make_colony, search_space, stop_criteria
+
+# Per-worker state set by _init_worker
+_shm = {}
+_barrier = None
+
+
+def _attach(name, shape):
+    block = shared_memory.SharedMemory(name=name)
+    _shm[name] = block
+    return np.ndarray(shape, dtype=np.float64, buffer=block.buf)
+
+
+def _init_worker(barrier):
+    global _barrier
+    _barrier = barrier
+
+
+def _island(i, k, params, seed_seq, blocks, interval, migrants, matrix_path=None):
+    (matrix_name, matrix_shape), (pos_name, pos_shape), (fx_name, fx_shape), (flag_name, flag_shape) = blocks
+    # A stored dataset is mapped from its file; anything else sits in shared memory
+    matrix = open_mapped(matrix_path) if matrix_path else _attach(matrix_name, matrix_shape)
+    out_pos = _attach(pos_name, pos_shape)
+    out_fx = _attach(fx_name, fx_shape)
+    flags = _attach(flag_name, flag_shape)
+
+    try:
+        colony = make_colony(matrix, params, rng=make_rng(seed_seq, params.bitGenerator))
+        m = min(migrants, colony.N - 1)
+        stop = stop_criteria(params)
+        stop.start(colony)
+        history = []
+        observer = colony.observer
+        if observer is not None:
+            observer.on_start(colony)
+
+        for it in range(1, params.iterations + 1):
+            colony.step()
+            history.append((colony.best_value, float(np.mean(colony.fx)), float(np.std(colony.fx))))
+            if observer is not None:
+                observer.on_iteration(colony, IterationStats(it, *history[-1]))
+            if stop.reason is None:
+                stop.check(colony)
+
+            if it % interval == 0 or it == params.iterations:
+                # Publish this island's best sources and stop wish
+                best = np.argsort(colony.fx)[:m]
+                out_pos[i, :m] = colony.pos[best]
+                out_fx[i, :m] = colony.fx[best]
+                flags[i] = 1.0 if stop.reason else 0.0
+                _barrier.wait()
+
+                src = (i - 1) % k
+                worst = np.argsort(colony.fx)[::-1][:m]
+                better = out_fx[src, :m] < colony.fx[worst]
+                if np.any(better):
+                    colony.inject(worst[better], out_pos[src, :m][better], out_fx[src, :m][better])
+                    colony.update_best()
+                stop_all = bool(np.any(flags > 0))
+                # Nobody may overwrite its slot before everyone has read its source
+                _barrier.wait()
+                if stop_all:
+                    break
+
+        if observer is not None:
+            observer.on_finish(colony, stop.reason or "iterations")
+        return {
+            "history": np.array(history, dtype=np.float64),
+            "best_value": colony.best_value,
+            "best_position": colony.best_position,
+            "best_index": colony.best_index,
+            "evaluations": colony.evaluations,
+            "N": colony.N,
+            "D": colony.D,
+            "criteria": colony.criteria,
+            "mixes": colony.mixes,
+            "alternatives": colony.alternatives,
+            "limit": colony.limit,
+            "stop_reason": stop.reason,
+            "backend": colony.backend,
+        }
+    except BaseException:
+        # Release the other islands instead of leaving them at the barrier
+        _barrier.abort()
+        raise
+
+
+class ArchipelagoResult:
+    """Merged outcome of all islands, shaped like a Colony for build_response."""
+
+    def __init__(self, islands, series, stop_reason):
+        best = min(islands, key=lambda r: r["best_value"])
+        self.N = best["N"]
+        self.D = best["D"]
+        self.criteria = best["criteria"]
+        self.mixes = best["mixes"]
+        self.alternatives = best["alternatives"]
+        self.limit = best["limit"]
+        self.best_value = best["best_value"]
+        self.best_position = best["best_position"]
+        self.best_index = best["best_index"]
+        self.evaluations = sum(r["evaluations"] for r in islands)
+        self.fobj = None
+        self.backend = best["backend"]
+        self.islands = len(islands)
+        self.series = series
+        self.stop_reason = stop_reason
+
+
+def merge_histories(histories):
+    """Per-iteration best over all islands plus pooled mean/std of their populations."""
+    H = np.stack(histories)  # islands x iterations x (best, avg, std)
+    best = np.minimum.accumulate(H[:, :, 0].min(axis=0))
+    avg = H[:, :, 1].mean(axis=0)
+    std = np.sqrt(np.mean(H[:, :, 2] ** 2 + (H[:, :, 1] - avg) ** 2, axis=0))
+    return [
+        IterationStats(iteration=t + 1, best_fitness=float(best[t]),
+                       avg_fitness=float(avg[t]), std_fitness=float(std[t]))
+        for t in range(H.shape[1])
+    ]
+
+
+def run_islands(matrix, params, islands, interval=10, migrants=1) -> ArchipelagoResult:
+    path = mapped_path(matrix)
+    data = np.ascontiguousarray(matrix, dtype=np.float64)
+    if data.ndim != 2:
+        raise ValueError("matrix must be 2-D")
+    if islands < 2:
+        raise ValueError("island mode needs at least 2 islands")
+    interval = max(1, interval)
+    migrants = max(1, migrants)
+
+    # Each island gets an independent stream from the run seed
+    seeds = np.random.SeedSequence(params.seed).spawn(islands)
+    # Migrants are positions, which for some objectives are not criteria vectors
+    start, _ = search_space(make_objective(params.objectiveFunction, data, params.weights), data, params)
+    shapes = [data.shape, (islands, migrants, start.shape[1]), (islands, migrants), (islands,)]
+    blocks = []
+    try:
+        for j, shape in enumerate(shapes):
+            # The matrix block stays empty when the islands map a dataset file
+            size = 1 if j == 0 and path else max(int(np.prod(shape)) * 8, 1)
+            blocks.append(shared_memory.SharedMemory(create=True, size=size))
+        if path is None:
+            np.ndarray(data.shape, dtype=np.float64, buffer=blocks[0].buf)[:] = data
+        np.ndarray(shapes[2], dtype=np.float64, buffer=blocks[2].buf)[:] = np.inf
+        block_args = [(b.name, s) for b, s in zip(blocks, shapes)]
+
+        barrier = Barrier(islands)
+        with ProcessPoolExecutor(max_workers=islands, initializer=_init_worker,
+                                 initargs=(barrier,)) as pool:
+            futures = [
+                pool.submit(_island, i, islands, params, seeds[i], block_args, interval, migrants, path)
+                for i in range(islands)
+            ]
+            results = []
+            for f in futures:
+                try:
+                    results.append(f.result())
+                except BrokenBarrierError:
+                    continue
+            if len(results) != islands:
+                # Surface the error of the island that broke the barrier
+                for f in futures:
+                    if f.exception() and not isinstance(f.exception(), BrokenBarrierError):
+                        raise f.exception()
+                raise RuntimeError("island run failed")
+    finally:
+        for b in blocks:
+            b.close()
+            b.unlink()
+
+    reasons = [r["stop_reason"] for r in results if r["stop_reason"]]
+    stop_reason = reasons[0] if reasons else "iterations"
+    return ArchipelagoResult(results, merge_histories([r["history"] for r in results]), stop_reason)
+
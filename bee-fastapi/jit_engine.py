@@ -0,0 +1,252 @@
+"""
+Optional Numba backend for the ABC engine.
+
+The NumPy engine evaluates each phase as one batch, which needs a
+vectorized objective and applies the moves of a phase simultaneously. This
+backend instead runs the per-bee loops of the thesis scripts compiled with
+numba.njit: every bee moves and is evaluated in turn, so later bees already
+see the sources improved by earlier ones, and objectives are computed one
+position at a time.
+
+Random numbers are still drawn from the run's own Generator, one array per
+phase, and passed into the kernels, so runs stay reproducible and
+independent. Kernels are compiled with cache=True and warm_up() compiles
+them for every built-in objective at startup, so the first request does
+not pay for compilation. Moves on separable objectives update the
+objective value from the changed coordinate alone, as in the NumPy engine.
+
+Numba is optional: without it AVAILABLE is False and runs asking for the
+"numba" backend use the NumPy engine instead.
+"""
+import time
+
+import numpy as np
+
+from abc_engine import Colony
+from objectives import alternative_scores, make_objective, objective_key, topsis_reference
+
+try:
+    from numba import njit
+    AVAILABLE = True
+except ImportError:
+    AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        # Leaves the kernels as plain Python functions; they are never used
+        # by runs when Numba is missing.
+        if args and callable(args[0]):
+            return args[0]
+        return lambda f: f
+
+BACKENDS = ("numpy", "numba")
+
+# Objective codes understood by the kernels
+DISTANCE, WEIGHTED_SUM, TOPSIS, SPHERE, RASTRIGIN, ROSENBROCK, ACKLEY = range(7)
+KERNEL_OBJECTIVES = {
+    "distance": DISTANCE,
+    "weighted-sum": WEIGHTED_SUM,
+    "topsis": TOPSIS,
+    "sphere": SPHERE,
+    "rastrigin": RASTRIGIN,
+    "rosenbrock": ROSENBROCK,
+    "ackley": ACKLEY,
+}
+
+
+@njit(cache=True)
+def _objective(kind, x, a, b, c):
+    """Objective value of one position; a, b, c hold the per-criterion constants."""
+    D = x.shape[0]
+    s = 0.0
+    if kind == DISTANCE:
+        for j in range(D):
+            s += (x[j] - 0.05) ** 2
+        return s
+    if kind == WEIGHTED_SUM:
+        # x mixes the alternatives, a = their scores (objectives.weighted_sum)
+        total = 0.0
+        for j in range(D):
+            s += x[j] * a[j]
+            total += x[j]
+        if total > 0:
+            return -s / total
+        for j in range(D):
+            s += a[j]
+        return -s / D
+    if kind == TOPSIS:
+        # a = weights / norm, b = ideal, c = anti-ideal
+        d_best = 0.0
+        d_worst = 0.0
+        for j in range(D):
+            y = x[j] * a[j]
+            d_best += (y - b[j]) ** 2
+            d_worst += (y - c[j]) ** 2
+        d_best = np.sqrt(d_best)
+        d_worst = np.sqrt(d_worst)
+        total = d_best + d_worst
+        return 1.0 - (d_worst / total if total > 0 else 0.0)
+    if kind == SPHERE:
+        for j in range(D):
+            s += x[j] * x[j]
+        return s
+    if kind == RASTRIGIN:
+        for j in range(D):
+            s += x[j] * x[j] - 10.0 * np.cos(2 * np.pi * x[j])
+        return 10.0 * D + s
+    if kind == ROSENBROCK:
+        for j in range(D - 1):
+            s += 100.0 * (x[j + 1] - x[j] ** 2) ** 2 + (1.0 - x[j]) ** 2
+        return s
+    # ACKLEY
+    sq = 0.0
+    cs = 0.0
+    for j in range(D):
+        sq += x[j] * x[j]
+        cs += np.cos(2 * np.pi * x[j])
+    return -20.0 * np.exp(-0.2 * np.sqrt(sq / D)) - np.exp(cs / D) + 20.0 + np.e
+
+
+@njit(cache=True)
+def _separable(kind):
+    return kind == DISTANCE or kind == SPHERE or kind == RASTRIGIN
+
+
+@njit(cache=True)
+def _term(kind, v, j, a, b, c):
+    """Contribution of criterion j at value v to a separable objective (constants left out)."""
+    if kind == DISTANCE:
+        return (v - 0.05) ** 2
+    if kind == SPHERE:
+        return v * v
+    # RASTRIGIN
+    return v * v - 10.0 * np.cos(2 * np.pi * v)
+
+
+@njit(cache=True)
+def _nonnegative(kind):
+    # Objectives whose incremental values are clamped at their minimum 0 (fobj.lower)
+    return kind == DISTANCE or kind == SPHERE or kind == RASTRIGIN
+
+
+@njit(cache=True)
+def _fitness(f):
+    if f >= 0:
+        return 1.0 / (1.0 + f)
+    return 1.0 + abs(f)
+
+
+@njit(cache=True)
+def _greedy_moves(targets, p2c, partner, phi, pos, fx, fit, trial, lb, ub, kind, a, b, c):
+    """Apply one neighbour move per entry of targets, in order, keeping improvements."""
+    D = pos.shape[1]
+    x = np.empty(D)
+    incremental = _separable(kind)
+    clamp = _nonnegative(kind)
+    for n in range(targets.shape[0]):
+        i = targets[n]
+        j = p2c[n]
+        v = pos[i, j] + phi[n] * (pos[i, j] - pos[partner[n], j])
+        v = min(max(v, lb[j]), ub[j])
+
+        if incremental:
+            f = fx[i] + (_term(kind, v, j, a, b, c) - _term(kind, pos[i, j], j, a, b, c))
+            if clamp:
+                f = max(f, 0.0)
+        else:
+            for d in range(D):
+                x[d] = pos[i, d]
+            x[j] = v
+            f = _objective(kind, x, a, b, c)
+        ft = _fitness(f)
+        if ft > fit[i]:
+            pos[i, j] = v
+            fx[i] = f
+            fit[i] = ft
+            trial[i] = 0
+        else:
+            trial[i] += 1
+
+
+@njit(cache=True)
+def _scouts(idx, X, pos, fx, fit, trial, kind, a, b, c):
+    """Move the abandoned sources idx to the fresh positions X."""
+    for n in range(idx.shape[0]):
+        i = idx[n]
+        for d in range(pos.shape[1]):
+            pos[i, d] = X[n, d]
+        fx[i] = _objective(kind, pos[i], a, b, c)
+        fit[i] = _fitness(fx[i])
+        trial[i] = 0
+
+
+def kernel_args(name, matrix, weights=None):
+    """(kind, a, b, c) for a built-in objective, or None if it has no kernel."""
+    kind = KERNEL_OBJECTIVES.get(objective_key(name))
+    if kind is None:
+        return None
+    D = matrix.shape[1]
+    a = b = c = np.zeros(D)
+    if kind == WEIGHTED_SUM:
+        # Positions weigh the alternatives
+        a = alternative_scores(matrix, weights)
+        b = c = np.zeros_like(a)
+    elif kind == TOPSIS:
+        a, b, c = topsis_reference(matrix, weights)
+    return kind, np.ascontiguousarray(a), np.ascontiguousarray(b), np.ascontiguousarray(c)
+
+
+class JitColony(Colony):
+    """Colony whose phases run in the compiled per-bee kernels."""
+
+    backend = "numba"
+
+    def __init__(self, matrix, kernel, **kwargs):
+        super().__init__(matrix, **kwargs)
+        self.kernel = kernel
+        self._lb = np.ascontiguousarray(self.lb)
+        self._ub = np.ascontiguousarray(self.ub)
+
+    def _moves(self, targets):
+        n = targets.shape[0]
+        p2c = self.rng.integers(self.D, size=n)
+        partner = self.rng.integers(self.N - 1, size=n)
+        partner += partner >= targets
+        phi = self.rng.uniform(-1.0, 1.0, size=n)
+        # Evaluation and greedy selection are fused in the kernel, so its whole
+        # time is reported as evaluation time
+        start = time.perf_counter_ns() if self.observer is not None else 0
+        _greedy_moves(targets, p2c, partner, phi, self.pos, self.fx, self.fit, self.trial,
+                      self._lb, self._ub, *self.kernel)
+        self.evaluations += n
+        if self.observer is not None:
+            self.observer.on_evaluate(self, n, time.perf_counter_ns() - start)
+
+    def employed_phase(self):
+        self._moves(self._all)
+
+    def onlooker_phase(self):
+        self._moves(self.select_onlookers(self.N))
+
+    def scout_phase(self):
+        idx = np.flatnonzero(self.trial > self.limit)
+        if idx.size:
+            X = self.rng.uniform(self.lb, self.ub, size=(idx.size, self.D))
+            start = time.perf_counter_ns() if self.observer is not None else 0
+            _scouts(idx, X, self.pos, self.fx, self.fit, self.trial, *self.kernel)
+            self.evaluations += idx.size
+            if self.observer is not None:
+                self.observer.on_evaluate(self, idx.size, time.perf_counter_ns() - start)
+                self.observer.on_scout(self, idx)
+
+
+def warm_up():
+    """Compile (or load from the cache) the kernels for every objective; returns seconds taken."""
+    if not AVAILABLE:
+        return 0.0
+    start = time.perf_counter()
+    matrix = np.array([[0.1, 0.2], [0.3, 0.4], [0.5, 0.6]])
+    for name in KERNEL_OBJECTIVES:
+        positions = getattr(make_objective(name, matrix), "start", matrix)
+        colony = JitColony(positions, kernel_args(name, matrix), rng=np.random.default_rng(0), limit=0)
+        colony.step()
+    return time.perf_counter() - start
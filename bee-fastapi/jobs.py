@@ -0,0 +1,274 @@
+"""
+Background job queue for long ABC runs.
+
+Submitting a job returns immediately with its id; runs execute on a bounded
+thread pool. At most `concurrency` jobs run at once and at most `max_queued`
+wait behind them, further submissions are rejected with QueueFull. Running
+jobs publish their resultSeries as they go and can be cancelled between
+iterations.
+
+When a JobStore is attached (main.py does, on the experiments database),
+every job's state is also written there, so with several server workers
+any of them can report on or cancel a job running in another: the owning
+worker publishes the series at most every PUBLISH_INTERVAL seconds and
+polls the store for cancellation requests. drain() stops accepting jobs and
+lets the in-flight ones finish before the process exits.
+"""
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from runner import execute_run
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+FINISHED = (COMPLETED, FAILED, CANCELLED)
+
+# Seconds between writes of a running job's series / checks of its cancel flag
+PUBLISH_INTERVAL = 0.5
+
+
+class QueueFull(Exception):
+    pass
+
+
+class ShuttingDown(Exception):
+    pass
+
+
+class Job:
+    def __init__(self, req, run_kwargs=None):
+        self.id = uuid.uuid4().hex
+        self.req = req
+        # Extra execute_run arguments (resume, warm_start)
+        self.run_kwargs = run_kwargs or {}
+        resume = self.run_kwargs.get("resume")
+        if resume is not None:
+            self.checkpoint_id = resume.id
+        else:
+            self.checkpoint_id = self.id if req.params.checkpointEvery else None
+        self.status = QUEUED
+        self.series = []
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.cancel_event = threading.Event()
+        self.future = None
+        self.published_at = 0.0
+        # Series records already written to the store
+        self.published_len = 0
+        self.checked_at = 0.0
+
+    def summary(self):
+        return {
+            "id": self.id,
+            "status": self.status,
+            "iteration": len(self.series),
+            "iterations": self.req.params.iterations,
+            "createdAt": self.created_at,
+            "startedAt": self.started_at,
+            "finishedAt": self.finished_at,
+            "error": self.error,
+            "checkpointId": self.checkpoint_id,
+        }
+
+
+class RemoteJob:
+    """Read-only view of a job owned by another worker, as last published to the store."""
+
+    def __init__(self, summary, series, result):
+        self.id = summary["id"]
+        self.status = summary["status"]
+        self.error = summary["error"]
+        self.series = series
+        self.result = json.loads(result) if result is not None else None
+        self._summary = summary
+
+    def summary(self):
+        # The series may have been published after the summary was; keep them consistent
+        return {**self._summary, "iteration": len(self.series)}
+
+
+class JobManager:
+    def __init__(self, concurrency=2, max_queued=16, keep_finished=100, store=None):
+        self.concurrency = concurrency
+        self.max_queued = max_queued
+        self.keep_finished = keep_finished
+        self.store = store
+        self.draining = False
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="abc-job")
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _count(self, status):
+        return sum(1 for j in self._jobs.values() if j.status == status)
+
+    def queued(self):
+        with self._lock:
+            return self._count(QUEUED)
+
+    def running(self):
+        with self._lock:
+            return self._count(RUNNING)
+
+    def _evict_finished(self):
+        finished = [j.id for j in self._jobs.values() if j.status in FINISHED]
+        for job_id in finished[:max(0, len(finished) - self.keep_finished)]:
+            del self._jobs[job_id]
+        if self.store is not None:
+            self.store.evict_finished(FINISHED, self.keep_finished)
+
+    def _publish(self, job, final=False):
+        if self.store is None:
+            return
+        result = json.dumps(job.result.dict()) if final and job.result is not None else None
+        count = len(job.series)
+        self.store.save(job.summary(), new_series=job.series[job.published_len:count], result=result)
+        job.published_len = count
+        job.published_at = time.monotonic()
+
+    def submit(self, req, **run_kwargs):
+        with self._lock:
+            if self.draining:
+                raise ShuttingDown("Server is shutting down; submit the job again")
+            if self._count(QUEUED) >= self.max_queued:
+                raise QueueFull(f"Job queue is full ({self.max_queued} waiting)")
+            self._evict_finished()
+            job = Job(req, run_kwargs)
+            self._jobs[job.id] = job
+            self._publish(job)
+            # Set under the lock, so cancel() never sees a listed job without its future
+            job.future = self._executor.submit(self._run, job)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None and self.store is not None:
+            row = self.store.get(job_id)
+            if row is not None:
+                job = RemoteJob(*row)
+        return job
+
+    def list(self):
+        with self._lock:
+            local = {j.id: j.summary() for j in self._jobs.values()}
+        if self.store is None:
+            return list(local.values())
+        summaries = [local.pop(s["id"], s) for s in self.store.list()]
+        return summaries + list(local.values())
+
+    def cancel(self, job_id):
+        job = self.get(job_id)
+        if job is None:
+            return None
+        if isinstance(job, RemoteJob):
+            # The owning worker sees the flag within PUBLISH_INTERVAL
+            self.store.request_cancel(job_id)
+            return job
+        with self._lock:
+            job.cancel_event.set()
+            if job.status == QUEUED and job.future is not None and job.future.cancel():
+                job.status = CANCELLED
+                job.finished_at = time.time()
+                self._publish(job, final=True)
+        return job
+
+    def _cancel_requested(self, job):
+        if job.cancel_event.is_set():
+            return True
+        if self.store is not None and time.monotonic() - job.checked_at >= PUBLISH_INTERVAL:
+            job.checked_at = time.monotonic()
+            if self.store.cancel_requested(job.id):
+                job.cancel_event.set()
+        return job.cancel_event.is_set()
+
+    def _on_iteration(self, job, stats):
+        job.series.append(stats.as_dict())
+        if self.store is not None and time.monotonic() - job.published_at >= PUBLISH_INTERVAL:
+            self._publish(job)
+
+    def _run(self, job):
+        # Cancellations requested through another worker while the job was queued
+        if self.store is not None and self.store.cancel_requested(job.id):
+            job.cancel_event.set()
+        with self._lock:
+            if job.status != QUEUED:
+                return
+            if job.cancel_event.is_set():
+                # cancel() came too late to stop the future; it is this thread that ends the job
+                job.status = CANCELLED
+                job.finished_at = time.time()
+                self._publish(job, final=True)
+                return
+            job.status = RUNNING
+            job.started_at = time.time()
+            self._publish(job)
+        try:
+            result = execute_run(
+                job.req,
+                on_iteration=lambda s: self._on_iteration(job, s),
+                cancelled=lambda: self._cancel_requested(job),
+                checkpoint_id=job.checkpoint_id,
+                **job.run_kwargs,
+            )
+            job.result = result
+            job.status = CANCELLED if result.stopReason == "cancelled" else COMPLETED
+        except Exception as e:
+            job.error = str(e)
+            job.status = FAILED
+        finally:
+            job.finished_at = time.time()
+            self._publish(job, final=True)
+
+    def cancel_all(self):
+        with self._lock:
+            ids = [j.id for j in self._jobs.values() if j.status not in FINISHED]
+        for job_id in ids:
+            self.cancel(job_id)
+
+    def drain(self, timeout=None):
+        """
+        Stop accepting jobs and wait up to `timeout` seconds for the queued and
+        running ones to finish; whatever is left is then cancelled. Returns the
+        number of jobs that had to be cancelled.
+        """
+        with self._lock:
+            self.draining = True
+            pending = [j.future for j in self._jobs.values()
+                       if j.status not in FINISHED and j.future is not None]
+        _, not_done = wait(pending, timeout=timeout)
+        if not_done:
+            self.cancel_all()
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        return len(not_done)
+
+    def shutdown(self, wait=True):
+        self.cancel_all()
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+
+def default_concurrency():
+    """
+    The cores split between the WEB_CONCURRENCY worker processes (uvicorn
+    --workers and gunicorn.conf.py default to it), so that every worker
+    running its own job pool does not oversubscribe the machine.
+    """
+    workers = max(1, int(os.environ.get("WEB_CONCURRENCY", 1)))
+    return max(1, (os.cpu_count() or 2) // workers)
+
+
+manager = JobManager(
+    concurrency=int(os.environ.get("BEE_JOB_CONCURRENCY", default_concurrency())),
+    max_queued=int(os.environ.get("BEE_JOB_QUEUE_SIZE", 16)),
+)
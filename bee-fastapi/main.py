@@ -1,14 +1,27 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, File, Form, HTTPException, Query, Request, Response, UploadFile
+from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from schema import ExperimentRunRequest, ExperimentRunResponse, Experiment
-import random
-import time
+from schema import (
+    ExperimentRunRequest, ExperimentRunResponse, Experiment,
+    BatchRunRequest, BatchRunResponse, StackedRunRequest, StackedRunResponse,
+)
+from batch import run_batch
+from stacked import run_stacked
+from datasets import registry as datasets, load_matrix, DuplicateDataset
+import jit_engine
+from jobs import manager as job_manager, QueueFull, ShuttingDown, FINISHED
+from runner import build_colony, execute_run, is_island_run, matrix_from_input, stream_run
+from storage import ExperimentStore, JobStore, DuplicateExperiment
+from objectives import list_objectives
+from result_cache import ResultCache, cache_key
+from checkpoints import (Checkpoint, CheckpointNotFound, delete_checkpoint, list_checkpoints,
+                         warm_start_sources)
+import metrics
 import numpy as np
+from typing import Optional
+import time
 from pathlib import Path
-import json
-import tempfile
 import os
-from filelock import FileLock
 
 app = FastAPI(title="Bee Algorithm API", version="1.0.0")
 
@@ -17,27 +30,85 @@ app.add_middleware(
     allow_origins=["http://localhost:3000"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Total-Count", "X-Cache"],
 )
 
 DATA_FILE = Path(__file__).parent / 'experiments.json'
-LOCK_FILE = str(DATA_FILE) + '.lock'
+DB_FILE = Path(os.environ.get("BEE_DB_PATH", Path(__file__).parent / 'experiments.db'))
+
+store = ExperimentStore(DB_FILE, legacy_json=DATA_FILE)
+# Job state lives in the same database so every worker can see every job
+job_manager.store = JobStore(DB_FILE)
+
+# Seconds the shutdown waits for queued and running jobs before cancelling them
+DRAIN_TIMEOUT = float(os.environ.get("BEE_DRAIN_TIMEOUT", 30))
+
+# Seeded /run results, persisted to BEE_RESULT_CACHE_DIR when it is set
+# (e.g. bee-fastapi/result_cache next to experiments.json)
+result_cache = ResultCache(
+    max_bytes=int(os.environ.get("BEE_RESULT_CACHE_MB", 64)) * 1024 * 1024,
+    directory=os.environ.get("BEE_RESULT_CACHE_DIR") or None,
+)
+
+
+metrics.REGISTRY.register(metrics.Gauge(
+    "bee_job_queue_depth", "Background jobs waiting to run", function=job_manager.queued))
+metrics.REGISTRY.register(metrics.Gauge(
+    "bee_jobs_running", "Background jobs currently running", function=job_manager.running))
+metrics.REGISTRY.register(metrics.Gauge(
+    "bee_result_cache_entries", "Entries in the /run result cache",
+    function=lambda: result_cache.stats()["entries"]))
+
+
+@app.middleware("http")
+async def record_latency(request: Request, call_next):
+    start = time.perf_counter()
+    response = await call_next(request)
+    # Label by route template so /jobs/{job_id} is one series, not one per id
+    route = request.scope.get("route")
+    metrics.REQUEST_LATENCY.observe(
+        time.perf_counter() - start, method=request.method,
+        path=route.path if route is not None else "unmatched", status=response.status_code)
+    return response
+
 
+# Publishes this worker's registry to BEE_METRICS_DIR for the other workers' scrapes
+metrics_snapshots = metrics.SnapshotWriter()
 
-def read_experiments():
-    if not DATA_FILE.exists():
-        return []
-    with open(DATA_FILE, 'r', encoding='utf-8') as f:
-        return json.load(f)
 
+@app.get("/metrics")
+def get_metrics():
+    """Prometheus metrics of every worker with BEE_METRICS_DIR, else of this worker process."""
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
 
-def write_experiments(data):
-    lock = FileLock(LOCK_FILE)
-    with lock:
-        tmp = tempfile.NamedTemporaryFile('w', delete=False, dir=str(DATA_FILE.parent), encoding='utf-8')
-        json.dump(data, tmp, ensure_ascii=False, indent=2)
-        tmp.flush()
-        tmp.close()
-        os.replace(tmp.name, DATA_FILE)
+
+@app.on_event("startup")
+def add_predefined_datasets():
+    datasets.add_predefined()
+
+
+@app.on_event("startup")
+def warm_up_jit():
+    # Compile the Numba kernels now rather than on the first request
+    jit_engine.warm_up()
+
+
+@app.on_event("startup")
+def start_metrics_snapshots():
+    # After the fork, so the thread and the snapshot file belong to this worker
+    metrics_snapshots.start()
+
+
+@app.on_event("shutdown")
+def shutdown_jobs():
+    job_manager.drain(timeout=DRAIN_TIMEOUT)
+    metrics_snapshots.stop()
+
+
+def reset_after_fork():
+    """Drop SQLite connections inherited from the parent; gunicorn.conf.py calls this in each worker."""
+    store.reset()
+    job_manager.store.reset()
 
 
 @app.get("/health")
@@ -45,94 +116,341 @@ def health():
     return {"status": "ok"}
 
 
+@app.get("/backends")
+def get_backends():
+    """Engine backends a run can select with params.backend."""
+    return [{"name": name, "available": name != "numba" or jit_engine.AVAILABLE}
+            for name in jit_engine.BACKENDS]
+
+
+@app.get("/objectives")
+def get_objectives():
+    """Objective functions selectable with params.objectiveFunction."""
+    return list_objectives()
+
+
+def resolve_warm_start(params):
+    """
+    Positions for params.warmStart: the best numBees food sources of that
+    checkpoint, or else the best solution of that stored experiment.
+    """
+    if not params.warmStart:
+        return None
+    try:
+        return warm_start_sources(params.warmStart, params.numBees)
+    except CheckpointNotFound:
+        pass
+    exp = store.get(params.warmStart)
+    if exp is None or not exp.get("bestSolution"):
+        raise ValueError(f"warmStart '{params.warmStart}' is neither a checkpoint nor an experiment "
+                         "with a best solution")
+    return np.array([exp["bestSolution"]], dtype=np.float64)
+
+
 @app.post("/run", response_model=ExperimentRunResponse)
 def run_experiment(req: ExperimentRunRequest):
     """
     Run a Bee Algorithm experiment with the provided parameters and input data.
-    This is a simplified implementation that simulates the algorithm behavior.
+    Seeded runs are answered from the result cache when the same request was
+    run before (X-Cache: HIT).
+    """
+    try:
+        # Loaded once for both the cache key and the run
+        matrix = matrix_from_input(req.input)
+        key = cache_key(req.params, matrix)
+        if key is not None:
+            cached = result_cache.get(key)
+            if cached is not None:
+                return Response(content=cached, media_type="application/json", headers={"X-Cache": "HIT"})
+        result = execute_run(req, warm_start=resolve_warm_start(req.params), matrix=matrix)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if key is None:
+        return result
+    body = result.json()
+    result_cache.put(key, body)
+    return Response(content=body, media_type="application/json", headers={"X-Cache": "MISS"})
+
+
+@app.get("/cache")
+def get_cache_stats():
+    return result_cache.stats()
+
+
+@app.delete("/cache")
+def clear_cache():
+    result_cache.clear()
+    return result_cache.stats()
+
+
+@app.post("/run/stream")
+def run_experiment_stream(req: ExperimentRunRequest, every: int = 1):
+    """
+    Same run as /run, streamed as Server-Sent Events: one `iteration` event
+    per `every` iterations while the colony evolves, then a `result` event.
+    """
+    if is_island_run(req.params):
+        raise HTTPException(status_code=400, detail="Island runs cannot be streamed; use /run or /jobs")
+    try:
+        colony = build_colony(req, warm_start=resolve_warm_start(req.params))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return StreamingResponse(
+        stream_run(req, colony, every=every),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.post("/run/batch", response_model=BatchRunResponse)
+def run_experiment_batch(req: BatchRunRequest):
+    """
+    Run several parameter sets / seeds on one matrix in a process pool and
+    aggregate the final best fitness of every run.
     """
     start_time = time.time()
 
-    # Set random seed if provided
-    if req.params.seed is not None:
-        random.seed(req.params.seed)
-        np.random.seed(req.params.seed)
-
-    # Extract matrix from input
-    matrix = req.input.matrix
-    if not matrix or len(matrix) == 0:
-        raise HTTPException(status_code=400, detail="No matrix data provided")
-
-    # Convert to numpy array for easier manipulation
-    data = np.array(matrix)
-    n_alternatives, n_criteria = data.shape
-
-    # Simulate Bee Algorithm iterations
-    iterations = req.params.iterations
-    best_fitness = 100.0  # Start with high fitness (minimization problem)
-    result_series = []
-
-    # Simulate convergence behavior
-    for i in range(1, iterations + 1):
-        # Simulate improvement with some randomness
-        improvement = random.uniform(0.1, 0.5) * (100 / iterations)
-        best_fitness = max(0.0, best_fitness - improvement)
-
-        # Add some noise to make it more realistic
-        noise = random.uniform(-0.01, 0.01)
-        best_fitness = max(0.0, best_fitness + noise)
-
-        # Simulate avg and std
-        avg = max(best_fitness + random.random() * 1.0, best_fitness)
-        std = max(0.001, random.random() * 0.2)
-
-        result_series.append({
-            "iteration": i,
-            "bestFitness": round(best_fitness, 6),
-            "avgFitness": round(avg, 6),
-            "stdFitness": round(std, 6)
-        })
-
-    # Calculate final metrics
-    initial_fitness = result_series[0]["bestFitness"] if result_series else 100.0
-    final_fitness = result_series[-1]["bestFitness"] if result_series else 0.0
-    convergence = initial_fitness - final_fitness
-
-    # Generate mock best solution (normalized values)
-    best_solution = [random.uniform(0, 1) for _ in range(n_criteria)]
-
-    # Calculate KPIs
-    kpis = [
-        {"label": "Best fitness", "value": round(final_fitness, 6)},
-        {"label": "Iterations", "value": iterations},
-        {"label": "Convergence", "value": round(convergence, 6)},
-        {"label": "Alternatives", "value": n_alternatives},
-        {"label": "Criteria", "value": n_criteria},
-        {"label": "Bees", "value": req.params.numBees},
-        {"label": "Feed Limit", "value": req.params.feedLimit}
-    ]
+    if not req.runs:
+        raise HTTPException(status_code=400, detail="No runs provided")
+
+    try:
+        runs, stats = run_batch(
+            matrix_from_input(req.input),
+            [p.dict() for p in req.runs],
+            include_series=req.includeSeries,
+            max_workers=req.maxWorkers,
+            seed=req.seed,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
     duration_ms = int((time.time() - start_time) * 1000)
+    return BatchRunResponse(durationMs=duration_ms, runs=runs, stats=stats)
+
+
+@app.post("/run/stacked", response_model=StackedRunResponse)
+def run_experiment_stack(req: StackedRunRequest):
+    """
+    Run ABC with the same params on many independent matrices at once and
+    return the best alternative and fitness of each, in input order.
+    """
+    start_time = time.time()
+    try:
+        matrices = list(req.matrices or [])
+        matrices += [datasets.load(name) for name in req.datasetNames or []]
+        results, evaluations = run_stacked(matrices, req.params, req.includeSolutions)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    duration_ms = int((time.time() - start_time) * 1000)
+    return StackedRunResponse(durationMs=duration_ms, evaluations=evaluations, results=results)
+
+
+def get_job_or_404(job_id: str):
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@app.post("/jobs", status_code=202)
+def submit_job(req: ExperimentRunRequest):
+    """
+    Queue an experiment and return its job id without waiting for the run.
+    """
+    try:
+        matrix_from_input(req.input)
+        job = job_manager.submit(req, warm_start=resolve_warm_start(req.params))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except QueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    except ShuttingDown as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return job.summary()
+
+
+@app.get("/jobs")
+def list_jobs():
+    return job_manager.list()
+
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str, since: int = 0):
+    """
+    Job status plus the resultSeries entries produced so far, starting at
+    index `since` so pollers only fetch what is new.
+    """
+    job = get_job_or_404(job_id)
+    summary = job.summary()
+    summary["resultSeries"] = job.series[max(0, since):summary["iteration"]]
+    return summary
+
+
+@app.get("/jobs/{job_id}/result", response_model=ExperimentRunResponse)
+def get_job_result(job_id: str):
+    job = get_job_or_404(job_id)
+    if job.status not in FINISHED:
+        raise HTTPException(status_code=409, detail=f"Job is {job.status}")
+    if job.result is None:
+        raise HTTPException(status_code=409, detail=job.error or f"Job is {job.status}")
+    return job.result
+
+
+@app.delete("/jobs/{job_id}")
+def cancel_job(job_id: str):
+    job_manager.cancel(job_id)
+    return get_job_or_404(job_id).summary()
+
+
+@app.get("/checkpoints")
+def get_checkpoints():
+    """Saved run checkpoints, most recently updated first."""
+    return list_checkpoints()
+
+
+@app.get("/checkpoints/{checkpoint_id}")
+def get_checkpoint(checkpoint_id: str):
+    try:
+        ckpt = Checkpoint.read(checkpoint_id)
+    except CheckpointNotFound:
+        raise HTTPException(status_code=404, detail="Checkpoint not found")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {**ckpt.summary(), "params": ckpt.meta["request"]["params"],
+            "bestSolution": ckpt.best_position.tolist()}
 
-    return ExperimentRunResponse(
-        durationMs=duration_ms,
-        kpis=kpis,
-        bestSolution=best_solution,
-        resultSeries=result_series
-    )
+
+@app.delete("/checkpoints/{checkpoint_id}", status_code=204)
+def remove_checkpoint(checkpoint_id: str):
+    if not delete_checkpoint(checkpoint_id):
+        raise HTTPException(status_code=404, detail="Checkpoint not found")
+    return Response(status_code=204)
+
+
+@app.post("/checkpoints/{checkpoint_id}/resume", status_code=202)
+def resume_checkpoint(checkpoint_id: str, iterations: Optional[int] = Query(None, ge=1)):
+    """
+    Queue a job continuing the checkpointed run from its last saved iteration,
+    up to `iterations` in total (default: the original count). The job keeps
+    updating the same checkpoint.
+    """
+    try:
+        ckpt = Checkpoint.read(checkpoint_id)
+        req = ExperimentRunRequest(**ckpt.meta["request"])
+        if iterations is not None:
+            req.params.iterations = iterations
+        job = job_manager.submit(req, resume=ckpt)
+    except CheckpointNotFound:
+        raise HTTPException(status_code=404, detail="Checkpoint not found")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except QueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    except ShuttingDown as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return job.summary()
 
 
 @app.get("/experiments")
-def list_experiments():
-    return read_experiments()
+def list_experiments(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1),
+    offset: int = Query(0, ge=0),
+    name: Optional[str] = None,
+    createdAfter: Optional[str] = None,
+    createdBefore: Optional[str] = None,
+    newestFirst: bool = False,
+):
+    """
+    Stored experiments ordered by createdAt. `name` matches a substring,
+    createdAfter/createdBefore bound the ISO timestamp; the total number of
+    matches is returned in the X-Total-Count header.
+    """
+    filters = dict(name=name, created_after=createdAfter, created_before=createdBefore)
+    response.headers["X-Total-Count"] = str(store.count(**filters))
+    return store.list(limit=limit, offset=offset, newest_first=newestFirst, **filters)
+
+
+@app.get("/experiments/summaries")
+def list_experiment_summaries(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1),
+    offset: int = Query(0, ge=0),
+    name: Optional[str] = None,
+    createdAfter: Optional[str] = None,
+    createdBefore: Optional[str] = None,
+    newestFirst: bool = False,
+):
+    """
+    Same listing as /experiments without resultSeries and input.matrix.
+    """
+    filters = dict(name=name, created_after=createdAfter, created_before=createdBefore)
+    response.headers["X-Total-Count"] = str(store.count(**filters))
+    return store.list_summaries(limit=limit, offset=offset, newest_first=newestFirst, **filters)
+
+
+@app.get("/experiments/{exp_id}")
+def get_experiment(exp_id: str):
+    exp = store.get(exp_id)
+    if exp is None:
+        raise HTTPException(status_code=404, detail="Experiment not found")
+    return exp
+
+
+@app.get("/datasets")
+def list_datasets():
+    """Stored datasets (metadata only) that runs can reference by input.datasetName."""
+    return datasets.list()
+
+
+@app.post("/datasets", status_code=201)
+def upload_dataset(file: UploadFile = File(...), name: Optional[str] = Form(None),
+                   sheet: Optional[str] = Form(None), indexColumn: Optional[bool] = Form(None)):
+    """
+    Parse an uploaded .csv, .xlsx, .npy or Arrow/Feather file into a matrix and
+    store it under `name` (default: the file name without extension).
+    """
+    try:
+        matrix, columns, labels = load_matrix(file.filename, file.file, sheet=sheet, index_col=indexColumn)
+        return datasets.save(name or Path(file.filename).stem, matrix, columns, labels, source=file.filename)
+    except DuplicateDataset as e:
+        raise HTTPException(status_code=409, detail=f"Dataset {e} already exists")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.get("/datasets/{name}")
+def get_dataset(name: str, includeMatrix: bool = False):
+    try:
+        info = datasets.info(name)
+        if info is None:
+            raise HTTPException(status_code=404, detail="Dataset not found")
+        if includeMatrix:
+            info["matrix"] = datasets.load(name).tolist()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return info
+
+
+@app.delete("/datasets/{name}", status_code=204)
+def delete_dataset(name: str):
+    try:
+        if not datasets.delete(name):
+            raise HTTPException(status_code=404, detail="Dataset not found")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return Response(status_code=204)
 
 
 @app.post("/experiments", status_code=201)
 def create_experiment(exp: Experiment):
-    data = read_experiments()
-    data.append(exp.dict())
-    write_experiments(data)
-    return exp.dict()
+    data = exp.dict()
+    try:
+        store.append(data)
+    except DuplicateExperiment:
+        raise HTTPException(status_code=409, detail=f"Experiment {exp.id} already exists")
+    return data
 
 
 if __name__ == "__main__":
@@ -0,0 +1,323 @@
+"""
+Prometheus metrics for the API, in the text exposition format.
+
+A small in-process registry of counters, gauges and histograms (no client
+library needed) rendered by GET /metrics. Request latency is recorded by an
+HTTP middleware in main.py; run activity, evaluations and per-phase engine
+time come from RunMetrics, an observer that runner.build_colony attaches to
+the runs the API serves (/run, /run/stream, /jobs) unless BEE_RUN_METRICS=0,
+and make_colony to any run with params.profile. Other colonies (CLI, batch
+and island workers, whose registries nobody scrapes) run with no observer.
+The observer times each phase with perf_counter_ns, which is below the
+run-to-run noise even for 20 bees; BEE_RUN_METRICS=0 removes it anyway.
+Gauges can read their value from a callback (queue depth, cache size) at
+scrape time.
+
+Every worker process has its own registry. With BEE_METRICS_DIR set (by
+default gunicorn.conf.py sets it to a fresh temporary directory shared by
+its workers), each worker writes a snapshot of its registry there every
+BEE_METRICS_INTERVAL seconds, and a scrape of any worker returns the series
+of all of them with a `worker` label (the pid). Snapshots not refreshed
+for STALE_INTERVALS intervals belong to workers that exited and are
+deleted. Without it, /metrics only covers the worker that served it.
+"""
+import json
+import math
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from observers import Observer
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+RUN_METRICS = os.environ.get("BEE_RUN_METRICS", "1") != "0"
+METRICS_DIR = os.environ.get("BEE_METRICS_DIR") or None
+SNAPSHOT_INTERVAL = float(os.environ.get("BEE_METRICS_INTERVAL", 5))
+STALE_INTERVALS = 6
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names, values):
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _number(value):
+    if isinstance(value, int):
+        return str(value)
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+class Metric:
+    type = "untyped"
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}")
+        return tuple(labels[n] for n in self.labelnames)
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, key, value) for key, value in self._values.items()]
+
+    def rows(self):
+        """(sample name, label names, label values, value) of every exported sample."""
+        return [(name, self.labelnames, key, value) for name, key, value in self.samples()]
+
+    def render(self):
+        return _render(self.name, self.help, self.type, self.rows())
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, amount=1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+
+class Gauge(Metric):
+    type = "gauge"
+
+    def __init__(self, name, help, labels=(), function=None):
+        super().__init__(name, help, labels)
+        self.function = function
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount=1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount=1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def samples(self):
+        if self.function is not None:
+            return [(self.name, (), float(self.function()))]
+        return super().samples()
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[0][i] += 1
+                    break
+            entry[1] += value
+            entry[2] += 1
+
+    def rows(self):
+        with self._lock:
+            items = [(key, list(counts), total, count) for key, (counts, total, count) in self._values.items()]
+        rows = []
+        for key, counts, total, count in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                rows.append((f"{self.name}_bucket", self.labelnames + ("le",),
+                             key + (_number(bound),), cumulative))
+            rows.append((f"{self.name}_sum", self.labelnames, key, total))
+            rows.append((f"{self.name}_count", self.labelnames, key, count))
+        return rows
+
+
+def _render(name, help, type, rows):
+    lines = [f"# HELP {name} {help}", f"# TYPE {name} {type}"]
+    for sample, names, values, value in rows:
+        lines.append(f"{sample}{_labels(names, values)} {_number(value)}")
+    return "\n".join(lines)
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        return "\n".join(m.render() for m in self.metrics) + "\n"
+
+    def snapshot(self):
+        """The registry as JSON-ready lists: name, help, type and rows of every metric."""
+        return [[m.name, m.help, m.type, [[s, list(n), list(v), x] for s, n, v, x in m.rows()]]
+                for m in self.metrics]
+
+
+def write_snapshot(directory, registry=None, pid=None):
+    """Atomically replace <directory>/<pid>.json with the registry's snapshot."""
+    directory = Path(directory)
+    data = json.dumps((registry or REGISTRY).snapshot())
+    tmp = tempfile.NamedTemporaryFile('w', delete=False, dir=str(directory), suffix='.tmp',
+                                      encoding='utf-8')
+    tmp.write(data)
+    tmp.close()
+    os.replace(tmp.name, directory / f"{pid or os.getpid()}.json")
+
+
+def render_workers(directory, registry=None, max_age=None):
+    """
+    Exposition text of every worker's snapshot in directory, each sample
+    labelled with its worker. This process's snapshot is refreshed first;
+    ones older than max_age seconds are deleted.
+    """
+    directory = Path(directory)
+    write_snapshot(directory, registry)
+    max_age = SNAPSHOT_INTERVAL * STALE_INTERVALS if max_age is None else max_age
+    now = time.time()
+    metrics = {}
+    for path in sorted(directory.glob('*.json')):
+        try:
+            if now - path.stat().st_mtime > max_age:
+                path.unlink()
+                continue
+            with open(path, encoding='utf-8') as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            continue
+        for name, help, type, rows in snapshot:
+            entry = metrics.setdefault(name, (help, type, []))
+            entry[2].extend((s, ("worker",) + tuple(n), (path.stem,) + tuple(v), x) for s, n, v, x in rows)
+    return "\n".join(_render(name, help, type, rows) for name, (help, type, rows) in metrics.items()) + "\n"
+
+
+def render():
+    """What /metrics serves: all workers with METRICS_DIR, else this process's registry."""
+    if METRICS_DIR is None:
+        return REGISTRY.render()
+    return render_workers(METRICS_DIR)
+
+
+class SnapshotWriter:
+    """Background thread writing this worker's snapshot to METRICS_DIR every SNAPSHOT_INTERVAL."""
+
+    def __init__(self, directory=None, interval=None):
+        self.directory = directory or METRICS_DIR
+        self.interval = interval or SNAPSHOT_INTERVAL
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self.directory is None or self._thread is not None:
+            return
+        Path(self.directory).mkdir(parents=True, exist_ok=True)
+        write_snapshot(self.directory)
+        self._thread = threading.Thread(target=self._run, name="metrics-snapshot", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                write_snapshot(self.directory)
+            except OSError:
+                pass
+
+    def stop(self):
+        """Stop writing and remove this worker's snapshot, so its series leave the scrape."""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        try:
+            os.remove(Path(self.directory) / f"{os.getpid()}.json")
+        except OSError:
+            pass
+
+
+REGISTRY = Registry()
+
+REQUEST_LATENCY = REGISTRY.register(Histogram(
+    "bee_http_request_duration_seconds", "HTTP request latency by route", ("method", "path", "status")))
+ACTIVE_RUNS = REGISTRY.register(Gauge(
+    "bee_active_runs", "ABC runs currently executing in this process"))
+RUNS = REGISTRY.register(Counter(
+    "bee_runs_total", "Finished ABC runs by stop reason", ("reason",)))
+RUN_DURATION = REGISTRY.register(Histogram(
+    "bee_run_duration_seconds", "Wall time of ABC runs"))
+EVALUATIONS = REGISTRY.register(Counter(
+    "bee_evaluations_total", "Objective evaluations performed by finished runs"))
+EVALUATIONS_PER_SECOND = REGISTRY.register(Gauge(
+    "bee_evaluations_per_second", "Objective evaluations per second of the most recently finished run"))
+PHASE_SECONDS = REGISTRY.register(Counter(
+    "bee_phase_seconds_total",
+    "Engine time per phase; 'fitness' is objective evaluation time, also included in the other phases",
+    ("phase",)))
+
+# Unlabelled series are exported from the start rather than after the first run
+ACTIVE_RUNS.set(0)
+EVALUATIONS.inc(0)
+
+
+class RunMetrics(Observer):
+    """Per-run observer feeding the registry; phase times are summed in ns and published at the end."""
+
+    def __init__(self):
+        self._phase_ns = {"employed": 0, "onlooker": 0, "scout": 0, "fitness": 0}
+        self._start = None
+
+    def on_start(self, colony):
+        self._start = time.perf_counter()
+        self._evaluations = colony.evaluations
+        ACTIVE_RUNS.inc()
+
+    def on_phase(self, colony, phase, elapsed_ns):
+        self._phase_ns[phase] += elapsed_ns
+
+    def on_evaluate(self, colony, n, elapsed_ns):
+        self._phase_ns["fitness"] += elapsed_ns
+
+    def on_finish(self, colony, reason):
+        if self._start is None:
+            return
+        seconds = time.perf_counter() - self._start
+        evaluations = colony.evaluations - self._evaluations
+        ACTIVE_RUNS.dec()
+        RUNS.inc(reason=reason or "closed")
+        RUN_DURATION.observe(seconds)
+        EVALUATIONS.inc(evaluations)
+        if seconds > 0:
+            EVALUATIONS_PER_SECOND.set(evaluations / seconds)
+        for phase, ns in self._phase_ns.items():
+            PHASE_SECONDS.inc(ns / 1e9, phase=phase)
+        self._start = None
+
+    def phase_ms(self):
+        return {phase: round(ns / 1e6, 3) for phase, ns in self._phase_ns.items()}
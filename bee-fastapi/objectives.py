@@ -0,0 +1,233 @@
+"""
+Registry of objective functions for the ABC engine.
+
+Every entry is a factory that receives the decision matrix (and optional
+criteria weights) and returns fobj(X) -> f, evaluating a whole population
+X of shape (n, D) at once. Runs select one by name with
+params.objectiveFunction; all objectives are minimized.
+
+Separable objectives (constant + a sum of one term per criterion) also set
+f.term(x, j), the term of criterion j at values x, vectorized over both, so
+the engine can evaluate single-coordinate moves incrementally. Objectives
+with a known minimum set f.lower, which incremental values are clamped to.
+
+Positions are criteria vectors seeded from the matrix rows, unless the
+objective sets f.start (the first positions, one per alternative) and
+f.bounds (lb, ub) for a search space of its own. weighted-sum does: its
+positions mix the alternatives, so the optimum is the best alternative.
+
+CachedObjective wraps any fobj with an LRU memo keyed on the quantized
+position vectors, for expensive objectives where colonies keep proposing
+the same candidates.
+"""
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+import numpy as np
+
+from abc_engine import fobj as distance_to_005
+
+DEFAULT_OBJECTIVE = "distance"
+
+# Quantized coordinates of CachedObjective must stay exact in int64
+QUANTIZED_LIMIT = 2.0 ** 62
+
+OBJECTIVES: Dict[str, dict] = {}
+
+
+def objective(name, description):
+    def register(factory):
+        OBJECTIVES[name] = {"factory": factory, "description": description}
+        return factory
+    return register
+
+
+def criteria_weights(weights, D):
+    if weights is None:
+        return np.full(D, 1.0 / D)
+    w = np.asarray(weights, dtype=np.float64)
+    if w.shape != (D,) or np.any(w < 0) or w.sum() <= 0:
+        raise ValueError(f"weights must be {D} non-negative numbers with a positive sum")
+    return w / w.sum()
+
+
+@objective("distance", "Squared distance of every criterion to 0.05 (thesis scripts)")
+def distance(matrix, weights=None):
+    return distance_to_005
+
+
+def minmax_scaling(matrix):
+    """
+    Per-criterion (lo, span) of the matrix, with zero spans replaced by 1.
+    A stack of matrices (P x n x D) gives one row per matrix.
+    """
+    lo = matrix.min(axis=-2)
+    span = matrix.max(axis=-2) - lo
+    span[span == 0] = 1.0
+    return lo, span
+
+
+def topsis_reference(matrix, weights=None):
+    """
+    Column scaling (weights / norm) and the ideal and anti-ideal points of the
+    scaled matrix, one row per matrix for a stack like minmax_scaling.
+    """
+    norm = np.linalg.norm(matrix, axis=-2)
+    norm[norm == 0] = 1.0
+    w = criteria_weights(weights, matrix.shape[-1]) / norm
+    V = matrix * np.expand_dims(w, -2)
+    return w, V.max(axis=-2), V.min(axis=-2)
+
+
+def mix_weights(L):
+    """Rows of L scaled to sum 1; all-zero rows become uniform."""
+    total = L.sum(axis=-1, keepdims=True)
+    return np.divide(L, total, out=np.full_like(L, 1.0 / L.shape[-1]), where=total > 0)
+
+
+def alternative_scores(matrix, weights=None):
+    """Weighted sum of the min-max normalized criteria of every alternative (per matrix for a stack)."""
+    lo, span = minmax_scaling(matrix)
+    scaled = (matrix - np.expand_dims(lo, -2)) / np.expand_dims(span, -2)
+    return scaled @ criteria_weights(weights, matrix.shape[-1])
+
+
+@objective("weighted-sum", "Negated weighted sum of min-max normalized criteria of a mix of the alternatives")
+def weighted_sum(matrix, weights=None):
+    """
+    A position holds one non-negative weight per alternative and scores as
+    the same mix of their weighted sums. The objective is linear on the
+    simplex, so its minimum is the best alternative alone.
+    """
+    scores = alternative_scores(matrix, weights)
+
+    def f(L):
+        return -(mix_weights(L) @ scores)
+    f.start = np.eye(matrix.shape[0])
+    f.bounds = (0.0, 1.0)
+    return f
+
+
+@objective("topsis", "1 - TOPSIS closeness to the ideal solution of the vector-normalized matrix")
+def topsis(matrix, weights=None):
+    w, ideal, anti = topsis_reference(matrix, weights)
+
+    def f(X):
+        Y = X * w
+        d_best = np.sqrt(np.sum((Y - ideal) ** 2, axis=1))
+        d_worst = np.sqrt(np.sum((Y - anti) ** 2, axis=1))
+        total = d_best + d_worst
+        closeness = np.divide(d_worst, total, out=np.zeros_like(total), where=total > 0)
+        return 1.0 - closeness
+    return f
+
+
+@objective("sphere", "Sphere benchmark: sum(x^2)")
+def sphere(matrix, weights=None):
+    def f(X):
+        return np.sum(X ** 2, axis=1)
+    f.term = lambda x, j: x ** 2
+    f.lower = 0.0
+    return f
+
+
+@objective("rastrigin", "Rastrigin benchmark: 10D + sum(x^2 - 10 cos(2 pi x))")
+def rastrigin(matrix, weights=None):
+    def f(X):
+        return 10.0 * X.shape[1] + np.sum(X ** 2 - 10.0 * np.cos(2 * np.pi * X), axis=1)
+    f.term = lambda x, j: x ** 2 - 10.0 * np.cos(2 * np.pi * x)
+    f.lower = 0.0
+    return f
+
+
+@objective("rosenbrock", "Rosenbrock benchmark: sum(100 (x[i+1] - x[i]^2)^2 + (1 - x[i])^2)")
+def rosenbrock(matrix, weights=None):
+    def f(X):
+        return np.sum(100.0 * (X[:, 1:] - X[:, :-1] ** 2) ** 2 + (1.0 - X[:, :-1]) ** 2, axis=1)
+    return f
+
+
+@objective("ackley", "Ackley benchmark")
+def ackley(matrix, weights=None):
+    def f(X):
+        D = X.shape[1]
+        a = -20.0 * np.exp(-0.2 * np.sqrt(np.sum(X ** 2, axis=1) / D))
+        b = -np.exp(np.sum(np.cos(2 * np.pi * X), axis=1) / D)
+        return a + b + 20.0 + np.e
+    return f
+
+
+def list_objectives():
+    return [{"name": name, "description": o["description"]} for name, o in OBJECTIVES.items()]
+
+
+def objective_key(name: Optional[str]) -> str:
+    return (name or DEFAULT_OBJECTIVE).strip().lower()
+
+
+def make_objective(name: Optional[str], matrix, weights=None) -> Callable:
+    key = objective_key(name)
+    if key not in OBJECTIVES:
+        raise ValueError(f"Unknown objective '{name}'. Available: {', '.join(OBJECTIVES)}")
+    return OBJECTIVES[key]["factory"](np.asarray(matrix, dtype=np.float64), weights)
+
+
+class CachedObjective:
+    """
+    LRU memo in front of fobj. Positions are quantized to `resolution` so
+    candidates that differ only by float noise share an entry; all misses of
+    a population are evaluated in a single fobj call. Quantized rows are
+    hashed whole, as raw bytes, and duplicates within a population are found
+    with one np.unique.
+    """
+
+    def __init__(self, fobj, maxsize=100_000, resolution=1e-9, extent=None):
+        if not resolution > 0:
+            raise ValueError("cacheResolution must be positive")
+        self.fobj = fobj
+        self.maxsize = maxsize
+        self.resolution = resolution
+        self.hits = 0
+        self.misses = 0
+        self._cache = OrderedDict()
+        if extent is not None:
+            # Largest absolute coordinate the run can reach (its search bounds)
+            self._quantize(np.array([[extent]], dtype=np.float64))
+
+    def _quantize(self, X):
+        Q = np.round(X / self.resolution)
+        if not np.all(np.abs(Q) < QUANTIZED_LIMIT):
+            raise ValueError(f"Positions up to {np.abs(X).max():g} cannot be cached at "
+                             f"cacheResolution {self.resolution:g}; use a coarser resolution")
+        return np.ascontiguousarray(Q.astype(np.int64))
+
+    def __call__(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        keys = self._quantize(X)
+        rows = keys.view(np.dtype((np.void, keys.itemsize * keys.shape[1]))).ravel()
+        unique, first, inverse = np.unique(rows, return_index=True, return_inverse=True)
+        values = np.empty(unique.size, dtype=np.float64)
+
+        cache = self._cache
+        unique_keys = unique.tolist()
+        missing = []
+        for u, k in enumerate(unique_keys):
+            value = cache.get(k)
+            if value is None:
+                missing.append(u)
+            else:
+                cache.move_to_end(k)
+                values[u] = value
+
+        self.hits += X.shape[0] - len(missing)
+        self.misses += len(missing)
+        if missing:
+            values[missing] = np.asarray(self.fobj(X[first[missing]]), dtype=np.float64)
+            for u in missing:
+                cache[unique_keys[u]] = values[u]
+            while len(cache) > self.maxsize:
+                cache.popitem(last=False)
+        return values[inverse.reshape(-1)]
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._cache)}
@@ -0,0 +1,238 @@
+"""
+Observers: opt-in hooks into a running colony.
+
+The engine calls an observer, when one is attached as colony.observer, on
+these events: on_start, after every phase (on_phase, with its duration from
+perf_counter_ns), after every objective evaluation (on_evaluate, with the
+number of positions and the duration), when sources are abandoned
+(on_scout), after every iteration (on_iteration) and on_finish. With no
+observer attached, the only cost is one None check per event.
+
+Built-in sinks, selected with params.trace:
+
+    none      no observer (default)
+    summary   one line per run on stderr when it finishes
+    every-k   one line every params.traceEvery iterations on stderr
+    file      binary trace file in BEE_TRACE_DIR, see TraceFile / read_trace;
+              the oldest traces are deleted once the directory exceeds
+              BEE_TRACE_DIR_MB
+"""
+import os
+import struct
+import sys
+import time
+import uuid
+from pathlib import Path
+
+import numpy as np
+
+TRACE_DIR = Path(os.environ.get("BEE_TRACE_DIR", Path(__file__).parent / 'traces'))
+TRACE_DIR_BYTES = int(os.environ.get("BEE_TRACE_DIR_MB", 256)) * 1024 * 1024
+
+TRACE_MAGIC = b"ABCTRACE"
+TRACE_VERSION = 1
+# magic, version, N, D, population flag
+TRACE_HEADER = struct.Struct('<8sHIIB')
+# iteration, evaluations, scouts, best, avg, std
+TRACE_RECORD = struct.Struct('<IqIddd')
+
+
+class Observer:
+    """No-op base class; sinks override the events they need."""
+
+    def on_start(self, colony):
+        pass
+
+    def on_phase(self, colony, phase, elapsed_ns):
+        pass
+
+    def on_evaluate(self, colony, n, elapsed_ns):
+        pass
+
+    def on_scout(self, colony, idx):
+        pass
+
+    def on_iteration(self, colony, stats):
+        pass
+
+    def on_finish(self, colony, reason):
+        pass
+
+
+class Observers(Observer):
+    """Fans every event out to several observers."""
+
+    def __init__(self, observers):
+        self.observers = list(observers)
+
+    def on_start(self, colony):
+        for o in self.observers:
+            o.on_start(colony)
+
+    def on_phase(self, colony, phase, elapsed_ns):
+        for o in self.observers:
+            o.on_phase(colony, phase, elapsed_ns)
+
+    def on_evaluate(self, colony, n, elapsed_ns):
+        for o in self.observers:
+            o.on_evaluate(colony, n, elapsed_ns)
+
+    def on_scout(self, colony, idx):
+        for o in self.observers:
+            o.on_scout(colony, idx)
+
+    def on_iteration(self, colony, stats):
+        for o in self.observers:
+            o.on_iteration(colony, stats)
+
+    def on_finish(self, colony, reason):
+        for o in self.observers:
+            o.on_finish(colony, reason)
+
+
+class SummaryObserver(Observer):
+    """One line per run: stop reason, iterations, best value, evaluations, scouts and time."""
+
+    def __init__(self, out=None):
+        self.out = out
+        self.iterations = 0
+        self.scouts = 0
+
+    def on_start(self, colony):
+        self.iterations = 0
+        self.scouts = 0
+        self._start = time.perf_counter()
+
+    def on_scout(self, colony, idx):
+        self.scouts += len(idx)
+
+    def on_iteration(self, colony, stats):
+        self.iterations = stats.iteration
+
+    def on_finish(self, colony, reason):
+        out = self.out or sys.stderr
+        out.write(f"abc: stopped ({reason or 'closed'}) after {self.iterations} iterations, "
+                  f"best {colony.best_value:.6g}, {colony.evaluations} evaluations, "
+                  f"{self.scouts} scouts, {time.perf_counter() - self._start:.3f}s\n")
+
+
+class EveryKObserver(Observer):
+    """One line every k iterations with the iteration statistics."""
+
+    def __init__(self, k=10, out=None):
+        self.k = max(1, k)
+        self.out = out
+
+    def on_iteration(self, colony, stats):
+        if stats.iteration % self.k == 0:
+            (self.out or sys.stderr).write(
+                f"abc: iteration {stats.iteration} best {stats.best_fitness:.6g} "
+                f"avg {stats.avg_fitness:.6g} std {stats.std_fitness:.6g} "
+                f"evaluations {colony.evaluations}\n")
+
+
+class TraceFile(Observer):
+    """
+    Binary trace of a run: a header, then per iteration a fixed-size record
+    (iteration, evaluations, scouts, best, avg, std) followed, when
+    `population` is set, by the colony's fx (N float64), trial (N int32) and
+    positions (N x D float64). read_trace() loads it back into arrays.
+    With max_dir_bytes, finishing the run trims the file's directory to that
+    size (see trim_traces).
+    """
+
+    def __init__(self, path, population=False, max_dir_bytes=None):
+        self.path = Path(path)
+        self.population = population
+        self.max_dir_bytes = max_dir_bytes
+        self._file = None
+        self._scouts = 0
+
+    def on_start(self, colony):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, 'wb')
+        self._file.write(TRACE_HEADER.pack(TRACE_MAGIC, TRACE_VERSION, colony.N, colony.D, self.population))
+
+    def on_scout(self, colony, idx):
+        self._scouts += len(idx)
+
+    def on_iteration(self, colony, stats):
+        self._file.write(TRACE_RECORD.pack(stats.iteration, colony.evaluations, self._scouts,
+                                           stats.best_fitness, stats.avg_fitness, stats.std_fitness))
+        self._scouts = 0
+        if self.population:
+            self._file.write(colony.fx.astype('<f8', copy=False).tobytes())
+            self._file.write(colony.trial.astype('<i4', copy=False).tobytes())
+            self._file.write(colony.pos.astype('<f8', copy=False).tobytes())
+
+    def on_finish(self, colony, reason):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            if self.max_dir_bytes is not None:
+                trim_traces(self.path.parent, self.max_dir_bytes, keep=self.path)
+
+
+def trim_traces(directory, max_bytes, keep=None):
+    """
+    Delete the least recently modified .trace files in directory until the
+    rest total at most max_bytes. `keep` (the trace just written) is never
+    deleted, even when it alone is larger.
+    """
+    files = []
+    for path in Path(directory).glob('*.trace'):
+        try:
+            st = path.stat()
+        except OSError:
+            continue
+        files.append((st.st_mtime, path.name, st.st_size, path))
+    files.sort()
+    total = sum(size for _, _, size, _ in files)
+    for _, _, size, path in files:
+        if total <= max_bytes:
+            break
+        if keep is not None and path == Path(keep):
+            continue
+        try:
+            path.unlink()
+        except OSError:
+            continue
+        total -= size
+
+
+def read_trace(path) -> dict:
+    """Arrays of a trace file: per-iteration columns, plus fx/trial/pos (iterations x ...) if recorded."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    magic, version, N, D, population = TRACE_HEADER.unpack_from(data)
+    if magic != TRACE_MAGIC or version != TRACE_VERSION:
+        raise ValueError(f"{path} is not a version {TRACE_VERSION} ABC trace")
+    record = np.dtype([('iteration', '<u4'), ('evaluations', '<i8'), ('scouts', '<u4'),
+                       ('best', '<f8'), ('avg', '<f8'), ('std', '<f8')])
+    fields = [('stats', record)]
+    if population:
+        fields += [('fx', '<f8', (N,)), ('trial', '<i4', (N,)), ('pos', '<f8', (N, D))]
+    rows = np.frombuffer(data, dtype=np.dtype(fields), offset=TRACE_HEADER.size)
+    trace = {name: rows['stats'][name] for name in record.names}
+    if population:
+        trace.update(fx=rows['fx'], trial=rows['trial'], pos=rows['pos'])
+    return trace
+
+
+TRACES = ("none", "summary", "every-k", "file")
+
+
+def make_observer(params):
+    """Observer for params.trace, or None when tracing is off."""
+    kind = (params.trace or "none").strip().lower()
+    if kind not in TRACES:
+        raise ValueError(f"Unknown trace '{params.trace}'. Available: {', '.join(TRACES)}")
+    if kind == "summary":
+        return SummaryObserver()
+    if kind == "every-k":
+        return EveryKObserver(params.traceEvery)
+    if kind == "file":
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}.trace"
+        return TraceFile(TRACE_DIR / name, population=params.tracePopulation,
+                         max_dir_bytes=TRACE_DIR_BYTES)
+    return None
@@ -0,0 +1,488 @@
+"""
+Multi-objective ABC.
+
+Instead of one scalar fobj, a problem maps positions to M objective values
+(all minimized) and the run returns an archive of Pareto-optimal positions
+rather than a single best solution. Problems are selected with
+params.multiObjective:
+
+    criteria  every criterion of the matrix is an objective. A position holds
+              one non-negative weight per alternative and stands for the
+              weighted mix of their rows, so the front is the efficient
+              frontier of the alternatives; the pure alternatives on it are
+              the non-dominated ones.
+    zdt1      ZDT1 benchmark (2 objectives, convex front f2 = 1 - sqrt(f1)),
+              starting from the matrix rows.
+
+ParetoColony runs the usual phases with dominance in place of the fitness
+comparison: a candidate replaces its source when it dominates it, and
+onlookers pick sources with probability growing with their non-domination
+rank. After every iteration the colony is merged into a ParetoArchive,
+which keeps the first front and, once it exceeds its size, drops the most
+crowded points (or, with 2 objectives, the smallest hypervolume
+contributors) one at a time.
+
+The scalar fx of the colony, used by stopping rules and the iteration
+series, is the mean of the objectives.
+"""
+from bisect import bisect_right
+from dataclasses import dataclass
+from typing import Callable, Dict
+
+import numpy as np
+
+from abc_engine import Colony
+from objectives import minmax_scaling, mix_weights
+
+PRUNING = ("crowding", "hypervolume")
+
+# Sub-problems up to this many points (or L x H pairs) are compared pairwise in one step
+BRUTE_FORCE_POINTS = 48
+BRUTE_FORCE_PAIRS = 4096
+
+
+def dominates(A, B):
+    """Row-wise: does A[i] Pareto-dominate B[i]?"""
+    return np.all(A <= B, axis=1) & np.any(A < B, axis=1)
+
+
+def _weakly_dominated(P, Q, k) -> np.ndarray:
+    """Mask (len(P) x len(Q)): P[i] <= Q[j] in objectives 0..k."""
+    mask = P[:, 0, None] <= Q[None, :, 0]
+    for m in range(1, k + 1):
+        mask &= P[:, m, None] <= Q[None, :, m]
+    return mask
+
+
+def _stair_insert(keys, ranks, key, rank):
+    """
+    Add a point to a staircase: keys non-decreasing, ranks increasing, so the
+    highest rank among points with key <= x is ranks[bisect_right(keys, x) - 1].
+    """
+    p = bisect_right(keys, key)
+    if p and ranks[p - 1] >= rank:
+        return
+    e = bisect_right(ranks, rank, lo=p)
+    keys[p:e] = [key]
+    ranks[p:e] = [rank]
+
+
+def _split(values):
+    """Mask of the lower part of values at their median; both parts non-empty unless all are equal."""
+    median = np.median(values)
+    low = values < median
+    return low if low.any() else values <= median
+
+
+class _FrontSorter:
+    """
+    Generalized Jensen divide and conquer (Fortin et al. 2013, Buzdalov and
+    Shalyto 2014), O(N log^(M-1) N). U holds distinct rows in lexicographic
+    order, so a row can only be dominated by rows with a smaller index, and
+    any row weakly below another dominates it.
+
+    helper_a(S, k) ranks the rows S, which are equal in objectives above k.
+    helper_b(L, H, k) raises the ranks of H by the (final) ranks of L, where
+    every row of L is <= every row of H in objectives above k. Both split at
+    the median of objective k and drop to k - 1; objectives 0 and 1 are swept
+    with a staircase of ranks.
+    """
+
+    def __init__(self, U):
+        self.U = U
+        self.rank = np.zeros(U.shape[0], dtype=np.intp)
+
+    def helper_a(self, S, k):
+        if S.size < 2:
+            return
+        if S.size <= BRUTE_FORCE_POINTS:
+            return self._brute_a(S, k)
+        if k == 1:
+            return self._sweep_a(S)
+        values = self.U[S, k]
+        if values.min() == values.max():
+            return self.helper_a(S, k - 1)
+        low = _split(values)
+        L, H = S[low], S[~low]
+        self.helper_a(L, k)
+        self.helper_b(L, H, k - 1)
+        self.helper_a(H, k)
+
+    def helper_b(self, L, H, k):
+        if L.size == 0 or H.size == 0:
+            return
+        if L.size * H.size <= BRUTE_FORCE_PAIRS:
+            return self._brute_b(L, H, k)
+        if k == 1:
+            return self._sweep_b(L, H)
+        lv, hv = self.U[L, k], self.U[H, k]
+        if lv.min() > hv.max():
+            return
+        if lv.max() <= hv.min():
+            return self.helper_b(L, H, k - 1)
+        low = _split(np.concatenate((lv, hv)))
+        L1, L2 = L[low[:L.size]], L[~low[:L.size]]
+        H1, H2 = H[low[L.size:]], H[~low[L.size:]]
+        self.helper_b(L1, H1, k)
+        self.helper_b(L1, H2, k - 1)
+        self.helper_b(L2, H2, k)
+
+    def _brute_a(self, S, k):
+        X = self.U[S]
+        below = _weakly_dominated(X, X, k)
+        np.fill_diagonal(below, False)
+        r = self.rank[S]
+        for j in range(1, S.size):
+            d = below[:j, j]
+            if d.any():
+                r[j] = max(r[j], r[:j][d].max() + 1)
+        self.rank[S] = r
+
+    def _brute_b(self, L, H, k):
+        below = _weakly_dominated(self.U[L], self.U[H], k)
+        lifted = np.where(below, self.rank[L][:, None] + 1, 0).max(axis=0)
+        self.rank[H] = np.maximum(self.rank[H], lifted)
+
+    def _sweep_a(self, S):
+        keys, ranks = [], []
+        r = self.rank[S].tolist()
+        for i, key in enumerate(self.U[S, 1].tolist()):
+            p = bisect_right(keys, key)
+            if p:
+                r[i] = max(r[i], ranks[p - 1] + 1)
+            _stair_insert(keys, ranks, key, r[i])
+        self.rank[S] = r
+
+    def _sweep_b(self, L, H):
+        keys, ranks = [], []
+        lk, lr, li = self.U[L, 1].tolist(), self.rank[L].tolist(), L.tolist()
+        r = self.rank[H].tolist()
+        a = 0
+        for i, (h, key) in enumerate(zip(H.tolist(), self.U[H, 1].tolist())):
+            while a < len(li) and li[a] < h:
+                _stair_insert(keys, ranks, lk[a], lr[a])
+                a += 1
+            p = bisect_right(keys, key)
+            if p:
+                r[i] = max(r[i], ranks[p - 1] + 1)
+        self.rank[H] = r
+
+
+def _sort_2d(F) -> np.ndarray:
+    """
+    Fronts of 2 objectives: rows visited in lexicographic order can only be
+    dominated by earlier ones, and the last member of front k dominates a row
+    exactly when its f2 is <= the row's (unless the two are identical). Those
+    tails are non-decreasing in k, so each row's front is one bisect.
+    """
+    order = np.lexsort((F[:, 1], F[:, 0]))
+    f1, f2 = F[order, 0].tolist(), F[order, 1].tolist()
+    ranks = [0] * len(order)
+    tails = []
+    for k, b in enumerate(f2):
+        if k and f1[k] == f1[k - 1] and b == f2[k - 1]:
+            # Identical rows do not dominate each other
+            ranks[k] = ranks[k - 1]
+            continue
+        front = bisect_right(tails, b)
+        if front == len(tails):
+            tails.append(b)
+        else:
+            tails[front] = b
+        ranks[k] = front
+    rank = np.empty(len(order), dtype=np.intp)
+    rank[order] = ranks
+    return rank
+
+
+def nondominated_sort(F) -> np.ndarray:
+    """
+    Front index of every row of F (n x M), 0 for the non-dominated ones.
+
+    With 2 objectives this is one sort and a bisect per row, O(N log N); with
+    more, the divide and conquer of _FrontSorter, O(N log^(M-1) N). Identical
+    rows share their front.
+    """
+    F = np.asarray(F, dtype=np.float64)
+    n, M = F.shape
+    if M == 2:
+        return _sort_2d(F)
+    # Distinct rows in lexicographic order
+    U, inverse = np.unique(F, axis=0, return_inverse=True)
+    if M == 1:
+        return inverse.reshape(n).astype(np.intp)
+    sorter = _FrontSorter(U)
+    sorter.helper_a(np.arange(U.shape[0]), M - 1)
+    return sorter.rank[inverse.reshape(n)]
+
+
+def first_front(F) -> np.ndarray:
+    """Mask of the non-dominated rows of F, without ranking the others."""
+    F = np.asarray(F, dtype=np.float64)
+    n, M = F.shape
+    if M != 2:
+        return nondominated_sort(F) == 0
+    # Lexicographic order: a row is dominated iff an earlier, different row has f2 <= its f2
+    order = np.lexsort((F[:, 1], F[:, 0]))
+    f1, f2 = F[order, 0], F[order, 1]
+    new = np.ones(n, dtype=bool)
+    new[1:] = (f1[1:] != f1[:-1]) | (f2[1:] != f2[:-1])
+    start = np.maximum.accumulate(np.where(new, np.arange(n), 0))
+    before = np.concatenate(([np.inf], np.minimum.accumulate(f2)[:-1]))
+    mask = np.empty(n, dtype=bool)
+    mask[order] = before[start] > f2
+    return mask
+
+
+def crowding_distance(F) -> np.ndarray:
+    """NSGA-II crowding distance of every row of F; the extremes of each objective get inf."""
+    n, M = F.shape
+    distance = np.zeros(n)
+    if n <= 2:
+        distance[:] = np.inf
+        return distance
+    order = np.argsort(F, axis=0, kind='stable')
+    for m in range(M):
+        o = order[:, m]
+        f = F[o, m]
+        distance[o[0]] = distance[o[-1]] = np.inf
+        span = f[-1] - f[0]
+        if span > 0:
+            distance[o[1:-1]] += (f[2:] - f[:-2]) / span
+    return distance
+
+
+def _sorted_front_2d(F, reference):
+    inside = np.flatnonzero(np.all(F < reference, axis=1))
+    return inside[np.lexsort((F[inside, 1], F[inside, 0]))]
+
+
+def hypervolume_2d(F, reference) -> float:
+    """Area dominated by the non-dominated 2-objective points F up to the reference point."""
+    o = _sorted_front_2d(F, reference)
+    if o.size == 0:
+        return 0.0
+    f1, f2 = F[o, 0], F[o, 1]
+    widths = np.diff(np.append(f1, reference[0]))
+    return float(np.sum(widths * (reference[1] - f2)))
+
+
+def hypervolume_contributions(F, reference) -> np.ndarray:
+    """Area each non-dominated 2-objective point adds to the hypervolume (0 outside the reference box)."""
+    contribution = np.zeros(F.shape[0])
+    o = _sorted_front_2d(F, reference)
+    if o.size:
+        f1, f2 = F[o, 0], F[o, 1]
+        right = np.append(f1[1:], reference[0])
+        above = np.insert(f2[:-1], 0, reference[1])
+        contribution[o] = (right - f1) * (above - f2)
+    return contribution
+
+
+def spacing(F) -> float:
+    """
+    Schott's spacing of a front: standard deviation of each point's L1
+    distance to its nearest neighbour, 0 for evenly spread points.
+    """
+    n = F.shape[0]
+    if n < 2:
+        return 0.0
+    nearest = np.empty(n)
+    step = max(1, (1 << 20) // (n * F.shape[1]))
+    for s in range(0, n, step):
+        distance = np.abs(F[s:s + step, None, :] - F[None, :, :]).sum(axis=2)
+        distance[np.arange(distance.shape[0]), np.arange(s, s + distance.shape[0])] = np.inf
+        nearest[s:s + step] = distance.min(axis=1)
+    return float(nearest.std(ddof=1))
+
+
+class ParetoArchive:
+    """Non-dominated positions seen so far, at most `size` of them."""
+
+    def __init__(self, size=100, pruning="crowding", reference=None):
+        if size < 1:
+            raise ValueError("archiveSize must be at least 1")
+        key = (pruning or "crowding").strip().lower()
+        if key not in PRUNING:
+            raise ValueError(f"Unknown archive pruning '{pruning}'. Available: {', '.join(PRUNING)}")
+        if key == "hypervolume" and (reference is None or len(reference) != 2):
+            raise ValueError("Hypervolume pruning needs exactly 2 objectives; use crowding")
+        self.size = size
+        self.pruning = key
+        self.reference = reference
+        self.X = None
+        self.F = None
+
+    def update(self, X, F):
+        if self.X is not None:
+            X = np.concatenate((self.X, X))
+            F = np.concatenate((self.F, F))
+        keep = np.flatnonzero(first_front(F))
+        # Sources that did not move since the last update are already archived
+        _, first = np.unique(X[keep], axis=0, return_index=True)
+        keep = keep[np.sort(first)]
+        while keep.size > self.size:
+            keep = np.delete(keep, np.argmin(self._scores(F[keep])))
+        self.X = X[keep].copy()
+        self.F = F[keep].copy()
+
+    def _scores(self, F):
+        if self.pruning == "hypervolume":
+            return hypervolume_contributions(F, self.reference)
+        return crowding_distance(F)
+
+    def hypervolume(self):
+        if self.F is None or self.F.shape[1] != 2:
+            return None
+        return hypervolume_2d(self.F, self.reference)
+
+
+@dataclass
+class ParetoProblem:
+    """
+    objectives(X) -> (n, M) values to minimize; start holds the first food
+    sources; reference bounds the objective box for hypervolumes; describe(X)
+    returns extra fields for each archived position.
+    """
+    objectives: Callable
+    start: np.ndarray
+    lb: float
+    ub: float
+    reference: np.ndarray
+    describe: Callable = None
+
+
+PROBLEMS: Dict[str, dict] = {}
+
+
+def problem(name, description):
+    def register(factory):
+        PROBLEMS[name] = {"factory": factory, "description": description}
+        return factory
+    return register
+
+
+@problem("criteria", "Every criterion (min-max normalized, benefit) is an objective; positions mix the alternatives")
+def criteria_problem(matrix):
+    lo, span = minmax_scaling(matrix)
+    scaled = (matrix - lo) / span
+    n, D = matrix.shape
+
+    def objectives(L):
+        return 1.0 - mix_weights(L) @ scaled
+
+    def describe(L):
+        W = mix_weights(L)
+        return [{"alternative": f"A{int(np.argmax(w)) + 1}",
+                 "mix": np.round(w, 6).tolist(),
+                 "criteria": (w @ matrix).tolist()} for w in W]
+
+    return ParetoProblem(objectives, start=np.eye(n), lb=0.0, ub=1.0,
+                         reference=np.full(D, 1.1), describe=describe)
+
+
+@problem("zdt1", "ZDT1 benchmark: f1 = x1, f2 = g (1 - sqrt(x1 / g)) on [0, 1]^D")
+def zdt1_problem(matrix):
+    if matrix.shape[1] < 2:
+        raise ValueError("zdt1 needs at least 2 criteria")
+
+    def objectives(X):
+        g = 1.0 + 9.0 * X[:, 1:].mean(axis=1)
+        return np.column_stack((X[:, 0], g * (1.0 - np.sqrt(X[:, 0] / g))))
+
+    return ParetoProblem(objectives, start=np.clip(matrix, 0.0, 1.0), lb=0.0, ub=1.0,
+                         reference=np.array([1.1, 1.1]))
+
+
+def list_problems():
+    return [{"name": name, "description": p["description"]} for name, p in PROBLEMS.items()]
+
+
+def make_problem(name, matrix) -> ParetoProblem:
+    key = name.strip().lower()
+    if key not in PROBLEMS:
+        raise ValueError(f"Unknown multi-objective problem '{name}'. Available: {', '.join(PROBLEMS)}")
+    return PROBLEMS[key]["factory"](np.asarray(matrix, dtype=np.float64))
+
+
+class ParetoColony(Colony):
+    """Colony whose sources are compared by Pareto dominance and whose result is an archive."""
+
+    def __init__(self, problem, archive_size=100, pruning="crowding", **kwargs):
+        self.problem = problem
+        self.archive = ParetoArchive(archive_size, pruning, problem.reference)
+        self._last = None
+        super().__init__(problem.start, fobj=problem.objectives, lb=problem.lb, ub=problem.ub,
+                         incremental=False, **kwargs)
+        self.F = self._last.copy()
+        self.archive.update(self.pos, self.F)
+
+    def evaluate(self, X):
+        # Keeps the objective vectors of the last batch; fx is their mean
+        self._last = super().evaluate(X)
+        return self._last.mean(axis=1)
+
+    def _move(self, won, p2c, moved, fx, F):
+        self.pos[won, p2c] = moved
+        self.fx[won] = fx
+        self.F[won] = F
+        self.trial[won] = 0
+
+    def _greedy_update(self, idx):
+        p2c, moved, fnew = self._neighbours(idx)
+        F = self._last
+        better = dominates(F, self.F[idx])
+        self._move(idx[better], p2c[better], moved[better], fnew[better], F[better])
+        self.trial[idx[~better]] += 1
+
+    def onlooker_phase(self):
+        """
+        Onlookers pick sources with probability 1 / (1 + front index); a
+        source picked several times takes the first candidate that dominates
+        it, otherwise its trial counter grows by the number of attempts.
+        """
+        self.fit = 1.0 / (1.0 + nondominated_sort(self.F))
+        targets = self.select_onlookers(self.N)
+        p2c, moved, fnew = self._neighbours(targets)
+        F = self._last
+        better = np.flatnonzero(dominates(F, self.F[targets]))
+        won, first = np.unique(targets[better], return_index=True)
+        pick = better[first]
+
+        attempts = np.bincount(targets, minlength=self.N)
+        attempts[won] = 0
+        self._move(won, p2c[pick], moved[pick], fnew[pick], F[pick])
+        self.trial += attempts.astype(np.int32)
+
+    def scout_phase(self):
+        idx = np.flatnonzero(self.trial > self.limit)
+        if idx.size:
+            self.pos[idx] = self.rng.uniform(self.lb, self.ub, size=(idx.size, self.D))
+            self.fx[idx] = self.evaluate(self.pos[idx])
+            self.F[idx] = self._last
+            self.trial[idx] = 0
+            if self.observer is not None:
+                self.observer.on_scout(self, idx)
+
+    def step(self):
+        super().step()
+        self.archive.update(self.pos, self.F)
+
+    def front(self):
+        """Archived points ordered by the first objective."""
+        archive = self.archive
+        order = np.lexsort(archive.F.T[::-1])
+        extra = self.problem.describe(archive.X[order]) if self.problem.describe else None
+        points = []
+        for k, i in enumerate(order):
+            point = {"objectives": archive.F[i].tolist(), "position": archive.X[i].tolist()}
+            if extra is not None:
+                point.update(extra[k])
+            points.append(point)
+        return points
+
+    def nondominated_alternatives(self):
+        """Labels of the starting rows (the alternatives) on the first front among themselves."""
+        start = self.problem.start[:self.alternatives]
+        rank = nondominated_sort(self.problem.objectives(start))
+        return [f"A{i + 1}" for i in np.flatnonzero(rank == 0)]
@@ -0,0 +1,173 @@
+"""
+Content-addressed cache of /run responses for deterministic runs.
+
+A run with a seed (and no wall-clock limit) is fully determined by its
+matrix, params and the engine version, so its response is stored under the
+SHA-256 of those, canonicalized. Entries are kept as serialized JSON in an
+LRU bounded by total bytes, and optionally mirrored to one file per key in a
+directory so they survive restarts and are shared by several workers. The
+directory has the same byte budget: files already there are indexed at
+startup, and the least recently used (oldest mtime) are deleted when a write
+takes it over budget, rescanning first to count other workers' files.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from abc_engine import ENGINE_VERSION
+
+
+def cache_key(params, matrix: np.ndarray) -> Optional[str]:
+    """Key for a run, or None when the run is not reproducible (or is profiled or checkpointed)."""
+    if params.seed is None or params.timeLimitMs is not None or params.profile:
+        return None
+    # Checkpoints are a side effect, and warm-start sources can change under the same id
+    if params.checkpointEvery or params.warmStart:
+        return None
+    data = np.ascontiguousarray(matrix, dtype=np.float64)
+    h = hashlib.sha256()
+    h.update(f"engine={ENGINE_VERSION};shape={data.shape};".encode())
+    h.update(json.dumps(params.dict(), sort_keys=True, separators=(',', ':')).encode())
+    h.update(data.tobytes())
+    return h.hexdigest()
+
+
+class ResultCache:
+    def __init__(self, max_bytes=64 * 1024 * 1024, directory=None):
+        self.max_bytes = max_bytes
+        self.directory = Path(directory) if directory else None
+        self.hits = 0
+        self.misses = 0
+        self.bytes = 0
+        self._entries = OrderedDict()
+        # Files in the directory (key -> size), least recently used first
+        self._files = OrderedDict()
+        self.disk_bytes = 0
+        self._lock = threading.Lock()
+        if self.directory is not None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self._scan_disk()
+            self._trim_disk()
+
+    def _path(self, key):
+        return self.directory / f"{key}.json"
+
+    def _scan_disk(self):
+        files = []
+        for path in self.directory.glob('*.json'):
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            files.append((st.st_mtime, path.stem, st.st_size))
+        files.sort()
+        self._files = OrderedDict((key, size) for _, key, size in files)
+        self.disk_bytes = sum(self._files.values())
+
+    def _trim_disk(self):
+        if self.disk_bytes <= self.max_bytes:
+            return
+        self._scan_disk()
+        while self.disk_bytes > self.max_bytes and self._files:
+            key, size = self._files.popitem(last=False)
+            self.disk_bytes -= size
+            self._remove_disk(key)
+
+    def _read_disk(self, key):
+        if self.directory is None:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                value = f.read()
+            # Recency survives restarts and is seen by the other workers' scans
+            os.utime(path)
+        except OSError:
+            return None
+        return value
+
+    def _write_disk(self, key, value):
+        if self.directory is None:
+            return
+        tmp = tempfile.NamedTemporaryFile('w', delete=False, dir=str(self.directory), encoding='utf-8')
+        tmp.write(value)
+        tmp.flush()
+        tmp.close()
+        os.replace(tmp.name, self._path(key))
+        with self._lock:
+            self._disk_touched(key, len(value.encode('utf-8')))
+            self._trim_disk()
+
+    def _disk_touched(self, key, size):
+        self.disk_bytes += size - self._files.pop(key, 0)
+        self._files[key] = size
+
+    def _remove_disk(self, key):
+        if self.directory is not None:
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+    def _insert(self, key, value):
+        if key in self._entries:
+            self.bytes -= len(self._entries.pop(key))
+        self._entries[key] = value
+        self.bytes += len(value)
+        while self.bytes > self.max_bytes and self._entries:
+            old_key, old_value = self._entries.popitem(last=False)
+            self.bytes -= len(old_value)
+
+    def get(self, key) -> Optional[str]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+        value = self._read_disk(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            if key in self._files:
+                self._files.move_to_end(key)
+            self._insert(key, value)
+            return value
+
+    def put(self, key, value: str):
+        if len(value) > self.max_bytes:
+            return
+        self._write_disk(key, value)
+        with self._lock:
+            self._insert(key, value)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+            if self.directory is not None:
+                for path in self.directory.glob('*.json'):
+                    self._remove_disk(path.stem)
+                self._files.clear()
+                self.disk_bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "maxBytes": self.max_bytes,
+                "diskBytes": self.disk_bytes,
+                "persistent": self.directory is not None,
+            }
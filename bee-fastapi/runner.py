@@ -0,0 +1,373 @@
+"""
+Glue between the API request models and the ABC engine.
+
+Shared by the synchronous /run endpoint, the SSE stream and the background
+job workers so they all build the colony and the response the same way.
+"""
+import cProfile
+import io
+import json
+import pstats
+import time
+from typing import Callable, Iterator, Optional
+
+import numpy as np
+
+from abc_engine import Colony, IterationStats, StopCriteria, iterate_abc, make_rng
+from checkpoints import Checkpointer, new_checkpoint_id, seed_colony
+from datasets import registry as dataset_registry
+from jit_engine import AVAILABLE as JIT_AVAILABLE, BACKENDS, JitColony, kernel_args
+from objectives import CachedObjective, make_objective
+from metrics import RUN_METRICS, RunMetrics
+from observers import Observers, make_observer
+from pareto import ParetoColony, make_problem, spacing
+from schema import ExperimentRunRequest, ExperimentRunResponse
+
+
+PROFILE_LINES = 25
+
+
+def matrix_from_input(inp) -> np.ndarray:
+    """The inline matrix of the request, or the stored dataset named by datasetName."""
+    matrix = inp.matrix
+    if matrix:
+        return np.array(matrix, dtype=np.float64)
+    if inp.datasetName:
+        return dataset_registry.load(inp.datasetName)
+    raise ValueError("No matrix data provided")
+
+
+def make_colony(data: np.ndarray, params, rng=None) -> Colony:
+    if params.lowerBound >= params.upperBound:
+        raise ValueError("lowerBound must be smaller than upperBound")
+    if params.backend not in BACKENDS:
+        raise ValueError(f"Unknown backend '{params.backend}'. Available: {', '.join(BACKENDS)}")
+    if params.multiObjective:
+        return make_pareto_colony(data, params, rng)
+    fobj = make_objective(params.objectiveFunction, data, params.weights)
+    start, (lb, ub) = search_space(fobj, data, params)
+    if params.cacheEvaluations:
+        fobj = CachedObjective(fobj, resolution=params.cacheResolution, extent=max(abs(lb), abs(ub)))
+    kwargs = dict(
+        fobj=fobj,
+        lb=lb,
+        ub=ub,
+        limit=params.feedLimit,
+        rng=rng if rng is not None else make_rng(params.seed, params.bitGenerator),
+        size=params.numBees,
+    )
+    # The compiled kernels only know the built-in objectives and bypass the
+    # evaluation cache; anything else falls back to the NumPy engine.
+    colony = None
+    if params.backend == "numba" and JIT_AVAILABLE and not params.cacheEvaluations:
+        kernel = kernel_args(params.objectiveFunction, data, params.weights)
+        if kernel is not None:
+            colony = JitColony(start, kernel, **kwargs)
+    if colony is None:
+        colony = Colony(start, **kwargs)
+    colony.criteria = data.shape[1]
+    # weighted-sum is the one built-in objective with its own space: mixes of the alternatives
+    colony.mixes = start is not data
+    return attach_observers(colony, params)
+
+
+def search_space(fobj, data, params):
+    """
+    First positions and (lb, ub) of a run: the matrix rows within the
+    params' bounds, or the objective's own f.start and f.bounds.
+    """
+    start = getattr(fobj, "start", None)
+    if start is None:
+        return data, (params.lowerBound, params.upperBound)
+    return start, fobj.bounds
+
+
+def make_pareto_colony(data: np.ndarray, params, rng=None) -> ParetoColony:
+    # Migration swaps scalar-ranked sources, which means nothing for a Pareto archive
+    if is_island_run(params):
+        raise ValueError("Multi-objective runs cannot use islands")
+    colony = ParetoColony(
+        make_problem(params.multiObjective, data),
+        archive_size=params.archiveSize,
+        pruning=params.archivePruning,
+        limit=params.feedLimit,
+        rng=rng if rng is not None else make_rng(params.seed, params.bitGenerator),
+        size=params.numBees,
+    )
+    # Positions are problem variables (for "criteria", one weight per alternative)
+    colony.criteria = data.shape[1]
+    return attach_observers(colony, params)
+
+
+def attach_observers(colony, params):
+    """
+    Attach the params.trace sink (colony.trace) and, with params.profile, a
+    RunMetrics (colony.run_metrics). Without either the colony runs with no
+    observer at all; build_colony adds RunMetrics for runs served by the API.
+    """
+    colony.trace = make_observer(params)
+    colony.run_metrics = RunMetrics() if params.profile else None
+    colony.observer = None
+    for observer in (colony.run_metrics, colony.trace):
+        if observer is not None:
+            add_observer(colony, observer)
+    return colony
+
+
+def trace_observer(colony):
+    """The params.trace sink attached to colony by make_colony, if any."""
+    return getattr(colony, "trace", None)
+
+
+def add_observer(colony, observer):
+    current = colony.observer
+    if current is None:
+        colony.observer = observer
+    elif isinstance(current, Observers):
+        current.observers.append(observer)
+    else:
+        colony.observer = Observers([current, observer])
+
+
+def request_record(req: ExperimentRunRequest) -> dict:
+    """The request as stored in a checkpoint; the matrix is saved with the arrays."""
+    record = req.dict()
+    record["input"]["matrix"] = None
+    return record
+
+
+def build_colony(req: ExperimentRunRequest, checkpoint_id=None, resume=None, warm_start=None,
+                 checkpoint_dir=None, matrix=None) -> Colony:
+    """
+    The colony of a run: restored from `resume` (a checkpoints.Checkpoint),
+    or new and, with `warm_start`, seeded with those positions, and feeding
+    the /metrics registry unless BEE_RUN_METRICS=0. With
+    params.checkpointEvery a Checkpointer saving under checkpoint_id (a new
+    id by default, the resumed one when resuming) in checkpoint_dir (default
+    BEE_CHECKPOINT_DIR) is attached, and the id is kept as colony.checkpoint_id.
+    `matrix` is req.input's matrix when the caller already loaded it.
+    """
+    params = req.params
+    if params.multiObjective and (resume is not None or warm_start is not None or params.checkpointEvery):
+        raise ValueError("Multi-objective runs cannot be checkpointed or warm-started")
+    if resume is not None:
+        matrix = resume.matrix
+    elif matrix is None:
+        matrix = matrix_from_input(req.input)
+    colony = make_colony(matrix, params)
+    if RUN_METRICS and colony.run_metrics is None:
+        colony.run_metrics = RunMetrics()
+        add_observer(colony, colony.run_metrics)
+    series = []
+    if resume is not None:
+        resume.restore(colony)
+        series = resume.iteration_stats()
+        checkpoint_id = resume.id
+    elif warm_start is not None:
+        seed_colony(colony, warm_start)
+    if params.checkpointEvery:
+        checkpoint_id = checkpoint_id or new_checkpoint_id()
+        add_observer(colony, Checkpointer(checkpoint_id, request_record(req), matrix,
+                                          params.checkpointEvery, series, checkpoint_dir))
+    colony.checkpoint_id = checkpoint_id
+    return colony
+
+
+def stop_criteria(params) -> StopCriteria:
+    return StopCriteria(
+        max_evaluations=params.maxEvaluations,
+        target_fitness=params.targetFitness,
+        stagnation_window=params.stagnationWindow,
+        stagnation_epsilon=params.stagnationEpsilon,
+        time_limit=None if params.timeLimitMs is None else params.timeLimitMs / 1000.0,
+    )
+
+
+def best_source_label(colony) -> str:
+    """A<k> while the best source is one seeded from matrix row k, else its colony index."""
+    if getattr(colony, "mixes", False):
+        # Positions weigh the alternatives: the best one stands for its heaviest
+        return f"A{int(np.argmax(colony.best_position)) + 1}"
+    if colony.best_index < colony.alternatives:
+        return f"A{colony.best_index + 1}"
+    return f"Source {colony.best_index + 1}"
+
+
+def build_response(req: ExperimentRunRequest, colony: Colony, start_time,
+                   iterations_done, initial_fitness, result_series,
+                   stop_reason=None) -> ExperimentRunResponse:
+    # Calculate final metrics
+    final_fitness = colony.best_value
+    convergence = initial_fitness - final_fitness
+    pareto = isinstance(colony, ParetoColony)
+
+    # The scalar fitness of a Pareto run (mean of the objectives) says nothing
+    # about its front, which is described by the front KPIs below instead
+    kpis = [] if pareto else [{"label": "Best fitness", "value": round(final_fitness, 6)}]
+    kpis.append({"label": "Iterations", "value": iterations_done})
+    if not pareto:
+        kpis.append({"label": "Convergence", "value": round(convergence, 6)})
+    kpis += [
+        {"label": "Alternatives", "value": colony.alternatives},
+        {"label": "Criteria", "value": getattr(colony, "criteria", colony.D)},
+        {"label": "Bees", "value": colony.N},
+        {"label": "Feed Limit", "value": colony.limit},
+        {"label": "Best alternative", "value": best_source_label(colony)},
+        {"label": "Evaluations", "value": colony.evaluations},
+        {"label": "Stop reason", "value": stop_reason or "iterations"},
+        {"label": "Objectives", "value": req.params.multiObjective} if pareto else
+        {"label": "Objective", "value": req.params.objectiveFunction or "distance"},
+        {"label": "Backend", "value": getattr(colony, "backend", "numpy")}
+    ]
+    if pareto:
+        kpis.append({"label": "Front size", "value": len(colony.archive.F)})
+        hypervolume = colony.archive.hypervolume()
+        if hypervolume is not None:
+            kpis.append({"label": "Hypervolume", "value": round(hypervolume, 6)})
+        kpis.append({"label": "Spacing", "value": round(spacing(colony.archive.F), 6)})
+        kpis.append({"label": "Non-dominated alternatives",
+                     "value": ", ".join(colony.nondominated_alternatives())})
+    if getattr(colony, "islands", None):
+        kpis.append({"label": "Islands", "value": colony.islands})
+    if isinstance(colony.fobj, CachedObjective):
+        kpis.append({"label": "Cache hits", "value": colony.fobj.hits})
+    trace_path = getattr(trace_observer(colony), "path", None)
+    if trace_path is not None:
+        kpis.append({"label": "Trace file", "value": trace_path.name})
+
+    duration_ms = int((time.time() - start_time) * 1000)
+    run_metrics = getattr(colony, "run_metrics", None)
+
+    return ExperimentRunResponse(
+        durationMs=duration_ms,
+        kpis=kpis,
+        bestSolution=colony.best_position.tolist(),
+        resultSeries=result_series,
+        stopReason=stop_reason,
+        paretoFront=colony.front() if pareto else None,
+        checkpointId=getattr(colony, "checkpoint_id", None),
+        profile={"phasesMs": run_metrics.phase_ms()} if req.params.profile and run_metrics else None,
+    )
+
+
+def execute_run(req: ExperimentRunRequest,
+                on_iteration: Optional[Callable[[IterationStats], None]] = None,
+                cancelled: Optional[Callable[[], bool]] = None,
+                checkpoint_id: Optional[str] = None, resume=None,
+                warm_start: Optional[np.ndarray] = None,
+                checkpoint_dir=None, matrix: Optional[np.ndarray] = None) -> ExperimentRunResponse:
+    """
+    Run one experiment until its iterations or stopping rules are exhausted.
+    on_iteration sees every iteration as it finishes; when cancelled() turns
+    true the run stops with stopReason "cancelled" and the response only
+    covers the iterations done so far. With params.profile the run executes
+    under cProfile and the response carries its summary and the engine's
+    per-phase times. checkpoint_id, resume, warm_start, checkpoint_dir and
+    matrix (the input matrix, if already loaded) are passed to build_colony;
+    a resumed run replays its stored iterations to on_iteration and
+    continues up to params.iterations in total.
+    """
+    args = (req, on_iteration, cancelled, checkpoint_id, resume, warm_start, checkpoint_dir, matrix)
+    if req.params.profile:
+        profiler = cProfile.Profile()
+        response = profiler.runcall(_execute_run, *args)
+        response.profile = dict(response.profile or {}, stats=profile_stats(profiler))
+        return response
+    return _execute_run(*args)
+
+
+def profile_stats(profiler, limit=PROFILE_LINES) -> str:
+    """Top functions of a cProfile run by cumulative time, as pstats prints them."""
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).strip_dirs().sort_stats("cumulative").print_stats(limit)
+    return out.getvalue()
+
+
+def _execute_run(req, on_iteration, cancelled, checkpoint_id=None, resume=None,
+                 warm_start=None, checkpoint_dir=None, matrix=None) -> ExperimentRunResponse:
+    start_time = time.time()
+    if is_island_run(req.params):
+        if resume is not None or warm_start is not None or req.params.checkpointEvery:
+            raise ValueError("Island runs cannot be checkpointed or warm-started")
+        return execute_island_run(req, on_iteration, start_time, matrix)
+    colony = build_colony(req, checkpoint_id, resume, warm_start, checkpoint_dir, matrix)
+    stop = stop_criteria(req.params)
+    series = resume.iteration_stats() if resume is not None else []
+    if on_iteration is not None:
+        for stats in series:
+            on_iteration(stats)
+    run = iterate_abc(colony, req.params.iterations, stop, start=len(series))
+    for stats in run:
+        series.append(stats)
+        if on_iteration is not None:
+            on_iteration(stats)
+        if cancelled is not None and cancelled():
+            stop.reason = "cancelled"
+            break
+    run.close()
+    initial_fitness = series[0].best_fitness if series else colony.best_value
+    return build_response(req, colony, start_time, len(series), initial_fitness,
+                          [s.as_dict() for s in series], stop.reason)
+
+
+def is_island_run(params) -> bool:
+    return params.islands is not None and params.islands > 1
+
+
+def execute_island_run(req: ExperimentRunRequest, on_iteration, start_time,
+                       matrix=None) -> ExperimentRunResponse:
+    """
+    Island-model variant of execute_run. The merged series only exists once
+    all islands finish, so on_iteration is replayed at the end and the run
+    cannot be cancelled midway.
+    """
+    # Imported here: islands builds its colonies through this module
+    from islands import run_islands
+
+    p = req.params
+    matrix = matrix_from_input(req.input) if matrix is None else matrix
+    result = run_islands(matrix, p, p.islands, p.migrationInterval, p.migrants)
+    if on_iteration is not None:
+        for stats in result.series:
+            on_iteration(stats)
+    initial_fitness = result.series[0].best_fitness if result.series else result.best_value
+    return build_response(req, result, start_time, len(result.series), initial_fitness,
+                          [s.as_dict() for s in result.series], result.stop_reason)
+
+
+def sse_event(event, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def stream_run(req: ExperimentRunRequest, colony: Colony, every: int = 1) -> Iterator[str]:
+    """
+    Server-Sent Events for one run: an `iteration` event every `every`
+    iterations (and always for the last one, also when a stopping rule ends
+    the run early), then a `result` event with the
+    KPIs and best solution. Iterations are forwarded as they are produced and
+    never accumulated, so the result event carries an empty resultSeries.
+    """
+    start_time = time.time()
+    every = max(1, every)
+    stop = stop_criteria(req.params)
+    initial_fitness = None
+    done = 0
+    pending = None
+    try:
+        for stats in iterate_abc(colony, req.params.iterations, stop):
+            done = stats.iteration
+            if initial_fitness is None:
+                initial_fitness = stats.best_fitness
+            # Hold back skipped iterations until we know whether they are the last one
+            pending = stats
+            if done % every == 0:
+                yield sse_event("iteration", stats.as_dict())
+                pending = None
+        if pending is not None:
+            yield sse_event("iteration", pending.as_dict())
+        if initial_fitness is None:
+            initial_fitness = colony.best_value
+        response = build_response(req, colony, start_time, done, initial_fitness, [], stop.reason)
+        yield sse_event("result", response.dict())
+    except Exception as e:
+        yield sse_event("error", {"detail": str(e)})
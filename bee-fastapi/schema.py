@@ -1,12 +1,57 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional
 from typing import Any
 
 class BeeParams(BaseModel):
-    feedLimit: int
-    numBees: int
-    iterations: int
+    # Trials without improvement before a source is abandoned (default rows x
+    # columns of the matrix, whatever numBees is; the "Feed Limit" KPI)
+    feedLimit: Optional[int] = Field(None, ge=1)
+    # Colony size (food sources); the matrix rows seed the first ones, and a
+    # smaller value is raised to the number of rows
+    numBees: int = Field(ge=1)
+    iterations: int = Field(ge=1)
     seed: Optional[int] = None
+    # Bit generator of the run's private RNG stream: "pcg64" or "philox"
+    bitGenerator: str = "pcg64"
+    # "numpy" (vectorized phases) or "numba" (compiled per-bee loops, if installed)
+    backend: str = "numpy"
+    # Opt-in tracing: "none", "summary", "every-k" (every traceEvery
+    # iterations) or "file" (binary trace, with the population if tracePopulation)
+    trace: str = "none"
+    traceEvery: int = Field(10, ge=1)
+    tracePopulation: bool = False
+    # Run under cProfile and return its summary in the response
+    profile: bool = False
+    # Optional early-stopping rules, checked after every iteration
+    maxEvaluations: Optional[int] = Field(None, ge=1)
+    targetFitness: Optional[float] = None
+    stagnationWindow: Optional[int] = Field(None, ge=1)
+    stagnationEpsilon: float = Field(0.0, ge=0)
+    timeLimitMs: Optional[int] = Field(None, ge=1)
+    # Objective selection (see objectives.py) and search bounds
+    objectiveFunction: Optional[str] = None
+    weights: Optional[List[float]] = None
+    lowerBound: float = 0.0
+    upperBound: float = 1.0
+    # Memoize fobj on positions quantized to cacheResolution
+    cacheEvaluations: bool = False
+    cacheResolution: float = Field(1e-9, gt=0)
+    # Island model: independent colonies in separate processes exchanging
+    # their `migrants` best sources every `migrationInterval` iterations
+    islands: Optional[int] = Field(None, ge=1)
+    migrationInterval: int = Field(10, ge=1)
+    migrants: int = Field(1, ge=1)
+    # Multi-objective mode (see pareto.py): "criteria" or "zdt1". The run keeps
+    # a Pareto archive of at most archiveSize points, pruned by "crowding" or,
+    # with 2 objectives, "hypervolume"; bounds come from the problem.
+    multiObjective: Optional[str] = None
+    archiveSize: int = Field(100, ge=1)
+    archivePruning: str = "crowding"
+    # Save the colony every checkpointEvery iterations (see checkpoints.py) so
+    # the run can be resumed; warmStart seeds the run with the best food
+    # sources of a checkpoint or the best solution of a stored experiment (id)
+    checkpointEvery: Optional[int] = Field(None, ge=1)
+    warmStart: Optional[str] = None
 
 class ExperimentInput(BaseModel):
     mode: str
@@ -22,6 +67,43 @@ class ExperimentRunResponse(BaseModel):
     kpis: List[dict]
     bestSolution: Optional[List[float]] = None
     resultSeries: List[dict]
+    stopReason: Optional[str] = None
+    # Only for multi-objective runs: the archived front, by the first objective
+    paretoFront: Optional[List[dict]] = None
+    # Only for runs with params.profile: phasesMs and cProfile stats
+    profile: Optional[dict] = None
+    # Only for runs with params.checkpointEvery: id to resume them by
+    checkpointId: Optional[str] = None
+
+
+class BatchRunRequest(BaseModel):
+    input: ExperimentInput
+    runs: List[BeeParams]
+    includeSeries: bool = False
+    maxWorkers: Optional[int] = Field(None, ge=1)
+    # Runs without their own seed get one spawned from this (random if unset)
+    seed: Optional[int] = None
+
+
+class BatchRunResponse(BaseModel):
+    durationMs: int
+    runs: List[dict]
+    stats: dict
+
+
+class StackedRunRequest(BaseModel):
+    params: BeeParams
+    # One decision matrix per problem (a 3-D array when they share a shape)...
+    matrices: Optional[List[List[List[float]]]] = None
+    # ...and/or stored datasets, appended after them
+    datasetNames: Optional[List[str]] = None
+    includeSolutions: bool = True
+
+
+class StackedRunResponse(BaseModel):
+    durationMs: int
+    evaluations: int
+    results: List[dict]
 
 
 # Experiment storage models
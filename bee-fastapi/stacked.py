@@ -0,0 +1,290 @@
+"""
+Many independent ABC runs as one tensor computation.
+
+StackedColony holds P colonies, one per decision matrix, in arrays with a
+leading problem axis: positions P x N x D, objective values, fitness and
+trial counters P x N. Each phase draws the random numbers of all problems
+at once and evaluates every candidate of every problem in one objective
+call, so an iteration over thousands of small matrices costs a handful of
+array operations. Partners and onlooker picks never cross problems; apart
+from that, each colony follows the same phases as abc_engine.Colony.
+
+Objectives take the flattened candidates together with the problem each
+one belongs to, so matrix-dependent objectives (weighted-sum, topsis) use
+the constants of their own matrix. Matrices of different shapes are run as
+one stack per shape.
+"""
+from typing import Optional
+
+import numpy as np
+
+from abc_engine import REFRESH_INTERVAL, calculate_fitness, make_rng
+from objectives import (OBJECTIVES, alternative_scores, make_objective, mix_weights, objective_key,
+                        topsis_reference)
+
+# Registered objectives that ignore the matrix and can be shared by every problem
+MATRIX_FREE = ("distance", "sphere", "rastrigin", "rosenbrock", "ackley")
+
+
+def stacked_objective(name: Optional[str], matrices: np.ndarray, weights=None):
+    """
+    f(X, p) -> values of the rows X (k x D), row i belonging to problem p[i].
+    Separable objectives also get f.term(x, j, p), as in objectives.py.
+    """
+    key = objective_key(name)
+    if key == "weighted-sum":
+        # As objectives.weighted_sum: positions mix the alternatives of their matrix
+        scores = alternative_scores(matrices, weights)
+
+        def f(L, p):
+            return -np.sum(mix_weights(L) * scores[p], axis=1)
+        f.start = np.eye(matrices.shape[1])
+        f.bounds = (0.0, 1.0)
+        return f
+    if key == "topsis":
+        w, ideal, anti = topsis_reference(matrices, weights)
+
+        def f(X, p):
+            Y = X * w[p]
+            d_best = np.sqrt(np.sum((Y - ideal[p]) ** 2, axis=1))
+            d_worst = np.sqrt(np.sum((Y - anti[p]) ** 2, axis=1))
+            total = d_best + d_worst
+            closeness = np.divide(d_worst, total, out=np.zeros_like(total), where=total > 0)
+            return 1.0 - closeness
+        return f
+    if key in OBJECTIVES and key not in MATRIX_FREE:
+        raise ValueError(f"Objective '{name}' cannot be used for stacked runs")
+    base = make_objective(name, matrices[0], weights)
+
+    def f(X, p):
+        return base(X)
+    term = getattr(base, "term", None)
+    if term is not None:
+        f.term = lambda x, j, p: term(x, j)
+    f.lower = getattr(base, "lower", None)
+    return f
+
+
+class StackedColony:
+    def __init__(self, matrices, objective, lb=0.0, ub=1.0, limit=None, rng=None, size=None):
+        matrices = np.asarray(matrices, dtype=np.float64)
+        if matrices.ndim != 3 or min(matrices.shape) < 1:
+            raise ValueError("matrices must be a non-empty stack of 2-D matrices of the same shape")
+        self.P, self.alternatives, self.D = matrices.shape
+        # As in Colony, every row of the matrices is a food source
+        self.N = self.alternatives if size is None else max(int(size), self.alternatives)
+        if self.N < 2:
+            raise ValueError("colony needs at least 2 food sources")
+        self.lb = np.broadcast_to(np.asarray(lb, dtype=np.float64), (self.D,))
+        self.ub = np.broadcast_to(np.asarray(ub, dtype=np.float64), (self.D,))
+        self.limit = self.alternatives * self.D if limit is None else limit
+        self.fobj = objective
+        self.term = getattr(objective, "term", None)
+        self.lower = getattr(objective, "lower", None)
+        self.steps = 0
+        self.rng = rng if rng is not None else make_rng()
+        self.evaluations = 0
+
+        P, N, D = self.P, self.N, self.D
+        seeded = self.alternatives
+        self.pos = np.empty((P, N, D), dtype=np.float64)
+        self.pos[:, :seeded] = matrices
+        if N > seeded:
+            self.pos[:, seeded:] = self.rng.uniform(self.lb, self.ub, size=(P, N - seeded, D))
+        # Flat views: row p * N + i is source i of problem p
+        self._flat = self.pos.reshape(P * N, D)
+        self._problem = np.repeat(np.arange(P), N)
+        self._offset = np.arange(P)[:, None] * N
+        self._all = np.broadcast_to(np.arange(N), (P, N))
+
+        self.fx = self.evaluate(self._flat, self._problem).reshape(P, N)
+        self.fit = calculate_fitness(self.fx)
+        self.trial = np.zeros((P, N), dtype=np.int32)
+
+        self.best_index = np.argmin(self.fx, axis=1)
+        self.best_value = self.fx[np.arange(P), self.best_index]
+        self.best_position = self.pos[np.arange(P), self.best_index].copy()
+
+    def evaluate(self, X, p):
+        self.evaluations += X.shape[0]
+        return np.asarray(self.fobj(X, p), dtype=np.float64)
+
+    def _neighbours(self, idx):
+        """
+        One candidate per entry of idx (P x n source indices, per problem); returns
+        the flat rows of the sources, the changed criteria, their new values and
+        the candidates' objective values, all flattened.
+        """
+        P, n = idx.shape
+        rows = (idx + self._offset).ravel()
+        p2c = self.rng.integers(self.D, size=P * n)
+        partner = self.rng.integers(self.N - 1, size=(P, n))
+        partner += partner >= idx
+        partner = (partner + self._offset).ravel()
+
+        X = self._flat[rows, p2c]
+        phi = self.rng.uniform(-1.0, 1.0, size=P * n) * (X - self._flat[partner, p2c])
+        moved = np.clip(X + phi, self.lb[p2c], self.ub[p2c])
+        problem = self._problem[rows]
+        if self.term is not None:
+            self.evaluations += rows.size
+            fnew = self.fx.ravel()[rows] + (self.term(moved, p2c, problem) - self.term(X, p2c, problem))
+            if self.lower is not None:
+                np.maximum(fnew, self.lower, out=fnew)
+        else:
+            Xnew = self._flat[rows]
+            Xnew[np.arange(rows.size), p2c] = moved
+            fnew = self.evaluate(Xnew, problem)
+        return rows, p2c, moved, fnew
+
+    def _apply(self, rows, p2c, moved, fnew):
+        self._flat[rows, p2c] = moved
+        self.fx.ravel()[rows] = fnew
+        self.fit.ravel()[rows] = calculate_fitness(fnew)
+        self.trial.ravel()[rows] = 0
+
+    def employed_phase(self):
+        rows, p2c, moved, fnew = self._neighbours(self._all)
+        better = calculate_fitness(fnew) > self.fit.ravel()[rows]
+        self._apply(rows[better], p2c[better], moved[better], fnew[better])
+        self.trial.ravel()[rows[~better]] += 1
+
+    def select_onlookers(self):
+        """Roulette-wheel draw of N sources per problem, all problems in one searchsorted."""
+        cdf = np.cumsum(self.fit.ravel())
+        totals = cdf[self.N - 1::self.N]
+        starts = np.concatenate(([0.0], totals[:-1]))
+        draws = starts[:, None] + self.rng.random((self.P, self.N)) * (totals - starts)[:, None]
+        picks = np.searchsorted(cdf, draws, side='right')
+        # Rounding at a problem's boundary must not leak into its neighbour
+        return np.clip(picks - self._offset, 0, self.N - 1)
+
+    def onlooker_phase(self):
+        """
+        Same rule as Colony.onlooker_phase: each picked source keeps its best
+        candidate if it improves. The best candidate per source is found by a
+        scatter-min instead of a sort, which matters at P * N candidates.
+        """
+        rows, p2c, moved, fnew = self._neighbours(self.select_onlookers())
+        size = self.P * self.N
+        lowest = np.full(size, np.inf)
+        np.minimum.at(lowest, rows, fnew)
+        best = np.empty(size, dtype=np.intp)
+        ties = np.flatnonzero(fnew == lowest[rows])
+        best[rows[ties]] = ties
+        attempts = np.bincount(rows, minlength=size)
+        src = np.flatnonzero(attempts)
+
+        better = calculate_fitness(lowest[src]) > self.fit.ravel()[src]
+        won = best[src[better]]
+        self._apply(src[better], p2c[won], moved[won], fnew[won])
+        self.trial.ravel()[src[~better]] += attempts[src[~better]].astype(np.int32)
+
+    def scout_phase(self):
+        rows = np.flatnonzero(self.trial.ravel() > self.limit)
+        if rows.size:
+            self._flat[rows] = self.rng.uniform(self.lb, self.ub, size=(rows.size, self.D))
+            fx = self.evaluate(self._flat[rows], self._problem[rows])
+            self.fx.ravel()[rows] = fx
+            self.fit.ravel()[rows] = calculate_fitness(fx)
+            self.trial.ravel()[rows] = 0
+
+    def update_best(self):
+        ind = np.argmin(self.fx, axis=1)
+        value = self.fx[np.arange(self.P), ind]
+        improved = np.flatnonzero(value < self.best_value)
+        self.best_value[improved] = value[improved]
+        self.best_index[improved] = ind[improved]
+        self.best_position[improved] = self.pos[improved, ind[improved]]
+
+    def step(self):
+        self.employed_phase()
+        self.onlooker_phase()
+        self.scout_phase()
+        self.steps += 1
+        if self.term is not None and self.steps % REFRESH_INTERVAL == 0:
+            self.refresh()
+        self.update_best()
+
+    def refresh(self):
+        """As Colony.refresh: exact values of all sources and best positions."""
+        self.fx[...] = self.evaluate(self._flat, self._problem).reshape(self.P, self.N)
+        self.fit[...] = calculate_fitness(self.fx)
+        self.best_value = self.evaluate(self.best_position, np.arange(self.P))
+
+
+def source_label(index, alternatives) -> str:
+    """A<k> for a source seeded from matrix row k, else its colony index (as in runner.best_source_label)."""
+    if index < alternatives:
+        return f"A{index + 1}"
+    return f"Source {index + 1}"
+
+
+def unsupported_params(params):
+    """Names of the params set away from their defaults that a stacked run has no equivalent for."""
+    unset = (
+        ("maxEvaluations", params.maxEvaluations is None),
+        ("targetFitness", params.targetFitness is None),
+        ("stagnationWindow", params.stagnationWindow is None),
+        ("timeLimitMs", params.timeLimitMs is None),
+        ("backend", params.backend == "numpy"),
+        ("cacheEvaluations", not params.cacheEvaluations),
+        ("trace", (params.trace or "none").strip().lower() == "none"),
+        ("profile", not params.profile),
+        ("islands", params.islands is None or params.islands <= 1),
+        ("multiObjective", params.multiObjective is None),
+        ("checkpointEvery", not params.checkpointEvery),
+        ("warmStart", params.warmStart is None),
+    )
+    return [name for name, ok in unset if not ok]
+
+
+def run_stacked(matrices, params, include_solutions=True):
+    """
+    Run params.iterations iterations of ABC on every matrix; returns one
+    result per matrix, in input order, and the total number of evaluations.
+    Params without a stacked equivalent (see unsupported_params) are rejected.
+    """
+    unsupported = unsupported_params(params)
+    if unsupported:
+        raise ValueError(f"Stacked runs do not support: {', '.join(unsupported)}")
+    if params.lowerBound >= params.upperBound:
+        raise ValueError("lowerBound must be smaller than upperBound")
+    if len(matrices) == 0:
+        raise ValueError("No matrices provided")
+    arrays = [np.asarray(m, dtype=np.float64) for m in matrices]
+    groups = {}
+    for k, m in enumerate(arrays):
+        if m.ndim != 2 or m.shape[0] < 1 or m.shape[1] < 1:
+            raise ValueError(f"Matrix {k} must be 2-D with at least 1 row and 1 column")
+        groups.setdefault(m.shape, []).append(k)
+
+    rng = make_rng(params.seed, params.bitGenerator)
+    results = [None] * len(arrays)
+    evaluations = 0
+    for shape, members in groups.items():
+        stack = np.stack([arrays[k] for k in members])
+        objective = stacked_objective(params.objectiveFunction, stack, params.weights)
+        mixes = getattr(objective, "start", None) is not None
+        if mixes:
+            positions = np.broadcast_to(objective.start, (len(members),) + objective.start.shape)
+            lb, ub = objective.bounds
+        else:
+            positions, lb, ub = stack, params.lowerBound, params.upperBound
+        colony = StackedColony(positions, objective, lb=lb, ub=ub, limit=params.feedLimit,
+                               rng=rng, size=params.numBees)
+        for _ in range(params.iterations):
+            colony.step()
+        evaluations += colony.evaluations
+        for row, k in enumerate(members):
+            index = int(colony.best_index[row])
+            results[k] = {
+                "problem": k,
+                "bestAlternative": (f"A{int(np.argmax(colony.best_position[row])) + 1}" if mixes
+                                    else source_label(index, colony.alternatives)),
+                "bestIndex": index,
+                "bestFitness": float(colony.best_value[row]),
+            }
+            if include_solutions:
+                results[k]["bestSolution"] = colony.best_position[row].tolist()
+    return results, evaluations
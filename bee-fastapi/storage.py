@@ -0,0 +1,330 @@
+"""
+Experiment storage on SQLite in WAL mode.
+
+Every experiment is one row keyed by id with createdAt and name indexed, so
+inserts and lookups no longer rewrite or reparse the whole history, and
+listings can be paginated and filtered in SQL. The legacy experiments.json is
+imported once, the first time a database is opened next to it.
+
+The bulky parts of an experiment, resultSeries and input.matrix, are kept out
+of the JSON body as zlib-compressed float64 arrays in their own columns. They
+are expanded back to the JSON shape only when a full experiment is read, and
+summary listings never load them.
+
+The same database also holds the state of background jobs (JobStore), so
+that every server worker can see jobs running in the others.
+"""
+import io
+import json
+import math
+import sqlite3
+import threading
+import zlib
+from pathlib import Path
+
+import numpy as np
+from filelock import FileLock
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS experiments (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    body TEXT NOT NULL,
+    series BLOB,
+    matrix BLOB
+);
+CREATE INDEX IF NOT EXISTS experiments_created_at ON experiments (created_at);
+CREATE INDEX IF NOT EXISTS experiments_name ON experiments (name);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+# resultSeries records are stored as one float64 row per iteration in this column order
+SERIES_FIELDS = ("iteration", "bestFitness", "avgFitness", "stdFitness")
+
+
+class DuplicateExperiment(Exception):
+    pass
+
+
+def pack_array(arr: np.ndarray) -> bytes:
+    buf = io.BytesIO()
+    np.save(buf, np.ascontiguousarray(arr, dtype=np.float64), allow_pickle=False)
+    return zlib.compress(buf.getvalue())
+
+
+def unpack_array(blob: bytes) -> np.ndarray:
+    return np.load(io.BytesIO(zlib.decompress(blob)), allow_pickle=False)
+
+
+def pack_series(series):
+    """
+    Columnar blob for a resultSeries, or None if it has fields we cannot keep
+    as floats or a record without an integer iteration (kept as JSON instead).
+    """
+    try:
+        if any(set(r) - set(SERIES_FIELDS) for r in series):
+            return None
+        if any(isinstance(r.get('iteration'), bool) or not isinstance(r.get('iteration'), (int, float))
+               or not float(r['iteration']).is_integer() for r in series):
+            return None
+        rows = [[math.nan if r.get(k) is None else float(r[k]) for k in SERIES_FIELDS] for r in series]
+    except (TypeError, ValueError, AttributeError):
+        return None
+    return pack_array(np.array(rows, dtype=np.float64).reshape(-1, len(SERIES_FIELDS)))
+
+
+def unpack_series(blob: bytes):
+    series = []
+    for row in unpack_array(blob).tolist():
+        # Blobs written before iterations were required may hold NaN there
+        record = {} if math.isnan(row[0]) else {"iteration": int(row[0])}
+        for key, value in zip(SERIES_FIELDS[1:], row[1:]):
+            if not math.isnan(value):
+                record[key] = value
+        series.append(record)
+    return series
+
+
+def pack_matrix(matrix):
+    try:
+        arr = np.array(matrix, dtype=np.float64)
+    except (TypeError, ValueError):
+        return None
+    return pack_array(arr) if arr.ndim == 2 else None
+
+
+def to_row(exp: dict):
+    """Split an experiment into (id, name, created_at, body, series, matrix) columns."""
+    body = dict(exp)
+    series = pack_series(body.get('resultSeries') or [])
+    if series is not None:
+        body.pop('resultSeries', None)
+
+    matrix = None
+    inp = body.get('input')
+    if isinstance(inp, dict) and inp.get('matrix'):
+        matrix = pack_matrix(inp['matrix'])
+        if matrix is not None:
+            body['input'] = {k: v for k, v in inp.items() if k != 'matrix'}
+
+    return (exp['id'], exp.get('name', ''), exp.get('createdAt', ''),
+            json.dumps(body, ensure_ascii=False), series, matrix)
+
+
+def from_row(body, series, matrix):
+    exp = json.loads(body)
+    if series is not None:
+        exp['resultSeries'] = unpack_series(series)
+    if matrix is not None:
+        exp.setdefault('input', {})['matrix'] = unpack_array(matrix).tolist()
+    return exp
+
+
+def read_json_experiments(path: Path):
+    if not path.exists():
+        return []
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+class SQLiteStore:
+    """Thread-local WAL connections to one database file; `schema` is applied once under a file lock."""
+
+    schema = ""
+
+    def __init__(self, db_path):
+        self.db_path = str(db_path)
+        self._local = threading.local()
+        # Schema creation and migration must happen once even when several
+        # workers start at the same time.
+        with FileLock(self.db_path + '.lock'):
+            self._conn().executescript(self.schema)
+            self._setup()
+
+    def _setup(self):
+        pass
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def reset(self):
+        """Forget connections inherited from a parent process (call after fork)."""
+        self._local = threading.local()
+
+
+class ExperimentStore(SQLiteStore):
+    schema = SCHEMA
+
+    def __init__(self, db_path, legacy_json=None):
+        self.legacy_json = legacy_json
+        super().__init__(db_path)
+
+    def _setup(self):
+        self._add_blob_columns()
+        if self.legacy_json is not None:
+            self._migrate_json(Path(self.legacy_json))
+
+    def _add_blob_columns(self):
+        # Databases created before series/matrix were split out of the body
+        conn = self._conn()
+        cols = {row[1] for row in conn.execute('PRAGMA table_info(experiments)')}
+        with conn:
+            for col in ('series', 'matrix'):
+                if col not in cols:
+                    conn.execute(f'ALTER TABLE experiments ADD COLUMN {col} BLOB')
+
+    def _migrate_json(self, path: Path):
+        conn = self._conn()
+        key = 'migrated:' + path.name
+        if conn.execute('SELECT 1 FROM meta WHERE key = ?', (key,)).fetchone():
+            return
+        rows = [to_row(e) for e in read_json_experiments(path)]
+        with conn:
+            conn.executemany(
+                'INSERT OR IGNORE INTO experiments (id, name, created_at, body, series, matrix) '
+                'VALUES (?, ?, ?, ?, ?, ?)', rows)
+            conn.execute('INSERT INTO meta VALUES (?, ?)', (key, str(len(rows))))
+
+    def append(self, exp: dict):
+        try:
+            with self._conn() as conn:
+                conn.execute(
+                    'INSERT INTO experiments (id, name, created_at, body, series, matrix) '
+                    'VALUES (?, ?, ?, ?, ?, ?)', to_row(exp))
+        except sqlite3.IntegrityError:
+            raise DuplicateExperiment(exp['id'])
+
+    def get(self, exp_id):
+        row = self._conn().execute(
+            'SELECT body, series, matrix FROM experiments WHERE id = ?', (exp_id,)).fetchone()
+        return from_row(*row) if row else None
+
+    def _where(self, name=None, created_after=None, created_before=None):
+        clauses, args = [], []
+        if name:
+            clauses.append("name LIKE ? ESCAPE '\\'")
+            args.append('%' + name.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%')
+        if created_after:
+            clauses.append('created_at >= ?')
+            args.append(created_after)
+        if created_before:
+            clauses.append('created_at < ?')
+            args.append(created_before)
+        return (' WHERE ' + ' AND '.join(clauses) if clauses else ''), args
+
+    def count(self, **filters):
+        where, args = self._where(**filters)
+        return self._conn().execute('SELECT COUNT(*) FROM experiments' + where, args).fetchone()[0]
+
+    def _select(self, columns, limit, offset, newest_first, filters):
+        where, args = self._where(**filters)
+        order = ' ORDER BY created_at DESC, rowid DESC' if newest_first else ' ORDER BY created_at, rowid'
+        sql = f'SELECT {columns} FROM experiments' + where + order + ' LIMIT ? OFFSET ?'
+        args += [-1 if limit is None else limit, offset]
+        return self._conn().execute(sql, args)
+
+    def list(self, limit=None, offset=0, newest_first=False, **filters):
+        rows = self._select('body, series, matrix', limit, offset, newest_first, filters)
+        return [from_row(*row) for row in rows]
+
+    def list_summaries(self, limit=None, offset=0, newest_first=False, **filters):
+        """Experiments without resultSeries and input.matrix; the blob columns are never read."""
+        rows = self._select('body', limit, offset, newest_first, filters)
+        summaries = []
+        for (body,) in rows:
+            exp = json.loads(body)
+            exp.pop('resultSeries', None)
+            if isinstance(exp.get('input'), dict):
+                exp['input'].pop('matrix', None)
+            summaries.append(exp)
+        return summaries
+
+
+JOB_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    summary TEXT NOT NULL,
+    series BLOB,
+    result TEXT,
+    cancel_requested INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS jobs_created_at ON jobs (created_at);
+-- A running job's series in the chunks appended at each publish
+CREATE TABLE IF NOT EXISTS job_series (
+    job_id TEXT NOT NULL,
+    chunk BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS job_series_job ON job_series (job_id);
+"""
+
+
+class JobStore(SQLiteStore):
+    """
+    Job state shared by all workers: each job's summary, its resultSeries so
+    far, its final result and a cancellation flag that the owning worker
+    polls. Only the worker that runs a job writes its row. The series is
+    appended in chunks (job_series), so publishing costs what it adds rather
+    than the whole series again.
+    """
+
+    schema = JOB_SCHEMA
+
+    def save(self, summary, new_series=None, result=None):
+        """Upsert a job's summary (and result), appending the series records added since its last save."""
+        blob = pack_series(new_series) if new_series else None
+        with self._conn() as conn:
+            conn.execute(
+                'INSERT INTO jobs (id, status, created_at, summary, result) VALUES (?, ?, ?, ?, ?) '
+                'ON CONFLICT(id) DO UPDATE SET status = excluded.status, summary = excluded.summary, '
+                'result = COALESCE(excluded.result, jobs.result)',
+                (summary['id'], summary['status'], summary['createdAt'], json.dumps(summary), result))
+            if blob is not None:
+                conn.execute('INSERT INTO job_series (job_id, chunk) VALUES (?, ?)', (summary['id'], blob))
+
+    def get(self, job_id):
+        """(summary, series, result JSON) of a job, or None."""
+        conn = self._conn()
+        row = conn.execute('SELECT summary, series, result FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        if row is None:
+            return None
+        summary, series, result = row
+        # Rows written before the series was chunked keep it in jobs.series
+        records = unpack_series(series) if series is not None else []
+        for (chunk,) in conn.execute('SELECT chunk FROM job_series WHERE job_id = ? ORDER BY rowid', (job_id,)):
+            records.extend(unpack_series(chunk))
+        return json.loads(summary), records, result
+
+    def list(self):
+        rows = self._conn().execute('SELECT summary FROM jobs ORDER BY created_at, rowid')
+        return [json.loads(summary) for (summary,) in rows]
+
+    def request_cancel(self, job_id):
+        with self._conn() as conn:
+            return conn.execute('UPDATE jobs SET cancel_requested = 1 WHERE id = ?', (job_id,)).rowcount > 0
+
+    def cancel_requested(self, job_id):
+        row = self._conn().execute('SELECT cancel_requested FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        return bool(row and row[0])
+
+    def evict_finished(self, statuses, keep):
+        marks = ','.join('?' * len(statuses))
+        with self._conn() as conn:
+            evicted = [(job_id,) for (job_id,) in conn.execute(
+                f'SELECT id FROM jobs WHERE status IN ({marks}) AND id NOT IN '
+                f'(SELECT id FROM jobs WHERE status IN ({marks}) ORDER BY created_at DESC LIMIT ?)',
+                (*statuses, *statuses, keep))]
+            conn.executemany('DELETE FROM jobs WHERE id = ?', evicted)
+            conn.executemany('DELETE FROM job_series WHERE job_id = ?', evicted)
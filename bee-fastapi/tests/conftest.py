@@ -0,0 +1,8 @@
+"""sys.path setup for the flat bee-fastapi modules (as in benchmarks/common.py)."""
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
@@ -0,0 +1,16 @@
+import numpy as np
+import pytest
+
+from batch import run_batch
+
+
+@pytest.mark.parametrize("params", [
+    {"islands": 2},
+    {"multiObjective": "criteria"},
+    {"checkpointEvery": 5},
+    {"warmStart": "abc123"},
+])
+def test_batch_rejects_params_its_runs_cannot_carry(params):
+    runs = [{"numBees": 4, "iterations": 3}, dict(numBees=4, iterations=3, **params)]
+    with pytest.raises(ValueError, match="not supported in batches"):
+        run_batch(np.eye(4), runs)
@@ -0,0 +1,47 @@
+import json
+
+import pytest
+
+import checkpoints
+from checkpoints import Checkpoint, list_checkpoints
+from runner import execute_run
+from schema import ExperimentRunRequest
+
+
+def make_request(iterations, every=5, **params):
+    matrix = [[i % 3, 2 * i % 7, 3] for i in range(10)]
+    params = dict({"numBees": 16, "seed": 7}, iterations=iterations, checkpointEvery=every, **params)
+    return ExperimentRunRequest(params=params, input={"mode": "manual", "matrix": matrix})
+
+
+def test_cli_resume_keeps_saving_in_dir(tmp_path, monkeypatch):
+    default = tmp_path / "default"
+    monkeypatch.setattr(checkpoints, "CHECKPOINT_DIR", default)
+    directory = tmp_path / "elsewhere"
+    first = execute_run(make_request(10), checkpoint_dir=directory)
+    out = tmp_path / "result.json"
+    assert checkpoints.main(["--dir", str(directory), "resume", first.checkpointId,
+                             "--iterations", "20", "--output", str(out)]) == 0
+    assert len(json.loads(out.read_text())["resultSeries"]) == 20
+    assert Checkpoint.read(first.checkpointId, directory, arrays=False).meta["iteration"] == 20
+    assert [s["id"] for s in list_checkpoints(directory)] == [first.checkpointId]
+    assert not default.exists()
+
+
+@pytest.mark.parametrize("params", [
+    {},
+    {"objectiveFunction": "topsis", "numBees": 40},
+    {"objectiveFunction": "weighted-sum"},
+    {"objectiveFunction": "rastrigin", "cacheEvaluations": True, "cacheResolution": 1e-6},
+    {"bitGenerator": "philox", "feedLimit": 3},
+])
+def test_resumed_run_is_bit_identical_to_an_uninterrupted_one(tmp_path, params):
+    straight = execute_run(make_request(30, **params), checkpoint_dir=tmp_path)
+    first = execute_run(make_request(12, **params), checkpoint_dir=tmp_path)
+    ckpt = Checkpoint.read(first.checkpointId, tmp_path)
+    req = ExperimentRunRequest(**ckpt.meta["request"])
+    req.params.iterations = 30
+    resumed = execute_run(req, resume=ckpt, checkpoint_dir=tmp_path)
+    assert resumed.resultSeries == straight.resultSeries
+    assert resumed.bestSolution == straight.bestSolution
+    assert Checkpoint.read(first.checkpointId, tmp_path, arrays=False).meta["iteration"] == 30
@@ -0,0 +1,136 @@
+import json
+import threading
+import time
+
+import pytest
+
+import jobs
+from jobs import CANCELLED, COMPLETED, RUNNING, Job, JobManager
+from runner import execute_run
+from schema import ExperimentRunRequest
+from storage import JobStore
+
+
+def make_request(iterations=20):
+    matrix = [[i, 2 * i % 7, 3] for i in range(12)]
+    return ExperimentRunRequest(params={"numBees": 12, "iterations": iterations, "seed": 1},
+                                input={"mode": "manual", "matrix": matrix})
+
+
+@pytest.fixture
+def store(tmp_path):
+    return JobStore(tmp_path / "jobs.db")
+
+
+def stored_status(store, job_id):
+    return store.get(job_id)[0]["status"]
+
+
+def test_cancel_before_the_worker_starts_the_job_is_published(store):
+    manager = JobManager(concurrency=1, store=store)
+    job = Job(make_request())
+    manager._jobs[job.id] = job
+    manager._publish(job)
+    # The worker thread took the job (future.cancel() fails), then cancel() set the flag
+    job.cancel_event.set()
+    manager._run(job)
+    assert job.status == CANCELLED
+    assert stored_status(store, job.id) == CANCELLED
+    manager.shutdown()
+
+
+def test_series_is_published_in_appended_chunks(store):
+    manager = JobManager(concurrency=1, store=store)
+    job = Job(make_request())
+    manager._jobs[job.id] = job
+    for i in range(1, 6):
+        job.series.append({"iteration": i, "bestFitness": 1.0 / i})
+        manager._publish(job)
+    manager._publish(job)
+    _, series, _ = store.get(job.id)
+    assert series == job.series
+    chunks = store._conn().execute("SELECT COUNT(*) FROM job_series WHERE job_id = ?", (job.id,)).fetchone()[0]
+    assert chunks == 5
+    manager.shutdown()
+
+
+def test_completed_job_is_stored_with_its_whole_series(store):
+    manager = JobManager(concurrency=1, store=store)
+    job = manager.submit(make_request(iterations=30))
+    job.future.result(timeout=60)
+    summary, series, result = store.get(job.id)
+    assert summary["status"] == COMPLETED
+    assert [r["iteration"] for r in series] == list(range(1, 31))
+    assert result is not None
+    manager.shutdown()
+
+
+def test_cancel_from_another_worker_stops_a_queued_job(store):
+    owner = JobManager(concurrency=1, store=store)
+    other = JobManager(concurrency=1, store=store)
+    job = Job(make_request())
+    owner._jobs[job.id] = job
+    owner._publish(job)
+    # The other worker only sees the stored job and flags it
+    other.cancel(job.id)
+    owner._run(job)
+    assert job.status == CANCELLED
+    assert stored_status(store, job.id) == CANCELLED
+    owner.shutdown()
+    other.shutdown()
+
+
+def wait_until(condition, timeout=30):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_cancel_of_a_queued_job_never_runs_it(store, monkeypatch):
+    release = threading.Event()
+    started = []
+
+    def blocking_run(req, **kwargs):
+        started.append(req)
+        release.wait(30)
+        return execute_run(req, **kwargs)
+
+    monkeypatch.setattr(jobs, "execute_run", blocking_run)
+    manager = JobManager(concurrency=1, store=store)
+    running = manager.submit(make_request())
+    wait_until(lambda: started)
+    queued = manager.submit(make_request())
+    assert manager.cancel(queued.id).status == CANCELLED
+    assert stored_status(store, queued.id) == CANCELLED
+    release.set()
+    running.future.result(timeout=60)
+    assert len(started) == 1 and running.status == COMPLETED
+    manager.shutdown()
+
+
+def test_cancel_of_a_running_job_keeps_its_partial_series(store):
+    manager = JobManager(concurrency=1, store=store)
+    job = manager.submit(make_request(iterations=1_000_000))
+    wait_until(lambda: job.series)
+    manager.cancel(job.id)
+    job.future.result(timeout=60)
+    summary, series, result = store.get(job.id)
+    assert job.status == summary["status"] == CANCELLED
+    assert 0 < len(series) < 1_000_000
+    assert series == job.series
+    assert json.loads(result)["stopReason"] == "cancelled"
+    manager.shutdown()
+
+
+def test_cancel_from_another_worker_stops_a_running_job(store, monkeypatch):
+    monkeypatch.setattr(jobs, "PUBLISH_INTERVAL", 0.0)
+    owner = JobManager(concurrency=1, store=store)
+    other = JobManager(concurrency=1, store=store)
+    job = owner.submit(make_request(iterations=1_000_000))
+    wait_until(lambda: stored_status(store, job.id) == RUNNING)
+    other.cancel(job.id)
+    job.future.result(timeout=60)
+    assert job.status == stored_status(store, job.id) == CANCELLED
+    owner.shutdown()
+    other.shutdown()
@@ -0,0 +1,31 @@
+import os
+import time
+
+from metrics import Counter, Histogram, Registry, render_workers, write_snapshot
+
+
+def make_registry(runs):
+    registry = Registry()
+    counter = registry.register(Counter("bee_runs_total", "Runs", ("reason",)))
+    counter.inc(runs, reason="iterations")
+    histogram = registry.register(Histogram("bee_run_duration_seconds", "Wall time", buckets=(1.0,)))
+    histogram.observe(0.5)
+    return registry
+
+
+def test_render_workers_labels_every_worker_once_per_metric(tmp_path):
+    write_snapshot(tmp_path, make_registry(3), pid=101)
+    text = render_workers(tmp_path, make_registry(4))
+    assert text.count("# TYPE bee_runs_total counter") == 1
+    assert 'bee_runs_total{worker="101",reason="iterations"} 3.0' in text
+    assert f'bee_runs_total{{worker="{os.getpid()}",reason="iterations"}} 4.0' in text
+    assert 'bee_run_duration_seconds_bucket{worker="101",le="1.0"} 1' in text
+
+
+def test_render_workers_drops_stale_snapshots(tmp_path):
+    write_snapshot(tmp_path, make_registry(3), pid=101)
+    old = time.time() - 60
+    os.utime(tmp_path / "101.json", (old, old))
+    text = render_workers(tmp_path, make_registry(4), max_age=30)
+    assert 'worker="101"' not in text
+    assert not (tmp_path / "101.json").exists()
@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from abc_engine import iterate_abc
+from objectives import CachedObjective, alternative_scores, make_objective
+from runner import best_source_label, make_colony
+from schema import BeeParams
+from stacked import run_stacked
+
+
+def test_weighted_sum_scores_each_alternative_alone():
+    matrix = np.array([[1.0, 10.0], [3.0, 0.0], [3.0, 5.0]])
+    f = make_objective("weighted-sum", matrix, [1, 1])
+    np.testing.assert_allclose(f(f.start), -alternative_scores(matrix, [1, 1]))
+    np.testing.assert_allclose(f(f.start), [-0.5, -0.5, -0.75])
+
+
+def test_weighted_sum_best_solution_is_the_best_alternative():
+    for seed in range(3):
+        matrix = np.random.default_rng(seed).random((25, 6))
+        best = int(np.argmax(alternative_scores(matrix)))
+        colony = make_colony(matrix, BeeParams(numBees=25, iterations=150, seed=seed,
+                                               objectiveFunction="weighted-sum"))
+        list(iterate_abc(colony, 150))
+        assert int(np.argmax(colony.best_position)) == best
+        assert best_source_label(colony) == f"A{best + 1}"
+        assert colony.best_value == -alternative_scores(matrix).max()
+
+
+def test_stacked_weighted_sum_finds_the_best_alternative_of_every_matrix():
+    matrices = [np.random.default_rng(seed).random((10, 4)) for seed in range(6)]
+    results, _ = run_stacked(matrices, BeeParams(numBees=10, iterations=150, seed=1,
+                                                 objectiveFunction="weighted-sum"))
+    assert [r["bestAlternative"] for r in results] == [
+        f"A{int(np.argmax(alternative_scores(m))) + 1}" for m in matrices]
+
+
+def test_stacked_rejects_params_it_cannot_honour():
+    matrices = [np.eye(3)]
+    with pytest.raises(ValueError, match="maxEvaluations, backend, islands"):
+        run_stacked(matrices, BeeParams(numBees=3, iterations=5, maxEvaluations=10,
+                                        backend="numba", islands=2))
+    # Defaults, and their "off" spellings, are accepted
+    run_stacked(matrices, BeeParams(numBees=3, iterations=5, trace="None", islands=1))
+
+
+def test_cached_objective_matches_fobj_and_counts_duplicates():
+    f = make_objective("rastrigin", np.zeros((2, 5)))
+    cached = CachedObjective(f, resolution=1e-6, extent=1.0)
+    X = np.random.default_rng(0).random((300, 5))
+    X[200:] = X[:100]
+    np.testing.assert_allclose(cached(X), f(X))
+    assert (cached.hits, cached.misses) == (100, 200)
+    np.testing.assert_allclose(cached(X[::-1]), f(X[::-1]))
+    assert (cached.hits, cached.misses) == (400, 200)
+
+
+@pytest.mark.parametrize("kwargs", [{"resolution": 0.0}, {"resolution": 1e-18, "extent": 1e3}])
+def test_cached_objective_rejects_unusable_resolutions(kwargs):
+    with pytest.raises(ValueError):
+        CachedObjective(make_objective("sphere", np.zeros((2, 3))), **kwargs)
@@ -0,0 +1,35 @@
+import os
+
+import numpy as np
+
+from abc_engine import Colony, iterate_abc
+from observers import TraceFile, read_trace, trim_traces
+
+
+def write(path, size, mtime):
+    path.write_bytes(b"x" * size)
+    os.utime(path, (mtime, mtime))
+
+
+def test_trim_traces_deletes_the_oldest_first(tmp_path):
+    for i, name in enumerate(["a", "b", "c", "d"]):
+        write(tmp_path / f"{name}.trace", 100, 1000 + i)
+    (tmp_path / "notes.txt").write_bytes(b"x" * 1000)
+    trim_traces(tmp_path, 250)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["c.trace", "d.trace", "notes.txt"]
+
+
+def test_trim_traces_keeps_the_current_trace(tmp_path):
+    write(tmp_path / "old.trace", 100, 1000)
+    write(tmp_path / "big.trace", 500, 900)
+    trim_traces(tmp_path, 200, keep=tmp_path / "big.trace")
+    assert [p.name for p in tmp_path.iterdir()] == ["big.trace"]
+
+
+def test_finished_trace_file_bounds_its_directory(tmp_path):
+    write(tmp_path / "old.trace", 10_000, 1000)
+    colony = Colony(np.eye(4), rng=np.random.default_rng(1), size=6)
+    colony.observer = TraceFile(tmp_path / "new.trace", max_dir_bytes=5_000)
+    list(iterate_abc(colony, 5))
+    assert [p.name for p in tmp_path.iterdir()] == ["new.trace"]
+    assert len(read_trace(tmp_path / "new.trace")["best"]) == 5
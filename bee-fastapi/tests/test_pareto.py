@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+from pareto import first_front, nondominated_sort
+
+
+def brute_force_ranks(F):
+    """Fronts peeled off with every pairwise dominance test."""
+    dom = np.all(F[:, None] <= F[None], axis=2) & np.any(F[:, None] < F[None], axis=2)
+    rank = np.full(len(F), -1)
+    rest = np.ones(len(F), dtype=bool)
+    front = 0
+    while rest.any():
+        free = np.flatnonzero(rest)[dom[np.ix_(rest, rest)].sum(axis=0) == 0]
+        rank[free] = front
+        rest[free] = False
+        front += 1
+    return rank
+
+
+def matrices(M, seed):
+    rng = np.random.default_rng(seed)
+    n = int(rng.integers(2, 500))
+    yield rng.random((n, M))
+    # Ties and duplicate rows
+    yield rng.integers(0, 4, size=(n, M)).astype(float)
+    yield np.round(rng.random((n, M)), 1)
+    # Many points on few fronts
+    F = rng.random((n, M))
+    F[:, -1] = 1.0 - F[:, 0]
+    yield F
+
+
+@pytest.mark.parametrize("M", [1, 2, 3, 4, 5, 7])
+@pytest.mark.parametrize("seed", range(4))
+def test_nondominated_sort_matches_brute_force(M, seed):
+    for F in matrices(M, seed):
+        expected = brute_force_ranks(F)
+        np.testing.assert_array_equal(nondominated_sort(F), expected)
+        np.testing.assert_array_equal(first_front(F), expected == 0)
+
+
+def test_identical_rows_share_a_front():
+    F = np.array([[1.0, 2.0, 3.0], [1.0, 2.0, 3.0], [0.0, 2.0, 3.0]])
+    np.testing.assert_array_equal(nondominated_sort(F), [1, 1, 0])
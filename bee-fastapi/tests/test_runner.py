@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+from pydantic import ValidationError
+
+import runner
+from abc_engine import iterate_abc
+from metrics import RunMetrics
+from observers import Observer
+from schema import BeeParams, ExperimentRunRequest
+
+MATRIX = np.arange(24, dtype=np.float64).reshape(8, 3) % 5
+
+
+def test_plain_colony_runs_without_observer():
+    colony = runner.make_colony(MATRIX, BeeParams(numBees=8, iterations=5, seed=1))
+    assert colony.observer is None
+    assert colony.run_metrics is None and colony.trace is None
+
+
+def test_profiled_colony_gets_run_metrics():
+    colony = runner.make_colony(MATRIX, BeeParams(numBees=8, iterations=5, seed=1, profile=True))
+    assert isinstance(colony.observer, RunMetrics)
+    assert colony.observer is colony.run_metrics
+
+
+def test_api_runs_follow_bee_run_metrics(monkeypatch):
+    req = ExperimentRunRequest(params={"numBees": 8, "iterations": 5, "seed": 1},
+                               input={"mode": "manual", "matrix": MATRIX.tolist()})
+    monkeypatch.setattr(runner, "RUN_METRICS", True)
+    assert isinstance(runner.build_colony(req).observer, RunMetrics)
+    monkeypatch.setattr(runner, "RUN_METRICS", False)
+    assert runner.build_colony(req).observer is None
+
+
+@pytest.mark.parametrize("field", ["iterations", "numBees", "traceEvery", "archiveSize",
+                                   "checkpointEvery", "migrants", "migrationInterval"])
+def test_counts_must_be_positive(field):
+    params = {"numBees": 8, "iterations": 5, field: 0}
+    with pytest.raises(ValidationError):
+        BeeParams(**params)
+
+
+def test_default_limit_does_not_grow_with_the_colony():
+    colony = runner.make_colony(MATRIX, BeeParams(numBees=2000, iterations=100, seed=1))
+    assert colony.limit == MATRIX.shape[0] * MATRIX.shape[1]
+    scouts = []
+
+    class Scouts(Observer):
+        def on_scout(self, colony, idx):
+            scouts.append(len(idx))
+
+    colony.observer = Scouts()
+    list(iterate_abc(colony, 100))
+    assert sum(scouts) > 0